@@ -0,0 +1,254 @@
+"""
+Benchmarks of the ccdioutils hot paths
+
+Times FITS loading, every UniformFilter, every converter, statistics and cluster
+extraction on synthetic captures of several sizes, writes the results as JSON and
+optionally compares them against a previous run. Run from experiments/fits_load:
+
+    python -m benchmarks.fits_benchmarks -o results.json
+    python -m benchmarks.fits_benchmarks -b results.json
+"""
+
+from ccdioutils import (
+    CaptureStatistics,
+    CCDCaptureModel,
+    ClusterExtractor,
+    ClusterFeatures,
+    FastPixmapConverter,
+    FilterPipeline,
+    MatplotlibBasedConverter,
+    RawPixmapConverter,
+    StampExtractor,
+    UniformFilter,
+)
+from itertools import chain
+from pathlib import Path
+from sys import argv
+from tempfile import TemporaryDirectory
+from typing import Callable, Dict, List, Tuple
+from .synthetic import PEDESTAL, READ_NOISE, makeFrame, writeFits
+import argparse
+import json
+import platform
+import re
+import statistics
+import time
+import numpy as np
+
+# Upper bounds promised by the code, in milliseconds, checked on every run
+BUDGETS_MS = {
+    # Fits2QPixmapConverter.isFast: "a 3200x550 matrix in less than 25ms"
+    "convert/FastPixmapConverter/550x3200": 25.0,
+}
+
+
+def getOptions():
+    parser = argparse.ArgumentParser(
+        prog="fits_benchmarks",
+        description="Times load, filter, convert and cluster hot paths",
+    )
+    parser.add_argument(
+        "-s",
+        "--sizes",
+        default="550x3200,1100x6400",
+        help="Comma separated frame sizes, as ROWSxCOLS",
+    )
+    parser.add_argument(
+        "--hdus",
+        default="1,8",
+        help="Comma separated HDU counts of the FITS files loaded",
+    )
+    parser.add_argument(
+        "-r", "--repeat", type=int, default=5, help="Timed runs per benchmark"
+    )
+    parser.add_argument(
+        "-k", "--select", default=None, help="Only run benchmarks matching a regex"
+    )
+    parser.add_argument("-o", "--output", help="Write results to this JSON file")
+    parser.add_argument(
+        "-b", "--baseline", help="Compare results against this JSON file"
+    )
+    parser.add_argument(
+        "-t",
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="Slowdown over the baseline reported as a regression, 0.2 being 20%%",
+    )
+    return parser.parse_args(args=argv[1::])
+
+
+def parseSizes(sizes: str) -> List[Tuple[int, int]]:
+    return [tuple(int(n) for n in size.split("x")) for size in sizes.split(",")]
+
+
+def timeIt(
+    run: Callable[[], object], repeat: int, setup: Callable[[], None] = None
+) -> Dict[str, float]:
+    """Time run, after one untimed warm up run, calling setup before each run"""
+    times = list()
+    for i in range(repeat + 1):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        run()
+        elapsed = (time.perf_counter() - start) * 1000
+        if i > 0:
+            times.append(elapsed)
+    return {
+        "median_ms": statistics.median(times),
+        "min_ms": min(times),
+        "max_ms": max(times),
+        "runs": len(times),
+    }
+
+
+def loadBenchmarks(workDir: Path, shapes, hduCounts):
+    for shape in shapes:
+        for hduCount in hduCounts:
+            path = writeFits(
+                workDir / f"{shape[0]}x{shape[1]}-{hduCount}.fits", hduCount, shape
+            )
+            suffix = f"{shape[0]}x{shape[1]}x{hduCount}"
+            yield f"load/headers/{suffix}", lambda path=path: CCDCaptureModel.load(path)
+            yield f"load/data/{suffix}", lambda path=path: [
+                capture.rawData().sum() for capture in CCDCaptureModel.load(path)
+            ]
+
+
+def frameBenchmarks(shapes):
+    rng = np.random.default_rng(0)
+    filters = [
+        UniformFilter.ScalarMultiply(1.02857e-5),
+        UniformFilter.Add(-PEDESTAL),
+        UniformFilter.SubstituteInRange(0, PEDESTAL, 0),
+        UniformFilter.SubstituteOutOfRange(0, PEDESTAL, 0),
+    ]
+    converters = [
+        FastPixmapConverter(),
+        RawPixmapConverter(),
+        MatplotlibBasedConverter(colormap="Greys_r"),
+    ]
+    for shape in shapes:
+        yield from shapeBenchmarks(
+            makeFrame(shape, rng), f"{shape[0]}x{shape[1]}", filters, converters
+        )
+
+
+def shapeBenchmarks(frame: np.ndarray, suffix: str, filters, converters):
+    """
+    Benchmarks of a single frame, named after its size with suffix
+
+    Kept apart from frameBenchmarks so the closures of every size bind their own
+    frame, buffers and extractors rather than those of the last size.
+    """
+    for filter in filters:
+        name = type(filter).__name__
+        yield f"filter/{name}/{suffix}", lambda f=filter: f.filter(frame)
+        buffer = frame.copy()
+        yield (
+            f"filter/{name}/inplace/{suffix}",
+            lambda f=filter, b=buffer: f.filterInPlace(b),
+            lambda b=buffer: np.copyto(b, frame),
+        )
+    pipeline = FilterPipeline(filters)
+    yield f"filter/FilterPipeline/{suffix}", lambda: pipeline.apply(frame)
+
+    for converter in converters:
+        name = type(converter).__name__
+        yield f"convert/{name}/{suffix}", lambda c=converter: c.toQImage(frame)
+
+    yield f"stats/CaptureStatistics/{suffix}", lambda: CaptureStatistics.compute(frame)
+    extractor = ClusterExtractor(threshold=PEDESTAL + 5 * READ_NOISE)
+    yield f"cluster/extract/{suffix}", lambda: extractor.extract(frame)
+    labels, count = extractor.label(frame)
+    yield f"cluster/features/{suffix}", lambda: ClusterFeatures.compute(
+        frame, labels, count
+    )
+    autoExtractor = ClusterExtractor()
+    yield f"cluster/extract/auto/{suffix}", lambda: autoExtractor.extract(frame)
+    catalog = extractor.extract(frame)
+    stampExtractor = StampExtractor(shape=(10, 10), recenter=True)
+    stamps = stampExtractor.allocate(len(catalog))
+    yield f"stamps/extract/{suffix}", lambda: stampExtractor.extract(
+        frame, catalog, out=stamps
+    )
+
+
+def runBenchmarks(options) -> Dict[str, Dict[str, float]]:
+    shapes = parseSizes(options.sizes)
+    hduCounts = [int(n) for n in options.hdus.split(",")]
+    select = None if options.select is None else re.compile(options.select)
+    results = dict()
+    with TemporaryDirectory() as workDir:
+        # Timed as they are generated, only the frames of one size are alive at once
+        benchmarks = chain(
+            loadBenchmarks(Path(workDir), shapes, hduCounts), frameBenchmarks(shapes)
+        )
+        for name, run, *setup in benchmarks:
+            if select is not None and not select.search(name):
+                continue
+            results[name] = timeIt(run, options.repeat, *setup)
+            print(f"{name:<56} {results[name]['median_ms']:10.2f} ms", flush=True)
+    return results
+
+
+def compare(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    tolerance: float,
+) -> List[str]:
+    """
+    Names of the benchmarks that got slower than the baseline allows
+
+    Fastest runs are compared, they are the least affected by other processes.
+    """
+    regressions = list()
+    print(f"\n{'benchmark':<56} {'baseline':>10} {'current':>10} {'ratio':>7}")
+    for name in sorted(results.keys() & baseline.keys()):
+        before = baseline[name]["min_ms"]
+        after = results[name]["min_ms"]
+        ratio = after / before if before > 0 else float("inf")
+        flag = ""
+        if ratio > 1 + tolerance:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<56} {before:10.2f} {after:10.2f} {ratio:7.2f}{flag}")
+    return regressions
+
+
+def overBudget(results: Dict[str, Dict[str, float]]) -> List[str]:
+    """Names of the benchmarks slower than the limits promised by the code"""
+    return [
+        name
+        for name, budget in BUDGETS_MS.items()
+        if name in results and results[name]["median_ms"] > budget
+    ]
+
+
+if __name__ == "__main__":
+    options = getOptions()
+    results = runBenchmarks(options)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            "repeat": options.repeat,
+        },
+        "results": results,
+    }
+    if options.output is not None:
+        with open(options.output, "w") as f:
+            json.dump(report, f, indent=1)
+
+    failures = overBudget(results)
+    for name in failures:
+        print(f"{name} exceeds its {BUDGETS_MS[name]} ms budget")
+    if options.baseline is not None:
+        with open(options.baseline) as f:
+            failures += compare(results, json.load(f)["results"], options.tolerance)
+    exit(1 if failures else 0)
@@ -0,0 +1,54 @@
+from astropy.io import fits
+from pathlib import Path
+from typing import Tuple
+import numpy as np
+
+# Pedestal and read noise of the synthetic CCD, in ADU
+PEDESTAL = 1000.0
+READ_NOISE = 10.0
+
+
+def makeFrame(
+    shape: Tuple[int, int],
+    rng: np.random.Generator,
+    hitsPerMegapixel: int = 200,
+) -> np.ndarray:
+    """
+    Synthetic CCD capture, gaussian read noise over a pedestal with particle hits
+
+    Hits are small blobs and short straight tracks of a few hundred to a few thousand
+    ADU per pixel, which is enough to exercise thresholds and clustering.
+    """
+    rows, cols = shape
+    frame = rng.normal(PEDESTAL, READ_NOISE, shape).astype(np.float32)
+    hits = max(1, rows * cols * hitsPerMegapixel // 1_000_000)
+    length = rng.integers(1, 12, hits)
+    angle = rng.uniform(0, np.pi, hits)
+    startRow = rng.integers(0, rows, hits)
+    startCol = rng.integers(0, cols, hits)
+    energy = rng.uniform(300, 3000, hits)
+    for step in range(length.max()):
+        alive = step < length
+        r = (startRow + step * np.sin(angle)).astype(np.intp)[alive]
+        c = (startCol + step * np.cos(angle)).astype(np.intp)[alive]
+        inside = (r < rows) & (c >= 0) & (c < cols)
+        np.add.at(frame, (r[inside], c[inside]), energy[alive][inside])
+    return frame
+
+
+def writeFits(path: Path, hduCount: int, shape: Tuple[int, int], seed: int = 0) -> Path:
+    """
+    Write a FITS file holding hduCount synthetic captures after an empty primary
+
+    Captures are stored like the DAQ does, as uint16, i.e. int16 with BZERO = 32768,
+    so loading them goes through the same scaling as real files.
+    """
+    rng = np.random.default_rng(seed)
+    hdus = [fits.PrimaryHDU()]
+    for _ in range(hduCount):
+        frame = np.clip(np.rint(makeFrame(shape, rng)), 0, np.iinfo(np.uint16).max)
+        hdu = fits.ImageHDU(frame.astype(np.uint16))
+        hdu.header["DATE"] = "2025-01-01T00:00:00"
+        hdus.append(hdu)
+    fits.HDUList(hdus).writeto(path, overwrite=True)
+    return path
@@ -0,0 +1,237 @@
+"""
+Headless batch processing of FITS files into a cluster catalog
+
+Every capture of every input file is converted to keV, clustered and measured on a
+pool of processes. The features of all clusters are written as a columnar catalog,
+a .npz file holding one array per column, one row per cluster. Only the headless
+part of ccdioutils is imported, neither PySide6 nor matplotlib are loaded.
+
+    python ccd_batch.py -o night.npz /data/2025-01-01/
+    python ccd_batch.py -o night.npz "/data/2025-01-01/*.fits" -j 32
+"""
+
+from ccdioutils import (
+    CCDCaptureModel,
+    FitsFile,
+    ClusterCatalog,
+    ClusterExtractor,
+    HDUFilters,
+    UniformFilter,
+)
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from glob import glob
+from pathlib import Path
+from sys import argv, stderr
+from typing import Dict, List, Optional
+import argparse
+import os
+import time
+import numpy as np
+
+# Default ADU to keV conversion factor, same as pyqt_fits_load
+kevFactor = 1.02857e-5
+
+# Extensions of the files picked up when a directory is given
+FITS_EXTENSIONS = (".fits", ".fit", ".fts")
+
+# Masters and masks of the run, loaded once per worker process by initWorker
+_workerFilters = HDUFilters()
+
+
+def getOptions():
+    parser = argparse.ArgumentParser(
+        prog="ccd_batch",
+        description="Clusters every capture of a set of FITS files into a catalog",
+    )
+    parser.add_argument(
+        "inputs",
+        nargs="+",
+        help="FITS files, directories holding FITS files or glob patterns",
+    )
+    parser.add_argument(
+        "-o", "--output", required=True, help="Path of the .npz catalog to write"
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count(),
+        help="Number of files processed in parallel",
+    )
+    parser.add_argument(
+        "--kev-factor",
+        type=float,
+        default=kevFactor,
+        help="Factor converting pixel values to keV",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=None,
+        help="Cluster threshold in keV, estimated per capture when not given",
+    )
+    parser.add_argument(
+        "--n-sigma",
+        type=float,
+        default=5.0,
+        help="Noise multiple above the median of the estimated threshold",
+    )
+    parser.add_argument(
+        "--min-pixels",
+        type=int,
+        default=1,
+        help="Clusters with fewer pixels are discarded",
+    )
+    parser.add_argument(
+        "--calibration",
+        metavar="FILE",
+        help="Master bias and dark frames subtracted first, from ccd_calibrate",
+    )
+    parser.add_argument(
+        "--hot-pixels",
+        metavar="FILE",
+        help="Hot pixel masks zeroed after calibration, from ccd_noise",
+    )
+    return parser.parse_args(args=argv[1::])
+
+
+def findFiles(inputs: List[str]) -> List[Path]:
+    """Expand files, directories and glob patterns, without duplicates"""
+    files = dict()
+    for entry in inputs:
+        path = Path(entry)
+        if path.is_dir():
+            matches = [
+                child
+                for child in path.iterdir()
+                if child.suffix.lower() in FITS_EXTENSIONS
+            ]
+        elif path.exists():
+            matches = [path]
+        else:
+            matches = [Path(match) for match in glob(entry, recursive=True)]
+        for match in sorted(matches):
+            files[match.resolve()] = None
+    return list(files)
+
+
+def initWorker(calibration: Optional[Path], hotPixels: Optional[Path]):
+    """Load the masters and masks every file of a worker process is filtered with"""
+    global _workerFilters
+    _workerFilters = HDUFilters.load(calibration, hotPixels)
+
+
+def processFile(
+    path: Path,
+    kevFactor: float,
+    extractor: ClusterExtractor,
+    filters: Optional[HDUFilters] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Cluster every capture of a FITS file, runs in a worker process
+
+    Returns the catalog columns of the clusters of the file, plus one row per capture
+    in the capture* columns. hdu and captureHdu hold the FITS extension number of the
+    capture. Captures are released once measured, so a worker only holds one capture
+    at a time. filters, the calibration masters and hot pixel masks applied to the raw
+    captures, default to the ones loaded by initWorker.
+    """
+    if filters is None:
+        filters = _workerFilters
+    catalogs = []
+    hdus = []
+    clusterCounts = []
+    thresholds = []
+    with FitsFile(path) as fitsFile:
+        for ordinal, capture in enumerate(CCDCaptureModel.iterLoad(fitsFile)):
+            filters.apply(capture, ordinal)
+            capture.applyFilter(UniformFilter.ScalarMultiply(kevFactor))
+            data = capture.rawData()
+            statistics = capture.statistics()
+            catalogs.append(extractor.extract(data, statistics))
+            hdus.append(capture.hduIndex())
+            clusterCounts.append(len(catalogs[-1]))
+            thresholds.append(extractor.threshold(data, statistics))
+            capture.releaseData()
+
+    result = ClusterCatalog.concatenate(catalogs).columns()
+    result["hdu"] = np.repeat(np.array(hdus, dtype=np.int32), clusterCounts)
+    result["captureHdu"] = np.array(hdus, dtype=np.int32)
+    result["captureClusters"] = np.array(clusterCounts, dtype=np.int64)
+    result["captureThreshold"] = np.array(thresholds, dtype=np.float64)
+    return result
+
+
+def buildCatalog(
+    files: List[Path], results: List[Dict[str, np.ndarray]]
+) -> Dict[str, np.ndarray]:
+    """
+    Concatenate the columns of every file into a single catalog
+
+    Clusters and captures get a source column indexing the sources array, which holds
+    the path of every input file.
+    """
+    catalog = {"sources": np.array([str(path) for path in files])}
+    for name in results[0]:
+        catalog[name] = np.concatenate([result[name] for result in results])
+    catalog["source"] = np.repeat(
+        np.arange(len(files), dtype=np.int32),
+        [len(result["hdu"]) for result in results],
+    )
+    catalog["captureSource"] = np.repeat(
+        np.arange(len(files), dtype=np.int32),
+        [len(result["captureHdu"]) for result in results],
+    )
+    return catalog
+
+
+if __name__ == "__main__":
+    options = getOptions()
+    files = findFiles(options.inputs)
+    if len(files) == 0:
+        print(f"No FITS file found in {' '.join(options.inputs)}", file=stderr)
+        exit(1)
+
+    extractor = ClusterExtractor(
+        threshold=options.threshold,
+        nSigma=options.n_sigma,
+        minPixels=options.min_pixels,
+    )
+    start = time.perf_counter()
+    results = dict()
+    failed = list()
+    with ProcessPoolExecutor(
+        max_workers=options.jobs,
+        initializer=initWorker,
+        initargs=(options.calibration, options.hot_pixels),
+    ) as executor:
+        futures = {
+            executor.submit(processFile, path, options.kev_factor, extractor): path
+            for path in files
+        }
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                results[path] = future.result()
+            except Exception as e:
+                failed.append(path)
+                print(f"{path}: {e}", file=stderr)
+                continue
+            print(
+                f"{path}: {len(results[path]['captureHdu'])} captures, "
+                f"{len(results[path]['hdu'])} clusters",
+                flush=True,
+            )
+
+    processed = [path for path in files if path in results]
+    if len(processed) > 0:
+        catalog = buildCatalog(processed, [results[path] for path in processed])
+        np.savez(options.output, **catalog)
+        elapsed = time.perf_counter() - start
+        captures = len(catalog["captureHdu"])
+        print(
+            f"{len(catalog['hdu'])} clusters from {captures} captures in "
+            f"{len(processed)} files, {elapsed:.1f} s ({captures / elapsed:.1f} "
+            f"captures/s), written to {options.output}"
+        )
+    exit(1 if failed else 0)
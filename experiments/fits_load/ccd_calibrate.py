@@ -0,0 +1,135 @@
+"""
+Headless building of master bias and dark frames
+
+Every HDU of the bias exposures is stacked into a master bias of that HDU, then every
+HDU of the dark exposures, bias subtracted, into a master dark. Exposures are
+streamed one at a time through MasterFrameBuilder, memory stays within the given
+budget however many files are stacked. The masters are written to a .npz file that
+pyqt_fits_load and ccd_batch apply with --calibration.
+
+    python ccd_calibrate.py -o masters.npz --bias /data/bias/ --dark /data/dark/
+"""
+
+from ccd_batch import findFiles
+from ccdioutils import CalibrationFilter, CCDCaptureModel, FitsFile, MasterFrameBuilder
+from pathlib import Path
+from sys import argv, stderr
+from typing import List, Optional
+import argparse
+import time
+import numpy as np
+
+
+def getOptions():
+    parser = argparse.ArgumentParser(
+        prog="ccd_calibrate",
+        description="Stacks bias and dark exposures into master calibration frames",
+    )
+    parser.add_argument(
+        "--bias",
+        nargs="+",
+        required=True,
+        help="Bias FITS files, directories holding FITS files or glob patterns",
+    )
+    parser.add_argument(
+        "--dark",
+        nargs="+",
+        default=[],
+        help="Dark FITS files, directories holding FITS files or glob patterns",
+    )
+    parser.add_argument(
+        "-o", "--output", required=True, help="Path of the .npz masters to write"
+    )
+    parser.add_argument(
+        "--method",
+        choices=MasterFrameBuilder.METHODS,
+        default="sigmaclip",
+        help="How exposures are combined",
+    )
+    parser.add_argument(
+        "--n-sigma",
+        type=float,
+        default=3.0,
+        help="Pixels further from the median are rejected by sigmaclip",
+    )
+    parser.add_argument(
+        "--dark-scale",
+        type=float,
+        default=1.0,
+        help="Factor applied to the master dark, e.g. science over dark exposure time",
+    )
+    parser.add_argument(
+        "--memory-mb",
+        type=int,
+        default=1024,
+        help="Memory budget for the exposures buffered while stacking, in MiB",
+    )
+    return parser.parse_args(args=argv[1::])
+
+
+def buildMasters(
+    files: List[Path],
+    memoryBudget: int,
+    method: str = "sigmaclip",
+    nSigma: float = 3.0,
+    subtract: Optional[List[np.ndarray]] = None,
+) -> List[np.ndarray]:
+    """
+    Stack the HDUs of files into one master per HDU index
+
+    The memory budget is shared between the HDUs, which are stacked side by side as
+    every file holds one exposure of each. subtract[i] is removed from HDU i first.
+    """
+    with FitsFile(files[0]) as fitsFile:
+        hdus = len(CCDCaptureModel.load(fitsFile))
+    builders = [
+        MasterFrameBuilder(
+            method,
+            nSigma,
+            memoryBudget // hdus,
+            None if subtract is None else subtract[hdu],
+        )
+        for hdu in range(hdus)
+    ]
+    for path in files:
+        captures = 0
+        with FitsFile(path) as fitsFile:
+            for hdu, capture in enumerate(CCDCaptureModel.iterLoad(fitsFile)):
+                if hdu >= hdus:
+                    raise ValueError(f"{path} holds more than {hdus} captures")
+                builders[hdu].add(capture.rawData())
+                capture.releaseData()
+                captures += 1
+            if captures != hdus:
+                raise ValueError(f"{path} holds {captures} captures instead of {hdus}")
+    return [builder.result() for builder in builders]
+
+
+if __name__ == "__main__":
+    options = getOptions()
+    biasFiles = findFiles(options.bias)
+    darkFiles = findFiles(options.dark)
+    if len(biasFiles) == 0:
+        print(f"No FITS file found in {' '.join(options.bias)}", file=stderr)
+        exit(1)
+
+    start = time.perf_counter()
+    memoryBudget = options.memory_mb << 20
+    biases = buildMasters(biasFiles, memoryBudget, options.method, options.n_sigma)
+    darks = [None] * len(biases)
+    if len(darkFiles) > 0:
+        darks = buildMasters(
+            darkFiles, memoryBudget, options.method, options.n_sigma, biases
+        )
+    CalibrationFilter.save(
+        options.output,
+        [
+            CalibrationFilter(bias, dark, options.dark_scale)
+            for bias, dark in zip(biases, darks)
+        ],
+    )
+    print(
+        f"Masters of {len(biases)} captures from {len(biasFiles)} bias and "
+        f"{len(darkFiles)} dark files in {time.perf_counter() - start:.1f} s, "
+        f"written to {options.output}"
+    )
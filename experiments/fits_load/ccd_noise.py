@@ -0,0 +1,153 @@
+"""
+Headless building of per-pixel noise maps and hot pixel masks
+
+Every HDU of every input file is accumulated into the noise maps of that HDU, running
+mean, standard deviation and hit frequency of each pixel. Files are split between a
+pool of processes, each streaming its share into its own maps, merged at the end.
+Hot pixels are derived from the maps and written, along with the maps, to a .npz
+file that pyqt_fits_load and ccd_batch apply with --hot-pixels.
+
+    python ccd_noise.py -o hot.npz --calibration masters.npz /data/2025-01-01/
+"""
+
+from ccd_batch import findFiles
+from ccdioutils import (
+    CCDCaptureModel,
+    FitsFile,
+    HDUFilters,
+    HotPixelMask,
+    NoiseAccumulator,
+)
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from sys import argv, stderr
+from typing import List, Optional
+import argparse
+import os
+import time
+import numpy as np
+
+
+def getOptions():
+    parser = argparse.ArgumentParser(
+        prog="ccd_noise",
+        description="Accumulates per-pixel noise maps and masks hot pixels",
+    )
+    parser.add_argument(
+        "inputs",
+        nargs="+",
+        help="FITS files, directories holding FITS files or glob patterns",
+    )
+    parser.add_argument(
+        "-o", "--output", required=True, help="Path of the .npz masks to write"
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count(),
+        help="Number of files processed in parallel",
+    )
+    parser.add_argument(
+        "--calibration",
+        metavar="FILE",
+        help="Master bias and dark frames subtracted first, from ccd_calibrate",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=None,
+        help="Pixel value counted as a hit, estimated per capture when not given",
+    )
+    parser.add_argument(
+        "--n-sigma",
+        type=float,
+        default=5.0,
+        help="Noise multiple above the median of the estimated hit threshold",
+    )
+    parser.add_argument(
+        "--mask-n-sigma",
+        type=float,
+        default=5.0,
+        help="Pixels with a mean or noise this many sigmas above the rest are hot",
+    )
+    parser.add_argument(
+        "--max-hit-frequency",
+        type=float,
+        default=0.1,
+        help="Pixels hit in a larger fraction of the captures are hot",
+    )
+    return parser.parse_args(args=argv[1::])
+
+
+def accumulateFiles(
+    paths: List[Path],
+    threshold: Optional[float] = None,
+    nSigma: float = 5.0,
+    calibration: Optional[Path] = None,
+) -> List[NoiseAccumulator]:
+    """
+    Noise maps of every HDU index over a set of FITS files, runs in a worker process
+
+    Captures are released once accumulated, a worker holds one capture at a time.
+    """
+    filters = HDUFilters.load(calibration)
+    accumulators: List[NoiseAccumulator] = []
+    for path in paths:
+        with FitsFile(path) as fitsFile:
+            for hdu, capture in enumerate(CCDCaptureModel.iterLoad(fitsFile)):
+                filters.apply(capture, hdu)
+                if hdu == len(accumulators):
+                    accumulators.append(NoiseAccumulator(threshold, nSigma))
+                accumulators[hdu].add(capture.rawData(), capture.statistics())
+                capture.releaseData()
+    return accumulators
+
+
+if __name__ == "__main__":
+    options = getOptions()
+    files = findFiles(options.inputs)
+    if len(files) == 0:
+        print(f"No FITS file found in {' '.join(options.inputs)}", file=stderr)
+        exit(1)
+
+    start = time.perf_counter()
+    accumulators: List[NoiseAccumulator] = []
+    jobs = max(1, min(options.jobs, len(files)))
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [
+            executor.submit(
+                accumulateFiles,
+                files[job::jobs],
+                options.threshold,
+                options.n_sigma,
+                options.calibration,
+            )
+            for job in range(jobs)
+        ]
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                print(e, file=stderr)
+                exit(1)
+            while len(accumulators) < len(result):
+                accumulators.append(NoiseAccumulator())
+            for accumulator, fileAccumulator in zip(accumulators, result):
+                accumulator.merge(fileAccumulator)
+
+    masks = [
+        accumulator.hotPixelMask(options.mask_n_sigma, options.max_hit_frequency)
+        for accumulator in accumulators
+    ]
+    maps = dict()
+    for hdu, accumulator in enumerate(accumulators):
+        maps[f"mean{hdu}"] = accumulator.mean().astype(np.float32)
+        maps[f"std{hdu}"] = accumulator.std().astype(np.float32)
+        maps[f"hitFrequency{hdu}"] = accumulator.hitFrequency().astype(np.float32)
+    HotPixelMask.save(options.output, masks, **maps)
+    print(
+        f"{sum(mask.count() for mask in masks)} hot pixels in {len(masks)} captures "
+        f"from {len(files)} files in {time.perf_counter() - start:.1f} s, "
+        f"written to {options.output}"
+    )
@@ -0,0 +1,92 @@
+import traceback
+from typing import Callable, Hashable, Optional, Tuple
+from PySide6 import QtCore, QtGui
+
+RenderJob = Callable[[], QtGui.QImage]
+
+
+class _RenderTask(QtCore.QRunnable):
+    """Runs a render job on a pool thread and reports its image through done"""
+
+    def __init__(self, job: RenderJob, done: Callable[[QtGui.QImage], None]):
+        super().__init__()
+        self.__job = job
+        self.__done = done
+
+    def run(self):
+        try:
+            image = self.__job()
+        except Exception:
+            traceback.print_exc()
+            image = QtGui.QImage()
+        try:
+            self.__done(image)
+        except RuntimeError:
+            # The renderer was deleted along with its owner while the job ran
+            pass
+
+
+class AsyncRenderer(QtCore.QObject):
+    """
+    Runs render jobs on a worker pool, delivering images back to the GUI thread
+
+    At most one job per renderer runs at a time. Requests made while a job is running
+    replace each other, so a burst of slider or colormap events collapses into a
+    single render of the latest state. Results of jobs that were superseded while
+    running, or whose renderer was deleted with its parent, are dropped instead of
+    being delivered.
+    """
+
+    imageReady = QtCore.Signal(object, QtGui.QImage)
+
+    _jobDone = QtCore.Signal(int, object, QtGui.QImage)
+
+    def __init__(self, pool: Optional[QtCore.QThreadPool] = None, parent=None):
+        super().__init__(parent)
+        self.__pool = QtCore.QThreadPool.globalInstance() if pool is None else pool
+        self.__generation = 0
+        self.__running = False
+        self.__pending: Optional[Tuple[int, Optional[Hashable], RenderJob]] = None
+        # Python side reference to the running task, the pool does not keep one
+        self.__task: Optional[_RenderTask] = None
+        self._jobDone.connect(self.__onJobDone, QtCore.Qt.QueuedConnection)
+
+    def request(self, job: RenderJob, key: Optional[Hashable] = None):
+        """
+        Render job in the background, superseding any previous request
+
+        job is called on a worker thread and must only build a QImage. key is handed
+        back with the image through imageReady.
+        """
+        self.__generation += 1
+        self.__pending = (self.__generation, key, job)
+        if not self.__running:
+            self.__startPending()
+
+    def cancel(self):
+        """Drop the pending request and the result of the running one"""
+        self.__generation += 1
+        self.__pending = None
+
+    def isBusy(self) -> bool:
+        """Tells whether a job is running or waiting to run"""
+        return self.__running or self.__pending is not None
+
+    def __startPending(self):
+        generation, key, job = self.__pending
+        self.__pending = None
+        self.__running = True
+
+        self.__task = _RenderTask(
+            job, lambda image: self._jobDone.emit(generation, key, image)
+        )
+        self.__task.setAutoDelete(False)
+        self.__pool.start(self.__task)
+
+    def __onJobDone(self, generation: int, key: Optional[Hashable], image):
+        self.__running = False
+        self.__task = None
+        if generation == self.__generation and not image.isNull():
+            self.imageReady.emit(key, image)
+        if self.__pending is not None:
+            self.__startPending()
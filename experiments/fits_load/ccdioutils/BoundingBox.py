@@ -1,4 +1,14 @@
+from typing import Tuple
+
+
 class BoundingBox:
+    """
+    A rectangular region of a capture
+
+    Coordinates are inclusive, so a single pixel box has top == bottom and
+    left == right. Negative values count from the end of the matrix like numpy indices.
+    """
+
     def __init__(self, top: int, left: int, bottom: int, right: int):
         self.top = top
         self.left = left
@@ -9,3 +19,25 @@ class BoundingBox:
     def unbounded() -> "BoundingBox":
         """An unbounded box, useful to describe an "uncropped" matrix"""
         return BoundingBox(0, 0, -1, -1)
+
+    def slices(self) -> Tuple[slice, slice]:
+        """(rows, cols) slices selecting this box out of a matrix"""
+        bottom = None if self.bottom == -1 else self.bottom + 1
+        right = None if self.right == -1 else self.right + 1
+        return slice(self.top, bottom), slice(self.left, right)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, BoundingBox):
+            return NotImplemented
+        return (
+            self.top == other.top
+            and self.left == other.left
+            and self.bottom == other.bottom
+            and self.right == other.right
+        )
+
+    def __hash__(self):
+        return hash((self.top, self.left, self.bottom, self.right))
+
+    def __repr__(self):
+        return f"BoundingBox({self.top}, {self.left}, {self.bottom}, {self.right})"
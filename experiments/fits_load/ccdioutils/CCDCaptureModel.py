@@ -1,11 +1,25 @@
-from astropy.io import fits
-from astropy.time import Time, TimeDelta
 from copy import deepcopy
+from itertools import count
 from pathlib import Path
-from typing import List, Optional
+from typing import TYPE_CHECKING, Callable, Iterator, List, Optional, Union
+from .CaptureStatistics import CaptureStatistics
+from .FitsFile import FitsFile
+from .Instrumentation import Instrumentation
+from .LazyHDU import LazyHDU
 from .VizFilter import UniformVizFilter
 import numpy as np
 
+if TYPE_CHECKING:
+    from astropy.time import Time, TimeDelta
+
+
+def _toTime(value: Union["Time", str]) -> "Time":
+    # astropy.time takes longer to import than astropy.io.fits, it is only loaded
+    # once a date is actually read
+    from astropy.time import Time
+
+    return Time(value)
+
 
 class CCDCaptureModel:
     """
@@ -14,6 +28,8 @@ class CCDCaptureModel:
     Encapsulates data obtained from a CCD capture
     """
 
+    __uids = count()
+
     class Info:
         """CCD Capture relevant info"""
 
@@ -21,51 +37,94 @@ class CCDCaptureModel:
             self,
             cols: int = 0,
             rows: int = 0,
-            min: float = 0,
-            max: float = 0,
-            start: Optional[Time] = None,
-            end: Optional[Time] = None,
-            date: Optional[Time] = None,
+            min: Optional[float] = None,
+            max: Optional[float] = None,
+            start: Optional[Union["Time", str]] = None,
+            end: Optional[Union["Time", str]] = None,
+            date: Optional[Union["Time", str]] = None,
+            statsSource: Optional[Callable[[], CaptureStatistics]] = None,
         ):
             self.cols = cols
             self.rows = rows
-            self.min = min
-            self.max = max
+            self.__min = min
+            self.__max = max
+            self.__statsSource = statsSource
             self.__captureStart = start
             self.__captureEnd = end
             self.__captureDate = date
 
         @staticmethod
-        def fromHDU(hdu: fits.hdu):
-            """Instantiate CCDCaptureModel.Info metadata from an HDU"""
-            rows, cols = np.shape(hdu.data)
+        def fromLazyHDU(hdu: LazyHDU, statsSource: Callable[[], CaptureStatistics]):
+            """
+            Instantiate CCDCaptureModel.Info metadata from a LazyHDU header
+
+            Neither pixel statistics nor dates are computed until they are requested
+            """
+            rows, cols = hdu.shape()
+            header = hdu.header()
             return CCDCaptureModel.Info(
                 cols=cols,
                 rows=rows,
-                min=hdu.data.min(),
-                max=hdu.data.max(),
-                start=Time(hdu.header["DATESTART"]),
-                end=Time(hdu.header["DATEEND"]),
-                date=Time(hdu.header["DATE"]),
+                start=header.get("DATESTART"),
+                end=header.get("DATEEND"),
+                date=header.get("DATE"),
+                statsSource=statsSource,
             )
 
-        def captureStart(self) -> Optional[Time]:
+        @property
+        def min(self) -> Optional[float]:
+            """Minimum value in the capture, taken from its statistics"""
+            if self.__min is None and self.__statsSource is not None:
+                return self.__statsSource().min
+            return self.__min
+
+        @property
+        def max(self) -> Optional[float]:
+            """Maximum value in the capture, taken from its statistics"""
+            if self.__max is None and self.__statsSource is not None:
+                return self.__statsSource().max
+            return self.__max
+
+        def captureStart(self) -> Optional["Time"]:
             """Date when this data capture exposure started"""
+            if isinstance(self.__captureStart, str):
+                self.__captureStart = _toTime(self.__captureStart)
             return self.__captureStart
 
-        def captureEnd(self) -> Optional[Time]:
+        def captureEnd(self) -> Optional["Time"]:
             """Date when this data capture exposure ended"""
+            if isinstance(self.__captureEnd, str):
+                self.__captureEnd = _toTime(self.__captureEnd)
             return self.__captureEnd
 
-        def captureDate(self) -> Time:
+        def captureDate(self) -> "Time":
             """Date when the data was captured"""
+            if isinstance(self.__captureDate, str):
+                self.__captureDate = _toTime(self.__captureDate)
             return self.__captureDate
 
-        def exposureDuration(self) -> Optional[TimeDelta]:
+        def exposureDuration(self) -> Optional["TimeDelta"]:
             """Exposure duration"""
-            if self.__captureStart is None or self.__captureEnd is None:
+            start = self.captureStart()
+            end = self.captureEnd()
+            if start is None or end is None:
                 return None
-            return self.__captureEnd - self.__captureStart
+            return end - start
+
+        def copy(
+            self, statsSource: Optional[Callable[[], CaptureStatistics]] = None
+        ) -> "CCDCaptureModel.Info":
+            """Copy this Info, optionally binding lazy statistics to a new source"""
+            return CCDCaptureModel.Info(
+                cols=self.cols,
+                rows=self.rows,
+                min=deepcopy(self.__min),
+                max=deepcopy(self.__max),
+                start=deepcopy(self.__captureStart),
+                end=deepcopy(self.__captureEnd),
+                date=deepcopy(self.__captureDate),
+                statsSource=statsSource,
+            )
 
         def __str__(self):
             duration = self.exposureDuration()
@@ -83,46 +142,126 @@ class CCDCaptureModel:
                 and self.rows == other.rows
                 and self.min == other.min
                 and self.max == other.max
-                and self.__captureStart == other.__captureStart
-                and self.__captureEnd == other.__captureEnd
-                and self.__captureDate == other.__captureDate
+                and self.captureStart() == other.captureStart()
+                and self.captureEnd() == other.captureEnd()
+                and self.captureDate() == other.captureDate()
             )
 
     def __init__(
-        self, ccdData: np.matrix, info: Optional["CCDCaptureModel.Info"] = None
+        self,
+        ccdData: Union[np.matrix, LazyHDU],
+        info: Optional["CCDCaptureModel.Info"] = None,
     ):
-        self.__data = ccdData
-        rows, cols = np.shape(ccdData)
+        self.__uid = next(CCDCaptureModel.__uids)
+        self.__statistics: Optional[CaptureStatistics] = None
+        # Filters replayed on file backed data whenever it is loaded again
+        self.__filters: List[UniformVizFilter] = list()
+        if isinstance(ccdData, LazyHDU):
+            self.__source = ccdData
+            self.__data = None
+            rows, cols = ccdData.shape()
+        else:
+            self.__source = None
+            self.__data = ccdData
+            rows, cols = np.shape(ccdData)
         if info is None:
             self.__info = CCDCaptureModel.Info(
-                cols=cols, rows=rows, min=self.__data.min(), max=self.__data.max()
+                cols=cols, rows=rows, statsSource=self.statistics
             )
         else:
             self.__info = info
 
     @staticmethod
-    def __fromHDU(hdu: fits.hdu):
-        dump = CCDCaptureModel(hdu.data)
-        dump.__info = CCDCaptureModel.Info.fromHDU(hdu)
+    def __fromLazyHDU(hdu: LazyHDU):
+        dump = CCDCaptureModel(hdu)
+        dump.__info = CCDCaptureModel.Info.fromLazyHDU(hdu, dump.statistics)
         return dump
 
     @staticmethod
-    def load(fitsFile: Path) -> List["CCDCaptureModel"]:
+    def iterLoad(fitsFile: Union[Path, FitsFile]) -> Iterator["CCDCaptureModel"]:
+        """
+        Lazily load CCD dumps from a given FITS file
+
+        Yields one CCDCaptureModel per image HDU as soon as its header has been parsed.
+        Pixel data is only read when first accessed, see FitsFile. Given an open
+        FitsFile, captures can read data until the caller closes it. Given a path,
+        the file is opened for the captures and closed once none of them is left.
+        """
+        if not isinstance(fitsFile, FitsFile):
+            with Instrumentation.stage("parse"):
+                fitsFile = FitsFile(fitsFile)
+        index = 0
+        while True:
+            with Instrumentation.stage("parse"):
+                try:
+                    # Headers are parsed as HDUs are first indexed
+                    hdu = LazyHDU(fitsFile, index)
+                except IndexError:
+                    return
+            if hdu.hasImageData():
+                yield CCDCaptureModel.__fromLazyHDU(hdu)
+            index += 1
+
+    @staticmethod
+    def load(fitsFile: Union[Path, FitsFile]) -> List["CCDCaptureModel"]:
         """
         Load CCD dumps from a given FITS file
 
-        Parses data containing HDUs and stores them in a list of CCDDump items
+        Parses data containing HDUs and stores them in a list of CCDDump items. Only
+        headers are read, see CCDCaptureModel.iterLoad
         """
-        result: List[CCDCaptureModel] = list()
-        with fits.open(fitsFile) as hduList:
-            for hdu in hduList:
-                result.append(CCDCaptureModel.__fromHDU(hdu))
-        return result
+        return list(CCDCaptureModel.iterLoad(fitsFile))
 
     def rawData(self) -> np.matrix:
         """Get raw data from this capture"""
+        if self.__data is None:
+            with Instrumentation.stage("load") as stage:
+                data = self.__source.data()
+                stage.setBytes(data.nbytes)
+            if len(self.__filters) > 0:
+                # Filters applied before the data was released, or first read
+                with Instrumentation.stage("filter") as stage:
+                    for filter in self.__filters:
+                        data = filter.filter(data)
+                    stage.setBytes(data.nbytes)
+            self.__data = data
         return self.__data
 
+    def releaseData(self):
+        """
+        Drop pixel data of a capture backed by a file
+
+        Data is read again from the file, and applied filters replayed, on next
+        access. Statistics are kept. Captures built from an in memory matrix keep their
+        data.
+        """
+        if self.__source is not None:
+            self.__data = None
+            self.__source.release()
+
+    def statistics(self) -> CaptureStatistics:
+        """Statistics of the capture data, gathered once on first access"""
+        if self.__statistics is None:
+            self.__statistics = CaptureStatistics.compute(self.rawData())
+        return self.__statistics
+
+    def uid(self) -> int:
+        """
+        Identifier of the current data of this capture, unique within the process
+
+        A new one is drawn whenever applyFilter replaces the data, so renders keyed
+        on it are not reused for the filtered capture.
+        """
+        return self.__uid
+
+    def hduIndex(self) -> Optional[int]:
+        """Position of the HDU in its FITS file, None when not backed by a file"""
+        return None if self.__source is None else self.__source.index()
+
+    def isLoaded(self) -> bool:
+        """Tells whether pixel data has been brought into memory"""
+        return self.__data is not None
+
     def __str__(self):
         return self.__info.__str__()
 
@@ -131,11 +270,29 @@ class CCDCaptureModel:
         return self.__info
 
     def applyFilter(self, filter: UniformVizFilter):
-        result = filter.filter(self.__data)
-        self.__data = result.copy()
+        """
+        Replace capture data by its filtered version, filters allocate the result
+
+        Captures backed by a file whose data was not loaded yet only record the
+        filter, it is applied when data is first accessed.
+        """
+        self.__statistics = None
+        self.__uid = next(CCDCaptureModel.__uids)
+        if self.__source is not None:
+            self.__filters.append(filter)
+            if self.__data is None:
+                return
+        data = self.rawData()
+        with Instrumentation.stage("filter") as stage:
+            self.__data = filter.filter(data)
+            stage.setBytes(self.__data.nbytes)
 
     def copy(self) -> "CCDCaptureModel":
         """Reliably copy this CCDCaptureModel instance"""
-        newModel = CCDCaptureModel(self.__data.copy())
-        newModel.__info = deepcopy(self.__info)
+        newModel = CCDCaptureModel(self.rawData().copy())
+        newModel.__info = self.__info.copy(statsSource=newModel.statistics)
+        newModel.__statistics = self.__statistics
         return newModel
+
+    def __deepcopy__(self, memo) -> "CCDCaptureModel":
+        return self.copy()
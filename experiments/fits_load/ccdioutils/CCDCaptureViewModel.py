@@ -1,10 +1,14 @@
-from copy import deepcopy
 import numpy as np
 from .BoundingBox import BoundingBox
+from .CaptureStatistics import CaptureStatistics
+from .ClusterCatalog import ClusterCatalog
+from .ClusterExtractor import ClusterExtractor
 from . import CCDCaptureModel
-from .VizFilter import UniformVizFilter, UniformFilter
+from .VizFilter import FilterPipeline, UniformVizFilter, UniformFilter
 from .Fits2QPixmapConverter import Fits2QPixmapConverter
-from typing import List, Tuple, Callable, Optional
+from .Instrumentation import Instrumentation
+from .RenderCache import RenderCache
+from typing import Tuple, Callable, Hashable, Optional
 from PySide6 import QtGui
 from abc import ABC, abstractmethod
 
@@ -22,7 +26,13 @@ class BaseCCDCaptureViewModel(ABC):
 
     @abstractmethod
     def crop(self, cropBox: BoundingBox):
-        """Crops the current visualization by the specified BoundingBox"""
+        """
+        Crops the current visualization by the specified BoundingBox
+
+        Visualized data, and every coordinate given to or returned by the view model,
+        is then relative to the crop, except cluster positions which stay in capture
+        coordinates.
+        """
         raise NotImplementedError
 
     @abstractmethod
@@ -36,13 +46,78 @@ class BaseCCDCaptureViewModel(ABC):
         raise NotImplementedError
 
     @abstractmethod
-    def extractClusters(self) -> List[BoundingBox]:
-        """Extract a list of relevant bounding boxes containing relevant features"""
+    def extractClusters(self) -> ClusterCatalog:
+        """Extract a catalog of the bounding boxes and features of every cluster"""
         raise NotImplementedError
 
+    def _renderCache(self) -> Optional[RenderCache]:
+        """Cache getQPixmap renders are stored in, None to disable caching"""
+        return None
+
+    def _renderCacheKey(self) -> Optional[Hashable]:
+        """Key identifying the current render, None when it can't be cached"""
+        return None
+
+    def __convert(self) -> QtGui.QPixmap:
+        data = self._getRawData()
+        with Instrumentation.stage("convert"):
+            return self._fits2QPixmapConverter().convert(data)
+
     def getQPixmap(self) -> QtGui.QPixmap:
         """Obtain a QPixmap using a Fits2QPixmapConverter"""
-        return self._fits2QPixmapConverter().convert(self._getRawData())
+        cache = self._renderCache()
+        key = None if cache is None else self._renderCacheKey()
+        if key is None:
+            return self.__convert()
+        return cache.getOrRender(key, self.__convert)
+
+    def getCachedQPixmap(self) -> Optional[QtGui.QPixmap]:
+        """Cached render of the current state, if any"""
+        cache = self._renderCache()
+        key = None if cache is None else self._renderCacheKey()
+        return None if key is None else cache.get(key)
+
+    def cacheQPixmap(self, key: Optional[Hashable], pixmap: QtGui.QPixmap):
+        """Store a render produced by a job from getQImageRenderJob"""
+        cache = self._renderCache()
+        if cache is not None and key is not None:
+            cache.put(key, pixmap)
+
+    def getQImageRenderJob(
+        self,
+    ) -> Tuple[Optional[Hashable], Callable[[], QtGui.QImage]]:
+        """
+        Job rendering the current state on a worker thread
+
+        Visualized data is materialized right away, on the calling thread, into data
+        owned by the job, so later filters or range changes do not show up in a
+        render still in flight. Returns the render cache key of the state along with
+        the job.
+        """
+        cache = self._renderCache()
+        key = None if cache is None else self._renderCacheKey()
+        data = self._getRenderData()
+        converter = self._fits2QPixmapConverter()
+
+        def job() -> QtGui.QImage:
+            with Instrumentation.stage("convert") as stage:
+                image = converter.toQImage(data)
+                stage.setBytes(image.sizeInBytes())
+            return image
+
+        return key, job
+
+    def supportsBackgroundRendering(self) -> bool:
+        """Tells whether getQImageRenderJob jobs can run on a worker thread"""
+        return self._fits2QPixmapConverter().supportsBackgroundRendering()
+
+    def _getRenderData(self) -> np.ndarray:
+        """Visualized data which is not overwritten when the view model changes"""
+        return self._getRawData().copy()
+
+    def getDisplayData(self) -> np.ndarray:
+        """Data being visualized, for views rendering it on their own"""
+        return self._getRawData()
 
     @abstractmethod
     def setCurrentColormap(self, colormap_name: str):
@@ -64,9 +139,23 @@ class BaseCCDCaptureViewModel(ABC):
         """Returns the currently visualized capture information"""
         raise NotImplementedError
 
+    @abstractmethod
+    def getStatistics(self) -> CaptureStatistics:
+        """Statistics of the currently visualized data"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def getDataRange(self) -> Tuple[float, float]:
+        """Minimum and maximum values of the unfiltered capture within the crop box"""
+        raise NotImplementedError
+
     @abstractmethod
     def setVisualizationRange(self, value: Tuple[int, int]):
-        """Records the visualization range we are interested in visualizing"""
+        """
+        Records the visualization range we are interested in visualizing
+
+        The range is applied when rendering, visualized data is left untouched
+        """
         raise NotImplementedError
 
     @abstractmethod
@@ -86,7 +175,18 @@ class BaseCCDCaptureViewModel(ABC):
 
 
 class CCDCaptureViewModel(BaseCCDCaptureViewModel):
-    """View Model for CCDCaptureModel models"""
+    """
+    View Model for CCDCaptureModel models
+
+    The wrapped capture is shared and never modified. The visualized data is described
+    by a stack of filters and only materialized, into a buffer reused across updates,
+    when something reads it. Cropping selects a view over the capture, so filters,
+    statistics, rendering and clustering only cost as much as the cropped region.
+
+    defaultPercentileRange, e.g. (1, 99.5), makes the default visualization range
+    span those percentiles of the capture instead of its whole extent, so a few hot
+    pixels do not wash the display out.
+    """
 
     def __init__(
         self,
@@ -95,46 +195,150 @@ class CCDCaptureViewModel(BaseCCDCaptureViewModel):
         cropBox: BoundingBox = BoundingBox.unbounded(),
         defaultColorMap: str = "Greys_r",
         conversionFunc: Optional[Callable[[float], float]] = None,
+        clusterExtractor: Optional[ClusterExtractor] = None,
+        renderCache: Optional[RenderCache] = None,
+        defaultPercentileRange: Optional[Tuple[float, float]] = None,
     ):
         self.__cropBox = cropBox
+        self.__defaultCropBox = cropBox
         self.__ccdCapture = ccdCapture
-        self.__ccdVizCapture = ccdCapture.copy()
+        self.__filters = FilterPipeline()
+        self.__vizData: Optional[np.ndarray] = None
+        self.__materializedFilters = 0
+        # Statistics of cropped and filtered data, the model caches full frame ones
+        self.__cropStatistics: Optional[CaptureStatistics] = None
+        self.__vizStatistics: Optional[CaptureStatistics] = None
+        self.__defaultPercentileRange = defaultPercentileRange
         self.__defaultColorMap = defaultColorMap
         self.__currentColorMap = defaultColorMap
-        self._resetVizRange()
         self.__conversionFunc = conversionFunc
         self.__fits2QPixmapConverter = fits2QPixmapConverter
+        self._resetVizRange()
+        if clusterExtractor is None:
+            clusterExtractor = ClusterExtractor()
+        self.__clusterExtractor = clusterExtractor
+        self.__renderCache = renderCache
 
     def _fits2QPixmapConverter(self) -> Fits2QPixmapConverter:
         return self.__fits2QPixmapConverter
 
+    def _renderCache(self) -> Optional[RenderCache]:
+        return self.__renderCache
+
+    def _renderCacheKey(self) -> Optional[Hashable]:
+        filtersKey = self.__filters.cacheKey()
+        if filtersKey is None:
+            return None
+        return (
+            self.__ccdCapture.uid(),
+            self.__cropBox,
+            filtersKey,
+            self.__fits2QPixmapConverter.cacheKey(),
+        )
+
     def _getRawData(self) -> np.matrix:
-        return self.__ccdVizCapture.rawData()
+        """
+        Visualized data, a view over the cropped capture when no filter is applied
+
+        Filtered data lives in a buffer owned by the view model which is overwritten
+        when filters change, callers must not keep it around.
+        """
+        if len(self.__filters) == 0:
+            return self.__croppedCapture()
+        if self.__vizData is None:
+            data = self.__croppedCapture()
+            with Instrumentation.stage("filter") as stage:
+                self.__vizData = self.__filters.apply(data)
+                stage.setBytes(self.__vizData.nbytes)
+        elif self.__materializedFilters < len(self.__filters):
+            # Filters added on top of already materialized data keep the buffer dtype
+            pending = self.__filters.filters()[self.__materializedFilters :]
+            with Instrumentation.stage("filter"):
+                FilterPipeline(pending).filterInPlace(self.__vizData)
+        self.__materializedFilters = len(self.__filters)
+        return self.__vizData
+
+    def _getRenderData(self) -> np.ndarray:
+        data = self._getRawData()
+        if len(self.__filters) == 0:
+            # A view over the capture, filters of the view model never write to it
+            return data
+        # The filtered buffer is rewritten in place by the next filter
+        return data.copy()
+
+    def __croppedCapture(self) -> np.ndarray:
+        """View over the crop box of the original capture data, never a copy"""
+        data = self.__ccdCapture.rawData()
+        if self.__cropBox == BoundingBox.unbounded():
+            return data
+        return data[self.__cropBox.slices()]
+
+    def __cropOrigin(self) -> Tuple[int, int]:
+        """Capture coordinates of the top left pixel of the crop"""
+        info = self.__ccdCapture.info()
+        rows, cols = self.__cropBox.slices()
+        return rows.indices(info.rows)[0], cols.indices(info.cols)[0]
+
+    def __captureStatistics(self) -> CaptureStatistics:
+        """Statistics of the unfiltered capture within the crop box"""
+        if self.__cropBox == BoundingBox.unbounded():
+            return self.__ccdCapture.statistics()
+        if self.__cropStatistics is None:
+            self.__cropStatistics = CaptureStatistics.compute(self.__croppedCapture())
+        return self.__cropStatistics
 
     def crop(self, cropBox: BoundingBox):
         self.__cropBox = cropBox
+        self.__vizData = None
+        self.__cropStatistics = None
+        self.__vizStatistics = None
 
     def _resetVizRange(self):
-        self.__vizRange = (
-            self.__ccdVizCapture.rawData().min(),
-            self.__ccdVizCapture.rawData().max(),
-        )
+        if self.__defaultPercentileRange is None:
+            self.__vizRange = self.getDataRange()
+            self.__fits2QPixmapConverter._displayRange = None
+        else:
+            statistics = self.__captureStatistics()
+            self.__vizRange = statistics.percentileRange(*self.__defaultPercentileRange)
+            self.__fits2QPixmapConverter._displayRange = self.__vizRange
 
     def reset(self):
-        self.__ccdVizCapture = deepcopy(self.__ccdCapture)
+        self.__filters.clear()
+        self.__filters.releaseScratch()
+        self.crop(self.__defaultCropBox)
         self.setCurrentColormap(self.__defaultColorMap)
         self._resetVizRange()
 
     def applyFilter(self, filter: UniformVizFilter, useVizModel: bool = True):
-        if useVizModel:
-            self.__ccdVizCapture.applyFilter(filter)
-        else:
-            self.__ccdVizCapture = deepcopy(self.__ccdCapture)
-            self.__ccdVizCapture.applyFilter(filter)
-
-    def extractClusters(self) -> List[BoundingBox]:
-        result = list()
-        return result
+        if not useVizModel:
+            self.__filters.clear()
+            self.__vizData = None
+        elif (
+            self.__vizData is not None
+            and filter.resultType(self.__vizData.dtype) != self.__vizData.dtype
+        ):
+            self.__vizData = None
+        self.__filters.append(filter)
+        self.__vizStatistics = None
+
+    def releaseBuffers(self):
+        """
+        Drop materialized visualization data, it is recomputed when needed
+
+        Data of a capture backed by a file is released as well, statistics are kept
+        so views can be rebuilt without touching the data again.
+        """
+        self.__filters.releaseScratch()
+        self.__vizData = None
+        self.__ccdCapture.releaseData()
+
+    def extractClusters(self) -> ClusterCatalog:
+        data = self._getRawData()
+        statistics = self.getStatistics()
+        with Instrumentation.stage("cluster"):
+            return self.__clusterExtractor.extract(
+                data, statistics, self.__cropOrigin()
+            )
 
     def setCurrentColormap(self, colormap_name: str):
         self.__currentColorMap = colormap_name
@@ -144,16 +348,28 @@ class CCDCaptureViewModel(BaseCCDCaptureViewModel):
         return self.__currentColorMap
 
     def valueAt(self, row: int, col: int) -> float:
-        value = self.__ccdVizCapture.rawData()[row][col]
+        value = self._getRawData()[row][col]
         if self.__conversionFunc is not None:
             value = self.__conversionFunc(value)
         return value
 
     def captureInfo(self) -> CCDCaptureModel.Info:
-        return self.__ccdVizCapture.info()
+        return self.__ccdCapture.info()
+
+    def getStatistics(self) -> CaptureStatistics:
+        if len(self.__filters) == 0:
+            return self.__captureStatistics()
+        if self.__vizStatistics is None:
+            self.__vizStatistics = CaptureStatistics.compute(self._getRawData())
+        return self.__vizStatistics
+
+    def getDataRange(self) -> Tuple[float, float]:
+        statistics = self.__captureStatistics()
+        return statistics.min, statistics.max
 
     def setVisualizationRange(self, value: Tuple[int, int]):
         self.__vizRange = value
+        self.__fits2QPixmapConverter._displayRange = value
 
     def getVisualizationRange(self) -> Tuple[int, int]:
         return self.__vizRange
@@ -1,7 +1,11 @@
 from PySide6 import QtWidgets, QtCore, QtGui
 from superqt.sliders import QLabeledRangeSlider
+from .AsyncRenderer import AsyncRenderer
 from .CCDCaptureViewModel import BaseCCDCaptureViewModel
-import matplotlib.pyplot as plt
+from .Instrumentation import Instrumentation
+from .TiledCCDView import TiledCCDView
+import matplotlib
+import numpy as np
 
 
 class _VizWidget(QtWidgets.QLabel):
@@ -18,18 +22,93 @@ class _VizWidget(QtWidgets.QLabel):
         self.mouseMoved.emit(event.x(), event.y())
         super().mouseMoveEvent(event)  # Call base class implementation
 
+    def paintEvent(self, event: QtGui.QPaintEvent):
+        with Instrumentation.stage("paint"):
+            super().paintEvent(event)
+
+
+class _HistogramWidget(QtWidgets.QWidget):
+    """Histogram of capture values drawn above the range slider"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.__heights = np.zeros(0)
+        self.__selection = (0.0, 1.0)
+        self.setFixedHeight(32)
+        self.setSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Fixed)
+
+    def setCounts(self, counts: np.ndarray):
+        """Bin counts to display, shown on a logarithmic scale"""
+        heights = np.log1p(counts)
+        peak = heights.max() if len(heights) else 0
+        self.__heights = heights / peak if peak > 0 else heights
+        self.update()
+
+    def setSelection(self, low: float, high: float):
+        """Highlighted part of the histogram, as fractions of its width"""
+        self.__selection = (low, high)
+        self.update()
+
+    def paintEvent(self, event: QtGui.QPaintEvent):
+        bins = len(self.__heights)
+        if bins == 0:
+            return
+        width, height = self.width(), self.height()
+        low, high = self.__selection
+        palette = self.palette()
+        painter = QtGui.QPainter(self)
+        for i, barHeight in enumerate(self.__heights.tolist()):
+            center = (i + 0.5) / bins
+            color = palette.highlight() if low <= center <= high else palette.mid()
+            left = i * width / bins
+            top = height * (1 - barHeight)
+            painter.fillRect(
+                QtCore.QRectF(left, top, width / bins, height - top), color
+            )
+        painter.end()
+
 
 class CCDCaptureWidget(QtWidgets.QWidget):
-    """A PyQT widget aimed at displaying CCD captured data"""
+    """
+    A PyQT widget aimed at displaying CCD captured data
+
+    With tiled=True the capture is shown in a zoomable TiledCCDView that only renders
+    the visible part of the capture instead of a single full resolution pixmap.
+
+    With asyncRendering=True, and a converter able to render off the GUI thread,
+    conversions run on a worker pool through an AsyncRenderer and only the latest
+    requested state is displayed, keeping the widget responsive while rendering.
+
+    The range slider spans the whole capture extent and starts at the view model
+    default visualization range. A histogram of the visualized values, built from
+    the view model cached statistics, is drawn above it.
+
+    With showTimings=True, and Instrumentation enabled, the latest duration of every
+    instrumented stage is overlaid on the top left corner of the visualization.
+    """
+
+    # Number of bars of the histogram drawn above the range slider
+    HISTOGRAM_BINS = 128
+    # Refresh period of the timings overlay, in milliseconds
+    TIMINGS_REFRESH_MS = 500
 
     def __init__(
         self,
         viewModel: BaseCCDCaptureViewModel,
         sliderScaleFactor: int = 10000,
         parent=None,
+        tiled: bool = False,
+        asyncRendering: bool = True,
+        showTimings: bool = False,
     ):
         super().__init__(parent)
         self.__viewModel = viewModel
+        self.__tiled = tiled
+        self.__renderer = None
+        if asyncRendering and not tiled and viewModel.supportsBackgroundRendering():
+            # Owned by the widget, a job still running when it is destroyed is dropped
+            self.__renderer = AsyncRenderer(parent=self)
+            self.__renderer.imageReady.connect(self._onImageReady)
         self.__sliderScaleFactor = sliderScaleFactor
         self._vbox = QtWidgets.QVBoxLayout(self)
 
@@ -38,9 +117,14 @@ class CCDCaptureWidget(QtWidgets.QWidget):
 
         self._addTopToolbarItems()
 
-        self._vizWidget = _VizWidget()  # Use custom label
-        self._vizWidget.setAlignment(QtCore.Qt.AlignCenter)
+        if tiled:
+            self._vizWidget = TiledCCDView()
+        else:
+            self._vizWidget = _VizWidget()  # Use custom label
+            self._vizWidget.setAlignment(QtCore.Qt.AlignCenter)
         self._vbox.addWidget(self._vizWidget)
+        if showTimings:
+            self._addTimingsOverlay()
         self._addLowerToolbar()
 
         self.setLayout(self._vbox)
@@ -62,8 +146,6 @@ class CCDCaptureWidget(QtWidgets.QWidget):
         self._addCurrentValueLabel()
 
     def _addColormapSelectionWidget(self):
-        if self.__viewModel.isUsingAFastQPixmapConverter():
-            return
         colormapContainer = QtWidgets.QWidget()
         colormapLayout = QtWidgets.QHBoxLayout(colormapContainer)
         colormapLayout.setContentsMargins(0, 0, 0, 0)
@@ -72,12 +154,14 @@ class CCDCaptureWidget(QtWidgets.QWidget):
         colormapLayout.addWidget(colormapLabel)
 
         self._colormapComboBox = QtWidgets.QComboBox()
-        for cmap in plt.colormaps():
+        for cmap in sorted(matplotlib.colormaps):
             self._colormapComboBox.addItem(cmap)
 
-        default_colormap_index = self._colormapComboBox.findText("Greys_r")
-        if default_colormap_index != -1:
-            self._colormapComboBox.setCurrentIndex(default_colormap_index)
+        current_colormap_index = self._colormapComboBox.findText(
+            self.__viewModel.getCurrentColormap()
+        )
+        if current_colormap_index != -1:
+            self._colormapComboBox.setCurrentIndex(current_colormap_index)
 
         self._colormapComboBox.currentIndexChanged.connect(self._onColormapChanged)
         colormapLayout.addWidget(self._colormapComboBox)
@@ -95,32 +179,58 @@ class CCDCaptureWidget(QtWidgets.QWidget):
         self._valueLabel.setMinimumWidth(128)
         self._topToolbar.addWidget(self._valueLabel)
 
+    def _addTimingsOverlay(self):
+        self._timingsLabel = QtWidgets.QLabel(self._vizWidget)
+        self._timingsLabel.setAttribute(
+            QtCore.Qt.WidgetAttribute.WA_TransparentForMouseEvents
+        )
+        self._timingsLabel.setStyleSheet(
+            "background-color: rgba(0, 0, 0, 160); color: white;"
+            "font-family: monospace; padding: 2px;"
+        )
+        self._timingsLabel.move(4, 4)
+        self._timingsLabel.hide()
+        self._timingsTimer = QtCore.QTimer(self)
+        self._timingsTimer.timeout.connect(self._updateTimings)
+        self._timingsTimer.start(CCDCaptureWidget.TIMINGS_REFRESH_MS)
+
     def _addLowerToolbar(self):
         self._lowerToolbar = QtWidgets.QToolBar()
         self._vbox.addWidget(self._lowerToolbar)
         self._addLowerToolbarItems()
 
     def _addLowerToolbarItems(self):
-        if not self.__viewModel.isUsingAFastQPixmapConverter():
-            applyButton = QtWidgets.QPushButton()
-            applyButton.setText("Apply")
-            applyButton.clicked.connect(self._onApplyExclusionClicked)
-            self._lowerToolbar.addWidget(applyButton)
+        applyButton = QtWidgets.QPushButton()
+        applyButton.setText("Apply")
+        applyButton.setToolTip("Blank out values outside of the selected range")
+        applyButton.clicked.connect(self._onApplyExclusionClicked)
+        self._lowerToolbar.addWidget(applyButton)
         self._addRangeSlider()
 
     def _addRangeSlider(self):
-        self.__originalVizRange = self.__viewModel.getVisualizationRange()
+        self.__dataRange = self.__viewModel.getDataRange()
+        vizRange = self.__viewModel.getVisualizationRange()
+
+        sliderContainer = QtWidgets.QWidget()
+        sliderLayout = QtWidgets.QVBoxLayout(sliderContainer)
+        sliderLayout.setContentsMargins(0, 0, 0, 0)
+        sliderLayout.setSpacing(0)
 
-        scaledMin = self._scaleValue(self.__originalVizRange[0])
-        scaledMax = self._scaleValue(self.__originalVizRange[1])
+        self.__histogram = _HistogramWidget()
+        sliderLayout.addWidget(self.__histogram)
+        self._updateHistogram()
 
         rangeSlider = QLabeledRangeSlider(QtCore.Qt.Horizontal)
-        rangeSlider.setMinimum(scaledMin)
-        rangeSlider.setMaximum(scaledMax)
-        rangeSlider.setValue((scaledMin, scaledMax))
+        rangeSlider.setMinimum(self._scaleValue(self.__dataRange[0]))
+        rangeSlider.setMaximum(self._scaleValue(self.__dataRange[1]))
+        rangeSlider.setValue(
+            (self._scaleValue(vizRange[0]), self._scaleValue(vizRange[1]))
+        )
         rangeSlider.valueChanged.connect(self._onRangeSliderValueChanged)
         self.__rangeSlider = rangeSlider
-        self._lowerToolbar.addWidget(rangeSlider)
+        sliderLayout.addWidget(rangeSlider)
+        self._updateHistogramSelection(vizRange)
+        self._lowerToolbar.addWidget(sliderContainer)
 
     def _scaleValue(self, value: float) -> int:
         return int(value * self.__sliderScaleFactor)
@@ -134,35 +244,107 @@ class CCDCaptureWidget(QtWidgets.QWidget):
         """Callback invoked whenever the user selects a different colormap"""
         selected_colormap = self._colormapComboBox.itemText(index)
         self.__viewModel.setCurrentColormap(selected_colormap)
-        self._updateVisualization()
+        if self.__tiled:
+            self._updateDisplayWindow()
+        else:
+            self._updateVisualization()
 
     def _onApplyExclusionClicked(self):
         self.__viewModel.restrictVisualizationToRange()
+        self._updateHistogram()
         self._updateVisualization()
 
     def _onRangeSliderValueChanged(self, value):
         scaledMin = self._downscaleValue(value[0])
         scaledMax = self._downscaleValue(value[1])
         self.__viewModel.setVisualizationRange((scaledMin, scaledMax))
-        if self.__viewModel.isUsingAFastQPixmapConverter():
-            self._onApplyExclusionClicked()
+        self._updateHistogramSelection((scaledMin, scaledMax))
+        # Only the display window changes, fast converters can follow the slider
+        if self.__tiled:
+            self._updateDisplayWindow()
+        elif (
+            self.__renderer is not None
+            or self.__viewModel.isUsingAFastQPixmapConverter()
+        ):
+            self._updateVisualization()
 
     def _updateVisualization(self):
         """Obtain data visualizable data from the view model"""
+        if self.__tiled:
+            self._vizWidget.setData(self.__viewModel.getDisplayData())
+            self._updateDisplayWindow()
+            return
+        if self.__renderer is not None:
+            self._requestVisualization()
+            return
         display_data = self.__viewModel.getQPixmap()
         if display_data:
             self._vizWidget.setPixmap(display_data)
 
+    def _requestVisualization(self):
+        """Show a cached render right away or render the current state off-thread"""
+        pixmap = self.__viewModel.getCachedQPixmap()
+        if pixmap is not None:
+            self.__renderer.cancel()
+            self._vizWidget.setPixmap(pixmap)
+            return
+        key, job = self.__viewModel.getQImageRenderJob()
+        self.__renderer.request(job, key)
+
+    def _onImageReady(self, key, image: QtGui.QImage):
+        """Callback invoked when a background render of the latest state finishes"""
+        pixmap = QtGui.QPixmap.fromImage(image)
+        self.__viewModel.cacheQPixmap(key, pixmap)
+        self._vizWidget.setPixmap(pixmap)
+
+    def _updateHistogram(self):
+        """Rebuild the histogram overlay from the visualized data statistics"""
+        counts, _ = self.__viewModel.getStatistics().histogram(
+            *self.__dataRange, bins=CCDCaptureWidget.HISTOGRAM_BINS
+        )
+        self.__histogram.setCounts(counts)
+
+    def _updateHistogramSelection(self, vizRange):
+        """Highlight the histogram bars within the visualization range"""
+        low, high = self.__dataRange
+        extent = high - low
+        if extent <= 0:
+            self.__histogram.setSelection(0.0, 1.0)
+            return
+        self.__histogram.setSelection(
+            (vizRange[0] - low) / extent, (vizRange[1] - low) / extent
+        )
+
+    def _updateDisplayWindow(self):
+        """Forward colormap and visualization range to the tiled view"""
+        self._vizWidget.setDisplay(
+            self.__viewModel.getCurrentColormap(),
+            self.__viewModel.getVisualizationRange(),
+        )
+
     def _resetViewModel(self):
         """Resets view model state"""
         self.__viewModel.reset()
-        oMin = self.__originalVizRange[0]
-        oMax = self.__originalVizRange[1]
+        oMin, oMax = self.__viewModel.getVisualizationRange()
         scaledMin = self._scaleValue(oMin)
         scaledMax = self._scaleValue(oMax)
         self.__rangeSlider.setValue((scaledMin, scaledMax))
+        self._updateHistogram()
         self._updateVisualization()
 
+    def _updateTimings(self):
+        """Show the latest duration of every instrumented stage"""
+        instrumentation = Instrumentation.active()
+        last = dict() if instrumentation is None else instrumentation.last()
+        if len(last) == 0:
+            self._timingsLabel.hide()
+            return
+        lines = [f"{name:<8}{ms:8.2f} ms" for name, (ms, _) in sorted(last.items())]
+        self._timingsLabel.setText("\n".join(lines))
+        self._timingsLabel.adjustSize()
+        self._timingsLabel.raise_()
+        self._timingsLabel.show()
+
     def _onVisualizationWidgetMouseMove(self, x: int, y: int):
         coord = f"({y},{x})"
         value = self.__viewModel.valueAt(y, x)
@@ -0,0 +1,68 @@
+from typing import List, Tuple
+import numpy as np
+
+
+class CCDPyramid:
+    """
+    Multi-resolution pyramid of a CCD capture, split in square tiles
+
+    Level 0 is the capture itself (not copied) and every following level halves both
+    dimensions. Downsampling keeps the maximum of each 2x2 block rather than its mean
+    so isolated hits, like short beta tracks, remain visible in overview levels.
+    Levels are only computed the first time they are requested.
+    """
+
+    def __init__(self, matrix: np.ndarray, tileSize: int = 256):
+        self.__levels: List[np.ndarray] = [np.asarray(matrix)]
+        self.__tileSize = tileSize
+        rows, cols = matrix.shape
+        self.__levelCount = 1
+        while max(rows, cols) > tileSize:
+            rows, cols = (rows + 1) // 2, (cols + 1) // 2
+            self.__levelCount += 1
+
+    @staticmethod
+    def maxPool(matrix: np.ndarray) -> np.ndarray:
+        """Halve a matrix keeping the maximum of every 2x2 block"""
+        rows, cols = matrix.shape
+        evenRows, evenCols = rows - rows % 2, cols - cols % 2
+        pooled = np.maximum(matrix[0:evenRows:2], matrix[1:evenRows:2])
+        if rows % 2:
+            pooled = np.concatenate((pooled, matrix[-1:]))
+        result = np.maximum(pooled[:, 0:evenCols:2], pooled[:, 1:evenCols:2])
+        if cols % 2:
+            result = np.concatenate((result, pooled[:, -1:]), axis=1)
+        return result
+
+    def tileSize(self) -> int:
+        """Width and height of a tile, in level pixels"""
+        return self.__tileSize
+
+    def levelCount(self) -> int:
+        """Number of levels, the last one fitting in a single tile"""
+        return self.__levelCount
+
+    def level(self, index: int) -> np.ndarray:
+        """Matrix of a level, 2**index capture pixels per level pixel"""
+        while len(self.__levels) <= index:
+            self.__levels.append(CCDPyramid.maxPool(self.__levels[-1]))
+        return self.__levels[index]
+
+    def levelForZoom(self, zoom: float) -> int:
+        """Coarsest level still showing at least one level pixel per screen pixel"""
+        index = 0
+        while index + 1 < self.__levelCount and zoom * 2 ** (index + 1) <= 1:
+            index += 1
+        return index
+
+    def tileGrid(self, index: int) -> Tuple[int, int]:
+        """Number of (rows, cols) of tiles in a level"""
+        rows, cols = self.level(index).shape
+        size = self.__tileSize
+        return (rows + size - 1) // size, (cols + size - 1) // size
+
+    def tile(self, index: int, tileRow: int, tileCol: int) -> np.ndarray:
+        """View over a tile of a level, edge tiles may be smaller than tileSize"""
+        size = self.__tileSize
+        top, left = tileRow * size, tileCol * size
+        return self.level(index)[top : top + size, left : left + size]
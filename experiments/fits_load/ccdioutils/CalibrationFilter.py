@@ -0,0 +1,82 @@
+from pathlib import Path
+from typing import List, Optional, Sequence, Union
+from .FrameFilter import FrameFilter
+import numpy as np
+
+
+class CalibrationFilter(FrameFilter):
+    """
+    Subtracts a master bias and a scaled master dark from captures
+
+    Masters are per-pixel frames, typically built with MasterFrameBuilder, the master
+    dark being bias subtracted. They are folded into a single offset frame up front so
+    calibrating a capture is one in-place subtraction. Captures must have the shape of
+    the masters, see FrameFilter.
+    """
+
+    FRAME_NAME = "calibration masters"
+
+    def __init__(
+        self,
+        bias: np.ndarray,
+        dark: Optional[np.ndarray] = None,
+        darkScale: float = 1.0,
+    ):
+        """darkScale: Factor applied to the master dark, e.g. exposure time ratio"""
+        if dark is not None and dark.shape != bias.shape:
+            raise ValueError(
+                f"Dark of shape {dark.shape} does not match bias {bias.shape}"
+            )
+        self.__bias = np.asarray(bias, dtype=np.float32)
+        self.__dark = None if dark is None else np.asarray(dark, dtype=np.float32)
+        self.__darkScale = darkScale
+        offset = self.__bias.copy()
+        if self.__dark is not None:
+            offset += np.float32(darkScale) * self.__dark
+        self.__offset = offset
+        super().__init__(offset)
+
+    @staticmethod
+    def save(path: Union[str, Path], filters: Sequence["CalibrationFilter"]):
+        """Write the masters of every HDU of a file to a .npz, filters[i] for HDU i"""
+        CalibrationFilter._saveFrames(
+            path,
+            [
+                {
+                    "bias": f.bias(),
+                    "dark": f.dark(),
+                    "darkScale": np.array(f.darkScale()),
+                }
+                for f in filters
+            ],
+        )
+
+    @staticmethod
+    def load(path: Union[str, Path]) -> List["CalibrationFilter"]:
+        """Read masters written by save, one filter per HDU"""
+        return [
+            CalibrationFilter(
+                masters["bias"], masters.get("dark"), float(masters["darkScale"])
+            )
+            for masters in CalibrationFilter._loadFrames(path, "bias")
+        ]
+
+    def bias(self) -> np.ndarray:
+        return self.__bias
+
+    def dark(self) -> Optional[np.ndarray]:
+        return self.__dark
+
+    def darkScale(self) -> float:
+        return self.__darkScale
+
+    def filter(self, matrix: np.matrix) -> np.matrix:
+        self._checkShape(matrix)
+        return np.subtract(matrix, self.__offset, dtype=self.resultType(matrix.dtype))
+
+    def filterInPlace(self, matrix: np.ndarray) -> np.ndarray:
+        self._checkShape(matrix)
+        return np.subtract(matrix, self.__offset, out=matrix)
+
+    def resultType(self, dtype: np.dtype) -> np.dtype:
+        return np.result_type(dtype, self.__offset.dtype)
@@ -0,0 +1,187 @@
+from typing import Optional, Tuple, Union
+from .Instrumentation import Instrumentation
+import numpy as np
+
+# Ratio between the interquartile range and the standard deviation of a gaussian
+_IQR_TO_SIGMA = 1.349
+
+
+class CaptureStatistics:
+    """
+    Summary statistics of a CCD capture
+
+    Holds extremes, mean, standard deviation and a fine grained histogram of the pixel
+    values, gathered in two blocked passes: one finds the extremes the histogram bins
+    span, the other accumulates moments and the histogram. Percentiles, median and
+    noise estimates are derived from the cumulative histogram so none of them looks at
+    the pixels again. Percentiles are exact up to the width of a histogram bin, values
+    being assumed uniform within a bin.
+
+    NaN and infinite pixels are left out of every statistic, count only holds finite
+    pixels. A capture without any finite pixel gets NaN extremes and moments.
+    """
+
+    # Number of histogram bins spanning [min, max]
+    BINS = 1 << 14
+    # Rows converted at once, bounds the temporaries allocated by compute
+    BLOCK_ROWS = 256
+
+    def __init__(
+        self,
+        min: float,
+        max: float,
+        mean: float,
+        std: float,
+        cumulative: np.ndarray,
+    ):
+        """cumulative: Number of pixels up to and including each histogram bin"""
+        self.min = min
+        self.max = max
+        self.mean = mean
+        self.std = std
+        self.count = int(cumulative[-1])
+        self.__cumulative = cumulative
+        bins = len(cumulative)
+        self.__binWidth = (max - min) / bins if max > min else 0.0
+
+    @staticmethod
+    def compute(matrix: np.ndarray, bins: int = BINS) -> "CaptureStatistics":
+        """Gather statistics of every value in matrix"""
+        data = np.asarray(matrix)
+        if data.size == 0:
+            raise ValueError("Cannot compute statistics of an empty capture")
+        with Instrumentation.stage("stats") as stage:
+            statistics = CaptureStatistics.__compute(data, bins)
+            stage.setBytes(statistics.__cumulative.nbytes)
+        return statistics
+
+    @staticmethod
+    def __blocks(rows: np.ndarray):
+        blockRows = CaptureStatistics.BLOCK_ROWS
+        for start in range(0, len(rows), blockRows):
+            yield rows[start : start + blockRows]
+
+    @staticmethod
+    def __range(rows: np.ndarray) -> Tuple[float, float, bool]:
+        """Extremes of the finite values of rows, and whether all of them are finite"""
+        if not np.issubdtype(rows.dtype, np.inexact):
+            low = min(block.min().item() for block in CaptureStatistics.__blocks(rows))
+            high = max(block.max().item() for block in CaptureStatistics.__blocks(rows))
+            return low, high, True
+        low, high = np.inf, -np.inf
+        allFinite = True
+        for block in CaptureStatistics.__blocks(rows):
+            finite = np.isfinite(block)
+            if finite.all():
+                finite = True
+            else:
+                allFinite = False
+            low = min(low, block.min(where=finite, initial=np.inf).item())
+            high = max(high, block.max(where=finite, initial=-np.inf).item())
+        return low, high, allFinite
+
+    @staticmethod
+    def __compute(data: np.ndarray, bins: int) -> "CaptureStatistics":
+        rows = data.reshape(len(data), -1) if data.ndim > 1 else data.reshape(1, -1)
+        # The bins span the extremes, which must be known before any pixel is binned
+        low, high, allFinite = CaptureStatistics.__range(rows)
+        if low > high:
+            return CaptureStatistics(
+                np.nan, np.nan, np.nan, np.nan, np.zeros(bins, dtype=np.int64)
+            )
+        scale = bins / (high - low) if high > low else 0.0
+
+        counts = np.zeros(bins, dtype=np.int64)
+        # Moments are accumulated relative to the minimum to limit cancellation
+        total = 0.0
+        squares = 0.0
+        for block in CaptureStatistics.__blocks(rows):
+            shifted = np.subtract(block, low, dtype=np.float64).ravel()
+            if not allFinite:
+                shifted = shifted[np.isfinite(shifted)]
+            total += shifted.sum()
+            squares += np.dot(shifted, shifted)
+            shifted *= scale
+            indices = shifted.astype(np.intp)
+            # The maximum lands right on the upper edge of the last bin
+            np.minimum(indices, bins - 1, out=indices)
+            counts += np.bincount(indices, minlength=bins)
+
+        count = counts.sum()
+        mean = total / count
+        variance = max(squares / count - mean * mean, 0.0)
+        return CaptureStatistics(
+            min=low,
+            max=high,
+            mean=low + mean,
+            std=float(np.sqrt(variance)),
+            cumulative=np.cumsum(counts),
+        )
+
+    def binWidth(self) -> float:
+        """Width of a histogram bin, the resolution of derived values"""
+        return self.__binWidth
+
+    def counts(self) -> np.ndarray:
+        """Number of pixels in each histogram bin"""
+        return np.diff(self.__cumulative, prepend=0)
+
+    def __countBelow(self, values: np.ndarray) -> np.ndarray:
+        bins = len(self.__cumulative)
+        if self.__binWidth == 0:
+            return np.where(values < self.min, 0.0, float(self.count))
+        position = np.clip((values - self.min) / self.__binWidth, 0, bins)
+        whole = np.minimum(position.astype(np.intp), bins - 1)
+        before = np.concatenate(([0], self.__cumulative))
+        return before[whole] + (position - whole) * (before[whole + 1] - before[whole])
+
+    def percentile(self, q: Union[float, np.ndarray]) -> Union[float, np.ndarray]:
+        """Value below which q percent of the pixels lie, q being in [0, 100]"""
+        target = np.asarray(q, dtype=np.float64) / 100 * self.count
+        cumulative = self.__cumulative
+        bins = np.minimum(np.searchsorted(cumulative, target), len(cumulative) - 1)
+        inBin = cumulative[bins] - np.concatenate(([0], cumulative))[bins]
+        before = cumulative[bins] - inBin
+        fraction = np.divide(
+            target - before, inBin, out=np.zeros_like(target), where=inBin > 0
+        )
+        value = np.clip(
+            self.min + (bins + fraction) * self.__binWidth, self.min, self.max
+        )
+        return value.item() if value.ndim == 0 else value
+
+    def percentileRange(self, low: float, high: float) -> Tuple[float, float]:
+        """Values bounding the pixels between the low and high percentiles"""
+        lowValue, highValue = self.percentile(np.array([low, high]))
+        return lowValue.item(), highValue.item()
+
+    def median(self) -> float:
+        """Median pixel value"""
+        return self.percentile(50)
+
+    def noise(self) -> float:
+        """
+        Robust standard deviation of the pixel values
+
+        Estimated from the interquartile range, so the few pixels hit by particles
+        or hot pixels barely move it, unlike std.
+        """
+        q1, q3 = self.percentileRange(25, 75)
+        return (q3 - q1) / _IQR_TO_SIGMA
+
+    def histogram(
+        self,
+        low: Optional[float] = None,
+        high: Optional[float] = None,
+        bins: int = 64,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Histogram rebinned to bins equal bins between low and high
+
+        Defaults to the whole [min, max] range. Returns fractional counts along with
+        the bins + 1 bin edges, like numpy.histogram.
+        """
+        low = self.min if low is None else low
+        high = self.max if high is None else high
+        edges = np.linspace(low, high, bins + 1)
+        return np.diff(self.__countBelow(edges)), edges
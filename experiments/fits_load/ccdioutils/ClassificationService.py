@@ -0,0 +1,234 @@
+import time
+from collections import deque
+from concurrent.futures import Future
+from threading import Condition, Thread
+from typing import Deque, Dict, Hashable, List, Optional, Sequence, Tuple
+from .ClassifierModel import ClassifierModel
+from .Instrumentation import Instrumentation
+import numpy as np
+
+
+class ClassificationResult:
+    """Scores of the clusters of one submission, row i scoring clusterIds[i]"""
+
+    def __init__(
+        self,
+        captureId: Hashable,
+        clusterIds: np.ndarray,
+        scores: np.ndarray,
+        classes: Sequence[str],
+    ):
+        self.captureId = captureId
+        self.clusterIds = clusterIds
+        self.scores = scores
+        self.classes = classes
+
+    def labels(self) -> List[str]:
+        """Best scoring class of every cluster"""
+        return [self.classes[i] for i in self.scores.argmax(axis=1).tolist()]
+
+
+class _Submission:
+    """Stamps of a capture waiting for their scores"""
+
+    def __init__(self, captureId, clusterIds, stamps, classCount):
+        self.captureId = captureId
+        self.clusterIds = clusterIds
+        self.stamps = stamps
+        self.scores = np.empty((len(stamps), classCount), dtype=np.float32)
+        self.future = Future()
+        self.queuedAt = time.monotonic()
+        # Next stamp to be batched, and number of stamps not scored yet
+        self.offset = 0
+        self.remaining = len(stamps)
+
+
+class ClassificationService:
+    """
+    Asynchronous batched classification of cluster stamps
+
+    Producers submit the stamps of a capture along with their cluster ids and get a
+    Future of the ClassificationResult back. A worker thread copies pending stamps
+    into a preallocated (batchSize, height, width) buffer and runs the model on it
+    once it is full, or once the oldest pending stamp waited timeout seconds, so the
+    model always sees whole batches whatever the number of clusters per capture.
+    Submissions can span several batches and a batch can mix several captures, scores
+    are scattered back to their submission and its Future resolves once all its
+    stamps are scored. Partial batches are zero padded, padded rows are discarded.
+    """
+
+    def __init__(
+        self,
+        model: ClassifierModel,
+        batchSize: int = 256,
+        timeout: float = 0.05,
+    ):
+        self.__model = model
+        self.__batchSize = batchSize
+        self.__timeout = timeout
+        self.__batch = np.zeros((batchSize, *model.stampShape()), dtype=np.float32)
+        self.__classes = tuple(model.classes())
+        self.__condition = Condition()
+        self.__pending: Deque[_Submission] = deque()
+        self.__queueDepth = 0
+        self.__closed = False
+        self.__metrics = {
+            "submitted": 0,
+            "classified": 0,
+            "batches": 0,
+            "failedBatches": 0,
+            "failed": 0,
+            "sizeFlushes": 0,
+            "timeoutFlushes": 0,
+            "maxQueueDepth": 0,
+            "lastBatchFill": 0.0,
+        }
+        self.__thread = Thread(target=self.__run, name="ClassificationService")
+        self.__thread.daemon = True
+        self.__thread.start()
+
+    def submit(
+        self, captureId: Hashable, clusterIds: np.ndarray, stamps: np.ndarray
+    ) -> "Future[ClassificationResult]":
+        """
+        Queue the (N, height, width) stamps of N clusters of a capture
+
+        stamps must not be modified until the returned Future resolves
+        """
+        if stamps.shape[1:] != self.__batch.shape[1:]:
+            raise ValueError(f"Unexpected stamps shape: {stamps.shape}")
+        if len(clusterIds) != len(stamps):
+            raise ValueError("Expected one cluster id per stamp")
+        submission = _Submission(captureId, clusterIds, stamps, len(self.__classes))
+        if len(stamps) == 0:
+            submission.future.set_result(self.__result(submission))
+            return submission.future
+        with self.__condition:
+            if self.__closed:
+                raise RuntimeError("ClassificationService is closed")
+            self.__pending.append(submission)
+            self.__queueDepth += len(stamps)
+            self.__metrics["submitted"] += len(stamps)
+            self.__metrics["maxQueueDepth"] = max(
+                self.__metrics["maxQueueDepth"], self.__queueDepth
+            )
+            self.__condition.notify()
+        return submission.future
+
+    def close(self, wait: bool = True):
+        """Classify what is pending and stop the worker"""
+        with self.__condition:
+            self.__closed = True
+            self.__condition.notify()
+        if wait:
+            self.__thread.join()
+
+    def __enter__(self) -> "ClassificationService":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def queueDepth(self) -> int:
+        """Number of stamps waiting to be batched"""
+        with self.__condition:
+            return self.__queueDepth
+
+    def metrics(self) -> Dict[str, float]:
+        """
+        Counters of the service, along with its queue depth and mean batch fill
+
+        failedBatches and failed count the batches the model raised on and their
+        stamps, whose futures hold the exception.
+        """
+        with self.__condition:
+            metrics = dict(self.__metrics)
+            metrics["queueDepth"] = self.__queueDepth
+        batches = metrics["batches"]
+        capacity = batches * self.__batchSize
+        metrics["meanBatchFill"] = metrics["classified"] / capacity if batches else 0.0
+        return metrics
+
+    # Worker thread
+
+    def __result(self, submission: _Submission) -> ClassificationResult:
+        return ClassificationResult(
+            submission.captureId,
+            submission.clusterIds,
+            submission.scores,
+            self.__classes,
+        )
+
+    def __nextBatch(self) -> Optional[List[Tuple[_Submission, int, int]]]:
+        """
+        Wait for a batch to fill up or time out and take its stamps off the queue
+
+        Returns (submission, start, stop) stamp ranges, None once closed and drained
+        """
+        with self.__condition:
+            while len(self.__pending) == 0:
+                if self.__closed:
+                    return None
+                self.__condition.wait()
+            deadline = self.__pending[0].queuedAt + self.__timeout
+            while self.__queueDepth < self.__batchSize and not self.__closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self.__condition.wait(remaining)
+            if self.__queueDepth >= self.__batchSize:
+                self.__metrics["sizeFlushes"] += 1
+            else:
+                self.__metrics["timeoutFlushes"] += 1
+
+            ranges = list()
+            free = self.__batchSize
+            while free > 0 and len(self.__pending) > 0:
+                submission = self.__pending[0]
+                start = submission.offset
+                stop = min(len(submission.stamps), start + free)
+                ranges.append((submission, start, stop))
+                submission.offset = stop
+                free -= stop - start
+                if stop == len(submission.stamps):
+                    self.__pending.popleft()
+            self.__queueDepth -= self.__batchSize - free
+            return ranges
+
+    def __run(self):
+        while True:
+            ranges = self.__nextBatch()
+            if ranges is None:
+                return
+            fill = 0
+            for submission, start, stop in ranges:
+                self.__batch[fill : fill + stop - start] = submission.stamps[start:stop]
+                fill += stop - start
+            self.__batch[fill:] = 0
+
+            try:
+                with Instrumentation.stage("classify") as stage:
+                    scores = self.__model.predict(self.__batch)
+                    stage.setBytes(self.__batch.nbytes)
+            except Exception as e:
+                # Reported through the futures of the batch and counted in metrics
+                with self.__condition:
+                    self.__metrics["failedBatches"] += 1
+                    self.__metrics["failed"] += fill
+                for submission, _, _ in ranges:
+                    if not submission.future.done():
+                        submission.future.set_exception(e)
+                continue
+
+            with self.__condition:
+                self.__metrics["batches"] += 1
+                self.__metrics["classified"] += fill
+                self.__metrics["lastBatchFill"] = fill / self.__batchSize
+            row = 0
+            for submission, start, stop in ranges:
+                submission.scores[start:stop] = scores[row : row + stop - start]
+                row += stop - start
+                submission.remaining -= stop - start
+                if submission.remaining == 0 and not submission.future.done():
+                    submission.future.set_result(self.__result(submission))
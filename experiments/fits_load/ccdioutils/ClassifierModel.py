@@ -0,0 +1,78 @@
+from abc import ABC, abstractmethod
+from typing import Optional, Sequence, Tuple
+import numpy as np
+
+
+class ClassifierModel(ABC):
+    """
+    Backend classifying batches of cluster stamps
+
+    Stamps are fixed size images centered on a cluster. Backends receive whole batches
+    as a single (N, height, width) float32 array and must not keep a reference to it,
+    the buffer is reused for the next batch.
+    """
+
+    @abstractmethod
+    def stampShape(self) -> Tuple[int, int]:
+        """(height, width) of the stamps the model expects"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def classes(self) -> Sequence[str]:
+        """Name of every class, in the order of the score columns"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def predict(self, stamps: np.ndarray) -> np.ndarray:
+        """(N, len(classes)) scores of a (N, height, width) batch of stamps"""
+        raise NotImplementedError
+
+
+class LinearStampClassifier(ClassifierModel):
+    """
+    NumPy stand-in for a CNN, a single dense layer followed by a softmax
+
+    Classifies a whole batch with one matrix product, which makes it a cheap backend
+    to test batching and routing with until a trained model is plugged in.
+    """
+
+    def __init__(
+        self,
+        weights: np.ndarray,
+        bias: Optional[np.ndarray] = None,
+        classes: Sequence[str] = ("noise", "spot", "track"),
+        stampShape: Tuple[int, int] = (10, 10),
+    ):
+        """weights: (height * width, len(classes)) matrix applied to flattened stamps"""
+        if weights.shape != (stampShape[0] * stampShape[1], len(classes)):
+            raise ValueError(f"Unexpected weights shape: {weights.shape}")
+        self.__weights = np.asarray(weights, dtype=np.float32)
+        if bias is None:
+            bias = np.zeros(len(classes))
+        self.__bias = np.asarray(bias, dtype=np.float32)
+        self.__classes = tuple(classes)
+        self.__stampShape = stampShape
+
+    @staticmethod
+    def random(
+        classes: Sequence[str] = ("noise", "spot", "track"),
+        stampShape: Tuple[int, int] = (10, 10),
+        seed: int = 0,
+    ) -> "LinearStampClassifier":
+        """Classifier with fixed random weights, deterministic for a given seed"""
+        rng = np.random.default_rng(seed)
+        weights = rng.normal(0, 0.1, (stampShape[0] * stampShape[1], len(classes)))
+        return LinearStampClassifier(weights, None, classes, stampShape)
+
+    def stampShape(self) -> Tuple[int, int]:
+        return self.__stampShape
+
+    def classes(self) -> Sequence[str]:
+        return self.__classes
+
+    def predict(self, stamps: np.ndarray) -> np.ndarray:
+        logits = stamps.reshape(len(stamps), -1) @ self.__weights + self.__bias
+        logits -= logits.max(axis=1, keepdims=True)
+        np.exp(logits, out=logits)
+        logits /= logits.sum(axis=1, keepdims=True)
+        return logits
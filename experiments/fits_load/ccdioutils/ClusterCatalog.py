@@ -0,0 +1,190 @@
+from typing import Dict, Iterable, Iterator, List, Sequence, Union
+from .BoundingBox import BoundingBox
+import numpy as np
+
+
+class ClusterCatalog:
+    """
+    Columnar catalog of the clusters of a capture
+
+    Clusters are rows of a NumPy structured array holding their bounding box and
+    features, so tens of thousands of clusters take a few bytes each instead of a
+    Python object each. Columns read as attributes or by name, e.g. catalog.energy or
+    catalog["energy"], and indexing with a mask, indices or a slice returns a new
+    catalog, so filtering, sorting and spatial queries all stay vectorized:
+
+        bright = catalog[catalog.energy > 1.0].sortedBy("energy", descending=True)
+        inside = catalog[catalog.within(BoundingBox(0, 0, 99, 99))]
+
+    Boxes follow BoundingBox conventions, coordinates are inclusive.
+    """
+
+    DTYPE = np.dtype(
+        [
+            ("top", np.int32),
+            ("left", np.int32),
+            ("bottom", np.int32),
+            ("right", np.int32),
+            ("pixels", np.int32),
+            ("energy", np.float64),
+            ("sigma", np.float64),
+            ("centroidRow", np.float64),
+            ("centroidCol", np.float64),
+            ("peakRow", np.int32),
+            ("peakCol", np.int32),
+            ("peakValue", np.float64),
+        ]
+    )
+
+    def __init__(self, records: np.ndarray):
+        """records: Structured array of ClusterCatalog.DTYPE, one row per cluster"""
+        if records.dtype != ClusterCatalog.DTYPE:
+            raise ValueError(f"Unexpected catalog dtype: {records.dtype}")
+        self.__records = records
+
+    @staticmethod
+    def empty(size: int = 0) -> "ClusterCatalog":
+        """Catalog of size zeroed clusters"""
+        return ClusterCatalog(np.zeros(size, dtype=ClusterCatalog.DTYPE))
+
+    @staticmethod
+    def fromBoundingBoxes(boxes: Iterable[BoundingBox]) -> "ClusterCatalog":
+        """Catalog of the given boxes, their features are left zeroed"""
+        edges = np.array(
+            [(box.top, box.left, box.bottom, box.right) for box in boxes],
+            dtype=np.int32,
+        ).reshape(-1, 4)
+        catalog = ClusterCatalog.empty(len(edges))
+        for i, name in enumerate(("top", "left", "bottom", "right")):
+            catalog.__records[name] = edges[:, i]
+        return catalog
+
+    @staticmethod
+    def concatenate(catalogs: Sequence["ClusterCatalog"]) -> "ClusterCatalog":
+        """Single catalog holding the clusters of every catalog, in order"""
+        if len(catalogs) == 0:
+            return ClusterCatalog.empty()
+        return ClusterCatalog(np.concatenate([c.__records for c in catalogs]))
+
+    # Columns
+
+    def records(self) -> np.ndarray:
+        """Underlying structured array"""
+        return self.__records
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Every column by name, e.g. to be saved with numpy.savez"""
+        return {name: self.__records[name] for name in ClusterCatalog.DTYPE.names}
+
+    def __getattr__(self, name: str) -> np.ndarray:
+        if name in ClusterCatalog.DTYPE.names:
+            return self.__records[name]
+        raise AttributeError(f"{type(self).__name__!r} has no attribute {name!r}")
+
+    def __len__(self) -> int:
+        return len(self.__records)
+
+    def __getitem__(
+        self, key: Union[str, int, slice, np.ndarray, List[int]]
+    ) -> Union[np.ndarray, "ClusterCatalog"]:
+        """A column when key is a name, a catalog of the selected rows otherwise"""
+        if isinstance(key, str):
+            return self.__records[key]
+        if isinstance(key, (int, np.integer)):
+            key = [key]
+        return ClusterCatalog(self.__records[key])
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, ClusterCatalog):
+            return NotImplemented
+        return np.array_equal(self.__records, other.__records)
+
+    def __repr__(self):
+        return f"ClusterCatalog({len(self)} clusters)"
+
+    # Derived columns
+
+    def fullWidthX(self) -> np.ndarray:
+        """Cluster extent along columns, in pixels"""
+        return self.right - self.left + 1
+
+    def fullWidthY(self) -> np.ndarray:
+        """Cluster extent along rows, in pixels"""
+        return self.bottom - self.top + 1
+
+    # Filtering and sorting
+
+    def sortedBy(self, column: str, descending: bool = False) -> "ClusterCatalog":
+        """Catalog sorted on a column, ties keep their current order"""
+        values = self.__records[column]
+        # Reversing an ascending sort would reverse ties as well
+        order = np.argsort(-values if descending else values, kind="stable")
+        return ClusterCatalog(self.__records[order])
+
+    def inRange(self, column: str, low: float, high: float) -> np.ndarray:
+        """Mask of the clusters whose column lies within [low, high]"""
+        values = self.__records[column]
+        return (values >= low) & (values <= high)
+
+    @staticmethod
+    def __edges(box: BoundingBox):
+        # -1 bottom and right edges stand for unbounded, as in BoundingBox.unbounded
+        bottom = np.iinfo(np.int32).max if box.bottom == -1 else box.bottom
+        right = np.iinfo(np.int32).max if box.right == -1 else box.right
+        return box.top, box.left, bottom, right
+
+    def intersecting(self, box: BoundingBox) -> np.ndarray:
+        """Mask of the clusters whose bounding box overlaps box"""
+        top, left, bottom, right = ClusterCatalog.__edges(box)
+        return (
+            (self.top <= bottom)
+            & (self.bottom >= top)
+            & (self.left <= right)
+            & (self.right >= left)
+        )
+
+    def within(self, box: BoundingBox) -> np.ndarray:
+        """Mask of the clusters whose bounding box lies entirely inside box"""
+        top, left, bottom, right = ClusterCatalog.__edges(box)
+        return (
+            (self.top >= top)
+            & (self.bottom <= bottom)
+            & (self.left >= left)
+            & (self.right <= right)
+        )
+
+    def containing(self, row: int, col: int) -> np.ndarray:
+        """Mask of the clusters whose bounding box contains the (row, col) pixel"""
+        return (
+            (self.top <= row)
+            & (self.bottom >= row)
+            & (self.left <= col)
+            & (self.right >= col)
+        )
+
+    # BoundingBox conversion
+
+    def boundingBox(self, index: int) -> BoundingBox:
+        """Bounding box of a single cluster"""
+        record = self.__records[index]
+        return BoundingBox(
+            int(record["top"]),
+            int(record["left"]),
+            int(record["bottom"]),
+            int(record["right"]),
+        )
+
+    def boundingBoxes(self) -> List[BoundingBox]:
+        """Bounding box of every cluster"""
+        return [
+            BoundingBox(top, left, bottom, right)
+            for top, left, bottom, right in zip(
+                self.top.tolist(),
+                self.left.tolist(),
+                self.bottom.tolist(),
+                self.right.tolist(),
+            )
+        ]
+
+    def __iter__(self) -> Iterator[BoundingBox]:
+        return iter(self.boundingBoxes())
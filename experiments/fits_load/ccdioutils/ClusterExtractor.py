@@ -0,0 +1,98 @@
+from typing import Optional, Tuple
+from .CaptureStatistics import CaptureStatistics
+from .ClusterCatalog import ClusterCatalog
+from .ClusterFeatures import ClusterFeatures
+import numpy as np
+
+# Neighbourhoods joining pixels into clusters, by connectivity
+_STRUCTURES = {
+    4: np.array([[0, 1, 0], [1, 1, 1], [0, 1, 0]], dtype=bool),
+    8: np.ones((3, 3), dtype=bool),
+}
+
+
+class ClusterExtractor:
+    """
+    Extracts clusters of energy deposits from a CCD capture
+
+    Pixels above a threshold are grouped into connected components, each component
+    being a cluster. All stages run vectorized over the whole frame.
+    """
+
+    # Rows and columns skipped when estimating the noise level of a frame
+    NOISE_SAMPLING_STRIDE = 4
+
+    def __init__(
+        self,
+        threshold: Optional[float] = None,
+        nSigma: float = 5.0,
+        connectivity: int = 8,
+        minPixels: int = 1,
+    ):
+        """
+        threshold: Pixel value above which a pixel belongs to a cluster. When None it
+            is estimated per frame as median + nSigma * (robust standard deviation),
+            taken from the frame CaptureStatistics when they are provided.
+        connectivity: 4 to only join pixels sharing an edge, 8 to also join diagonals.
+        minPixels: Clusters with fewer pixels are discarded.
+        """
+        if connectivity not in _STRUCTURES:
+            raise ValueError(f"Unsupported connectivity: {connectivity}")
+        self.__threshold = threshold
+        self.__nSigma = nSigma
+        self.__structure = _STRUCTURES[connectivity]
+        self.__minPixels = minPixels
+
+    def threshold(
+        self, matrix: np.ndarray, statistics: Optional[CaptureStatistics] = None
+    ) -> float:
+        """Threshold used to segment the given frame"""
+        if self.__threshold is not None:
+            return self.__threshold
+        if statistics is not None:
+            return statistics.median() + self.__nSigma * statistics.noise()
+        stride = ClusterExtractor.NOISE_SAMPLING_STRIDE
+        sample = np.asarray(matrix[::stride, ::stride], dtype=np.float64).ravel()
+        median = np.median(sample)
+        sigma = 1.4826 * np.median(np.abs(sample - median))
+        return median + self.__nSigma * sigma
+
+    def label(
+        self, matrix: np.ndarray, statistics: Optional[CaptureStatistics] = None
+    ) -> Tuple[np.ndarray, int]:
+        """
+        Label connected components above threshold
+
+        Returns a matrix where every pixel holds its cluster id, 0 being background,
+        and the number of clusters found
+        """
+        # scipy is only loaded once a frame is actually labeled
+        from scipy import ndimage
+
+        labels, count = ndimage.label(
+            matrix > self.threshold(matrix, statistics), structure=self.__structure
+        )
+        if self.__minPixels > 1 and count > 0:
+            sizes = np.bincount(labels.ravel(), minlength=count + 1)
+            keep = sizes >= self.__minPixels
+            keep[0] = False
+            relabel = np.zeros(count + 1, dtype=labels.dtype)
+            count = int(np.count_nonzero(keep))
+            relabel[keep] = np.arange(1, count + 1, dtype=labels.dtype)
+            labels = relabel[labels]
+        return labels, count
+
+    def extract(
+        self,
+        matrix: np.ndarray,
+        statistics: Optional[CaptureStatistics] = None,
+        origin: Tuple[int, int] = (0, 0),
+    ) -> ClusterCatalog:
+        """
+        Extract the bounding box and features of every cluster in the given frame
+
+        origin is the (row, col) of matrix within the capture when matrix is a crop,
+        positions are offset by it so they are expressed in capture coordinates.
+        """
+        labels, count = self.label(matrix, statistics)
+        return ClusterFeatures.compute(matrix, labels, count, origin)
@@ -0,0 +1,88 @@
+from typing import Tuple
+from .ClusterCatalog import ClusterCatalog
+import numpy as np
+
+
+class ClusterFeatures:
+    """
+    Computes per-cluster features of a labeled capture
+
+    Features are returned as a ClusterCatalog, row i describing the cluster
+    labeled i + 1.
+    """
+
+    @staticmethod
+    def compute(
+        matrix: np.ndarray,
+        labels: np.ndarray,
+        count: int,
+        origin: Tuple[int, int] = (0, 0),
+    ) -> ClusterCatalog:
+        """
+        Compute the features of every cluster in a labeled frame in a single pass
+
+        matrix: Pixel values, usually in keV.
+        labels: Cluster id of every pixel, 0 being background, as returned by
+            ClusterExtractor.label.
+        count: Number of clusters in labels.
+        origin: (row, col) of matrix within the capture, when matrix is a crop.
+            Positions are reported in capture coordinates.
+
+        Only labeled pixels are visited and every feature comes out of label-indexed
+        reductions, so there is no per-cluster Python work.
+        """
+        rows, cols = np.nonzero(labels)
+        ids = labels[rows, cols]
+        values = np.asarray(matrix[rows, cols], dtype=np.float64)
+        rows = rows + origin[0]
+        cols = cols + origin[1]
+
+        # Group pixels by cluster, brightest pixel last in each group
+        order = np.lexsort((values, ids))
+        rows = rows[order]
+        cols = cols[order]
+        ids = ids[order]
+        values = values[order]
+        starts = np.searchsorted(ids, np.arange(1, count + 1))
+        ends = np.append(starts[1:], len(ids)) - 1
+
+        pixels = np.bincount(ids, minlength=count + 1)[1:]
+        energy = np.bincount(ids, weights=values, minlength=count + 1)[1:]
+        weights = np.abs(values)
+        totalWeight = np.bincount(ids, weights=weights, minlength=count + 1)[1:]
+        totalWeight[totalWeight == 0] = 1
+        centroidRow = np.bincount(ids, weights=weights * rows, minlength=count + 1)
+        centroidRow = centroidRow[1:] / totalWeight
+        centroidCol = np.bincount(ids, weights=weights * cols, minlength=count + 1)
+        centroidCol = centroidCol[1:] / totalWeight
+        # sigma is the intensity weighted RMS distance to the centroid along one axis
+        spread = (rows - centroidRow[ids - 1]) ** 2 + (cols - centroidCol[ids - 1]) ** 2
+        variance = np.bincount(ids, weights=weights * spread, minlength=count + 1)
+        sigma = np.sqrt(variance[1:] / (2 * totalWeight))
+
+        if count == 0:
+            empty = np.zeros(0, dtype=np.intp)
+            top = left = bottom = right = peakRow = peakCol = empty
+        else:
+            top = np.minimum.reduceat(rows, starts)
+            left = np.minimum.reduceat(cols, starts)
+            bottom = np.maximum.reduceat(rows, starts)
+            right = np.maximum.reduceat(cols, starts)
+            peakRow = rows[ends]
+            peakCol = cols[ends]
+
+        catalog = ClusterCatalog.empty(count)
+        columns = catalog.records()
+        columns["top"] = top
+        columns["left"] = left
+        columns["bottom"] = bottom
+        columns["right"] = right
+        columns["pixels"] = pixels
+        columns["energy"] = energy
+        columns["sigma"] = sigma
+        columns["centroidRow"] = centroidRow
+        columns["centroidCol"] = centroidCol
+        columns["peakRow"] = peakRow
+        columns["peakCol"] = peakCol
+        columns["peakValue"] = values[ends] if count > 0 else np.zeros(0)
+        return catalog
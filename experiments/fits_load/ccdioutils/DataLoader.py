@@ -0,0 +1,166 @@
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from threading import Event
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+from .CCDCaptureModel import CCDCaptureModel
+
+FITS_BLOCK_SIZE = 2880
+
+FileSignature = Tuple[int, int]
+
+
+class DataLoader:
+    """
+    Turns a local directory into a stream of CCDCaptureModel
+
+    Polls a directory for FITS files and loads each new file exactly once. A file is
+    only considered complete when its size is a whole number of FITS blocks and its
+    size and modification time did not change between two consecutive polls, which
+    keeps files still being written by the DAQ out of the stream. Ingested files are
+    recorded in a checkpoint file so restarting the loader does not ingest them again.
+
+    Files are loaded, pixel data included, on a pool of threads kept for the life of
+    the loader, call close or use the loader as a context manager to release it. A
+    file whose headers or data can't be read is reported as failed, along with the
+    error raised while reading it.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        checkpointFile: Optional[Path] = None,
+        pattern: str = "*.fits",
+        settleTime: float = 1.0,
+        maxWorkers: int = 4,
+        loader: Callable[[Path], List[CCDCaptureModel]] = CCDCaptureModel.load,
+    ):
+        self.__directory = Path(directory)
+        self.__checkpointFile = checkpointFile
+        self.__pattern = pattern
+        self.__settleTime = settleTime
+        self.__executor = ThreadPoolExecutor(
+            max_workers=maxWorkers, thread_name_prefix="DataLoader"
+        )
+        self.__loader = loader
+        self.__pending: Dict[str, FileSignature] = dict()
+        self.__failed: Dict[str, FileSignature] = dict()
+        self.__errors: Dict[str, Exception] = dict()
+        self.__ingested: Dict[str, FileSignature] = self.__readCheckpoint()
+        self.__stopEvent = Event()
+
+    def __readCheckpoint(self) -> Dict[str, FileSignature]:
+        if self.__checkpointFile is None or not self.__checkpointFile.exists():
+            return dict()
+        with open(self.__checkpointFile) as f:
+            ingested = json.load(f)["ingested"]
+        return {path: tuple(signature) for path, signature in ingested.items()}
+
+    def __writeCheckpoint(self):
+        if self.__checkpointFile is None:
+            return
+        tmpFile = self.__checkpointFile.with_suffix(".tmp")
+        with open(tmpFile, "w") as f:
+            json.dump({"ingested": self.__ingested}, f, indent=1)
+        os.replace(tmpFile, self.__checkpointFile)
+
+    def __readyFiles(self) -> List[Tuple[Path, FileSignature]]:
+        """Files that are complete and were not ingested in their current state"""
+        ready = list()
+        now = time.time()
+        seen = dict()
+        for path in sorted(self.__directory.glob(self.__pattern)):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            key = str(path.resolve())
+            signature = (stat.st_size, stat.st_mtime_ns)
+            if self.__ingested.get(key) == signature:
+                continue
+            if self.__failed.get(key) == signature:
+                continue
+            seen[key] = signature
+            if (
+                stat.st_size == 0
+                or stat.st_size % FITS_BLOCK_SIZE != 0
+                or self.__pending.get(key) != signature
+                or now - stat.st_mtime < self.__settleTime
+            ):
+                continue
+            ready.append((path, signature))
+        self.__pending = seen
+        return ready
+
+    def __load(self, path: Path) -> Union[List[CCDCaptureModel], Exception]:
+        """Runs on a worker thread, the error raised when the file can't be read"""
+        try:
+            captures = self.__loader(path)
+            # Loading only parses headers, reading the pixels here spreads the reads
+            # over the pool and reports files with unreadable data as failed
+            for capture in captures:
+                capture.rawData()
+            return captures
+        except Exception as error:
+            return error
+
+    def poll(self) -> List[Tuple[Path, List[CCDCaptureModel]]]:
+        """
+        Scan the directory once
+
+        Returns the captures of every file that became complete since the last poll,
+        loaded in parallel
+        """
+        ready = self.__readyFiles()
+        if len(ready) == 0:
+            return list()
+        loaded = list(self.__executor.map(self.__load, [path for path, _ in ready]))
+
+        result = list()
+        for (path, signature), captures in zip(ready, loaded):
+            key = str(path.resolve())
+            del self.__pending[key]
+            if isinstance(captures, Exception):
+                self.__failed[key] = signature
+                self.__errors[key] = captures
+                continue
+            self.__failed.pop(key, None)
+            self.__errors.pop(key, None)
+            self.__ingested[key] = signature
+            result.append((path, captures))
+        self.__writeCheckpoint()
+        return result
+
+    def watch(
+        self, interval: float = 1.0
+    ) -> Iterator[Tuple[Path, List[CCDCaptureModel]]]:
+        """Poll the directory every interval seconds until stop() is called"""
+        self.__stopEvent.clear()
+        while not self.__stopEvent.is_set():
+            for item in self.poll():
+                yield item
+            self.__stopEvent.wait(interval)
+
+    def stop(self):
+        """Stop an ongoing watch()"""
+        self.__stopEvent.set()
+
+    def close(self):
+        """Stop the worker threads, the loader can't poll anymore"""
+        self.__executor.shutdown()
+
+    def __enter__(self) -> "DataLoader":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def failedFiles(self) -> Dict[Path, Exception]:
+        """Files that could not be loaded and why, retried only if they change"""
+        return {Path(path): error for path, error in self.__errors.items()}
+
+    def ingestedFiles(self) -> List[Path]:
+        """Files already turned into captures, including previous runs"""
+        return [Path(path) for path in self.__ingested]
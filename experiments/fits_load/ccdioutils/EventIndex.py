@@ -0,0 +1,169 @@
+import sqlite3
+from pathlib import Path
+from typing import Callable, Optional, Union
+from .BoundingBox import BoundingBox
+from .ClusterCatalog import ClusterCatalog
+import numpy as np
+
+# Coordinate used in place of -1 (unbounded) box edges when querying
+_UNBOUNDED = 2**31 - 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS captures (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    hdu INTEGER NOT NULL,
+    UNIQUE (source, hdu)
+);
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    captureId INTEGER NOT NULL,
+    pixels INTEGER NOT NULL,
+    energy REAL NOT NULL,
+    sigma REAL NOT NULL,
+    centroidRow REAL NOT NULL,
+    centroidCol REAL NOT NULL,
+    peakRow INTEGER NOT NULL,
+    peakCol INTEGER NOT NULL,
+    peakValue REAL NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS eventBoxes USING rtree_i32 (
+    id,
+    captureMin, captureMax,
+    top, bottom,
+    left, right
+);
+"""
+
+_FEATURE_COLUMNS = (
+    "pixels",
+    "energy",
+    "sigma",
+    "centroidRow",
+    "centroidCol",
+    "peakRow",
+    "peakCol",
+    "peakValue",
+)
+
+
+class EventIndex:
+    """
+    Persistent spatial index of extracted clusters
+
+    Stores the bounding box and features of every cluster found in a capture, keyed
+    by FITS source and HDU, in an SQLite database. Boxes live in an R-tree whose first
+    dimension is the capture itself, so rectangle queries only walk the events of the
+    requested capture no matter how many captures were indexed.
+    """
+
+    def __init__(self, path: Union[Path, str] = ":memory:"):
+        self.__connection = sqlite3.connect(str(path))
+        self.__connection.executescript(_SCHEMA)
+
+    def close(self):
+        """Close the underlying database"""
+        self.__connection.close()
+
+    def __captureId(self, source: str, hdu: int) -> Optional[int]:
+        row = self.__connection.execute(
+            "SELECT id FROM captures WHERE source = ? AND hdu = ?", (source, hdu)
+        ).fetchone()
+        return None if row is None else row[0]
+
+    def isIndexed(self, source: str, hdu: int) -> bool:
+        """Tells whether clusters of the given capture are already in the index"""
+        return self.__captureId(source, hdu) is not None
+
+    def insert(self, source: str, hdu: int, catalog: ClusterCatalog):
+        """
+        Index every cluster of a capture
+
+        Previously indexed clusters of the same capture are replaced. All rows are
+        written in a single transaction.
+        """
+        with self.__connection as connection:
+            captureId = self.__captureId(source, hdu)
+            if captureId is None:
+                captureId = connection.execute(
+                    "INSERT INTO captures (source, hdu) VALUES (?, ?)", (source, hdu)
+                ).lastrowid
+            else:
+                connection.execute(
+                    "DELETE FROM eventBoxes WHERE id IN "
+                    "(SELECT id FROM events WHERE captureId = ?)",
+                    (captureId,),
+                )
+                connection.execute(
+                    "DELETE FROM events WHERE captureId = ?", (captureId,)
+                )
+
+            firstId = connection.execute(
+                "SELECT COALESCE(MAX(id), 0) + 1 FROM events"
+            ).fetchone()[0]
+            ids = range(firstId, firstId + len(catalog))
+            columns = [catalog[name].tolist() for name in _FEATURE_COLUMNS]
+            connection.executemany(
+                f"INSERT INTO events (id, captureId, {', '.join(_FEATURE_COLUMNS)}) "
+                f"VALUES (?, ?, {', '.join('?' * len(_FEATURE_COLUMNS))})",
+                (
+                    (eventId, captureId, *values)
+                    for eventId, *values in zip(ids, *columns)
+                ),
+            )
+            connection.executemany(
+                "INSERT INTO eventBoxes VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    (eventId, captureId, captureId, top, bottom, left, right)
+                    for eventId, top, left, bottom, right in zip(
+                        ids,
+                        catalog.top.tolist(),
+                        catalog.left.tolist(),
+                        catalog.bottom.tolist(),
+                        catalog.right.tolist(),
+                    )
+                ),
+            )
+
+    def query(
+        self, source: str, hdu: int, box: BoundingBox = BoundingBox.unbounded()
+    ) -> Optional[ClusterCatalog]:
+        """
+        Clusters of a capture whose bounding box intersects the given box
+
+        Returns None when the capture was never indexed, as opposed to an empty
+        ClusterCatalog when it was indexed but nothing lies in the box.
+        """
+        captureId = self.__captureId(source, hdu)
+        if captureId is None:
+            return None
+        bottom = _UNBOUNDED if box.bottom == -1 else box.bottom
+        right = _UNBOUNDED if box.right == -1 else box.right
+        rows = self.__connection.execute(
+            "SELECT b.top, b.left, b.bottom, b.right, "
+            f"{', '.join('e.' + name for name in _FEATURE_COLUMNS)} "
+            "FROM eventBoxes b JOIN events e ON e.id = b.id "
+            "WHERE b.captureMin = ? AND b.captureMax = ? "
+            "AND b.top <= ? AND b.bottom >= ? AND b.left <= ? AND b.right >= ? "
+            "ORDER BY e.id",
+            (captureId, captureId, bottom, box.top, right, box.left),
+        ).fetchall()
+        # Columns are selected in ClusterCatalog.DTYPE order
+        return ClusterCatalog(np.array(rows, dtype=ClusterCatalog.DTYPE))
+
+    def queryOrIndex(
+        self,
+        source: str,
+        hdu: int,
+        box: BoundingBox,
+        extract: Callable[[], ClusterCatalog],
+    ) -> ClusterCatalog:
+        """
+        Clusters intersecting box, extracting and indexing the capture if needed
+
+        extract is only invoked when the capture was never indexed, it must return
+        the catalog of every cluster in the whole capture.
+        """
+        if not self.isIndexed(source, hdu):
+            self.insert(source, hdu, extract())
+        return self.query(source, hdu, box)
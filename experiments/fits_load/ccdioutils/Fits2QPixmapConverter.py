@@ -1,14 +1,43 @@
 import numpy as np
 from abc import ABC, abstractmethod
+from functools import lru_cache
 from PySide6 import QtGui
-from io import BytesIO
-import matplotlib.pyplot as plt
+from typing import Hashable, Optional, Tuple, Union
+import matplotlib
 import matplotlib.colors as colors
 
 
+@lru_cache(maxsize=64)
+def _namedColormapLUT(name: str) -> np.ndarray:
+    return _colormapLUT(matplotlib.colormaps[name])
+
+
+def _colormapLUT(colormap: colors.Colormap) -> np.ndarray:
+    rgba = colormap(np.linspace(0, 1, 256), bytes=True).astype(np.uint32)
+    lut = (rgba[:, 3] << 24) | (rgba[:, 0] << 16) | (rgba[:, 1] << 8) | rgba[:, 2]
+    lut.flags.writeable = False
+    return lut
+
+
+def colormapLUT(colormap: Union[str, colors.Colormap]) -> np.ndarray:
+    """
+    256 entry lookup table of a matplotlib colormap
+
+    Entries are 32-bit ARGB values laid out as expected by QImage.Format_ARGB32.
+    Tables of named colormaps are computed once and cached.
+    """
+    if isinstance(colormap, str):
+        return _namedColormapLUT(colormap)
+    return _colormapLUT(colormap)
+
+
 class Fits2QPixmapConverter(ABC):
     """Fits image to QPixmap converter interface"""
 
+    # Window (low, high) values are mapped to at render time, None for the converter
+    # default. Converters apply it to the transfer function, never to the data.
+    _displayRange: Optional[Tuple[float, float]] = None
+
     @abstractmethod
     def convert(self, matrix: np.matrix) -> QtGui.QPixmap:
         """Convert a numpy matrix into a QPixmap"""
@@ -22,41 +51,79 @@ class Fits2QPixmapConverter(ABC):
         """
         return False
 
+    def cacheKey(self) -> Hashable:
+        """Value identifying the current rendering settings, used to cache renders"""
+        colormap = getattr(self, "_colormap", None)
+        if isinstance(colormap, colors.Colormap):
+            colormap = colormap.name
+        return (type(self).__name__, colormap, self._displayRange)
+
+    def toQImage(self, matrix: np.ndarray) -> QtGui.QImage:
+        """
+        Convert a numpy matrix into a QImage owning its pixels
+
+        QImages, unlike QPixmaps, can be built outside of the GUI thread. Converters
+        overriding this can be used for background rendering.
+        """
+        return self.convert(matrix).toImage()
+
+    def supportsBackgroundRendering(self) -> bool:
+        """Tells whether toQImage can be called from a worker thread"""
+        return type(self).toQImage is not Fits2QPixmapConverter.toQImage
+
 
 class MatplotlibBasedConverter(Fits2QPixmapConverter):
     """
     Converts a matrix coming from a FITS file into a QPixmap using matplotlib for intermediate
     pre-processing
+
+    Figures are drawn on their own Agg canvas, without pyplot, and the image is built
+    from the canvas RGBA buffer, so conversions can run off the GUI thread.
     """
 
     def __init__(self, colormap: colors.Colormap, dpi: int = 100):
         self._colormap = colormap
         self._dpi = dpi
 
-    def convert(self, matrix: np.matrix) -> QtGui.QPixmap:
+    def cacheKey(self) -> Hashable:
+        return super().cacheKey() + (self._dpi,)
+
+    def toQImage(self, matrix: np.ndarray) -> QtGui.QImage:
+        # Figures take longer to import than the rest of the GUI layer, they are only
+        # loaded once this converter is used
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
         height, width = matrix.shape
-        fig, ax = plt.subplots(
-            figsize=(width / self._dpi, height / self._dpi), dpi=self._dpi
-        )
+        fig = Figure(figsize=(width / self._dpi, height / self._dpi), dpi=self._dpi)
+        canvas = FigureCanvasAgg(fig)
+        ax = fig.add_axes((0, 0, 1, 1))
 
-        ax.matshow(matrix, cmap=self._colormap)
+        vmin, vmax = (None, None) if self._displayRange is None else self._displayRange
+        ax.matshow(matrix, cmap=self._colormap, vmin=vmin, vmax=vmax)
         ax.axis("off")
-        fig.subplots_adjust(left=0, right=1, top=1, bottom=0)
 
-        buf = BytesIO()
-        plt.savefig(buf, format="png")
-        buf.seek(0)
-        plt.close(fig)
+        canvas.draw()
+        rgba = np.asarray(canvas.buffer_rgba())
+        q_image = QtGui.QImage(
+            rgba.data,
+            rgba.shape[1],
+            rgba.shape[0],
+            rgba.strides[0],
+            QtGui.QImage.Format_RGBA8888,
+        )
+        return q_image.copy()
 
-        pixmap = QtGui.QPixmap()
-        pixmap.loadFromData(buf.getvalue())
-        return pixmap
+    def convert(self, matrix: np.matrix) -> QtGui.QPixmap:
+        return QtGui.QPixmap.fromImage(self.toQImage(matrix))
 
 
 class RawPixmapConverter(Fits2QPixmapConverter):
     """Converts a FITS matrix into an 8-bit grayscale image losing visual information"""
 
-    def convert(self, matrix: np.matrix) -> QtGui.QPixmap:
+    def toQImage(self, matrix: np.ndarray) -> QtGui.QImage:
+        # Crops are views with gaps between rows, QImage wants a contiguous buffer
+        matrix = np.ascontiguousarray(matrix)
         height, width = matrix.shape
         q_image = QtGui.QImage(
             matrix.data,
@@ -65,36 +132,60 @@ class RawPixmapConverter(Fits2QPixmapConverter):
             matrix.strides[0],
             QtGui.QImage.Format_Grayscale8,
         )
-        return QtGui.QPixmap.fromImage(q_image)
+        return q_image.copy()
+
+    def convert(self, matrix: np.matrix) -> QtGui.QPixmap:
+        return QtGui.QPixmap.fromImage(self.toQImage(matrix))
 
 
 class FastPixmapConverter(Fits2QPixmapConverter):
     """
-    Converts a FITS matrix into an 8-bit grayscale image
+    Converts a FITS matrix into a colormapped 32-bit image
+
+    This converter clears out negative values, scales the data down to 256 levels in a
+    single vectorized step and colors them through a lookup table precomputed from a
+    matplotlib colormap. The image is built straight from the resulting buffer.
 
-    This converter clears out negavite values and scales the data down to a range of 256
-    levels of gray.
+    When a display range is set, values are scaled from that window instead and values
+    outside of it saturate to the colormap ends.
     """
 
-    def convert(self, matrix: np.matrix) -> QtGui.QPixmap:
+    def __init__(self, colormap: Union[str, colors.Colormap] = "Greys_r"):
+        self._colormap = colormap
+
+    @staticmethod
+    def toIndices(
+        matrix: np.ndarray, low: float, high: float, out: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Map values in [low, high] to 0..255, clipping values out of the range"""
+        scaled = np.subtract(matrix, low, dtype=np.float32)
+        scaled *= 255 / (high - low) if high > low else 0
+        np.clip(scaled, 0, 255, out=scaled)
+        if out is None:
+            return scaled.astype(np.uint8)
+        np.copyto(out, scaled, casting="unsafe")
+        return out
+
+    def toQImage(self, matrix: np.ndarray) -> QtGui.QImage:
+        """Convert a numpy matrix into a QImage owning its pixels"""
         height, width = matrix.shape
-        if matrix.min() < 0:
-            vmatrix = matrix.copy()
-            vmatrix[vmatrix < 0] = 0
+        if self._displayRange is None:
+            low, high = 0, matrix.max()
         else:
-            vmatrix = matrix
-        valueRange = vmatrix.max()
-
-        vmatrix = vmatrix * 65536 / valueRange
-
+            low, high = self._displayRange
+        indices = FastPixmapConverter.toIndices(matrix, low, high)
+        argb = colormapLUT(self._colormap).take(indices)
         q_image = QtGui.QImage(
-            matrix.data,
+            argb.data,
             width,
             height,
-            matrix.strides[0],
-            QtGui.QImage.Format_Grayscale16,
+            argb.strides[0],
+            QtGui.QImage.Format_ARGB32,
         )
-        return QtGui.QPixmap.fromImage(q_image)
+        return q_image.copy()
+
+    def convert(self, matrix: np.matrix) -> QtGui.QPixmap:
+        return QtGui.QPixmap.fromImage(self.toQImage(np.asarray(matrix)))
 
     def isFast(self):
         return True
@@ -0,0 +1,69 @@
+from astropy.io import fits
+from pathlib import Path
+from threading import Lock
+from typing import Union
+import numpy as np
+
+
+class FitsFile:
+    """
+    FITS file opened for lazy access to its HDUs
+
+    Owns the astropy HDUList shared by the LazyHDU of the file. HDU headers are parsed
+    as HDUs are first indexed and pixel data is read when first requested: raw data is
+    memory-mapped, data scaled by BZERO, BSCALE or BLANK, e.g. uint16 frames, is read
+    and scaled in memory as it can't be mapped.
+
+    The file stays open until close is called, or the with block opening it exits.
+    Data already handed out remains valid once closed, HDUs that were not read can no
+    longer be. Captures of one file may be read from several threads, reads share
+    the file handle and are serialized.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.__path = Path(path)
+        self.__hduList = fits.open(self.__path, lazy_load_hdus=True)
+        self.__closed = False
+        self.__lock = Lock()
+
+    def path(self) -> Path:
+        return self.__path
+
+    def isClosed(self) -> bool:
+        return self.__closed
+
+    def close(self):
+        """Release the file handle, and memory maps no longer referenced"""
+        with self.__lock:
+            if not self.__closed:
+                self.__closed = True
+                self.__hduList.close()
+
+    def __enter__(self) -> "FitsFile":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __hdu(self, index: int):
+        if self.__closed:
+            raise ValueError(f"{self.__path} is closed")
+        return self.__hduList[index]
+
+    def header(self, index: int) -> fits.Header:
+        """Header of an HDU, parsing it on first access. IndexError past the end"""
+        with self.__lock:
+            return self.__hdu(index).header
+
+    def data(self, index: int) -> np.ndarray:
+        """Pixel data of an HDU, read on first access"""
+        with self.__lock:
+            return self.__hdu(index).data
+
+    def releaseData(self, index: int):
+        """Drop the pixel data astropy cached for an HDU, it is read again on access"""
+        with self.__lock:
+            if not self.__closed:
+                hdu = self.__hduList[index]
+                if "data" in hdu.__dict__:
+                    del hdu.data
@@ -0,0 +1,72 @@
+from pathlib import Path
+from typing import Dict, Hashable, List, Optional, Sequence, Union
+from .VizFilter import UniformVizFilter
+import hashlib
+import re
+import numpy as np
+
+# Key of an array of a given HDU in a .npz written by FrameFilter._saveFrames
+_FRAME_KEY = re.compile(r"(\D+)(\d+)")
+
+
+class FrameFilter(UniformVizFilter):
+    """
+    Base of filters holding a per-pixel frame, e.g. calibration masters or masks
+
+    Pixels are matched to the frame by position, so captures must have its shape and
+    the filter must be applied to whole captures, CCDCaptureModel.applyFilter, rather
+    than to cropped views. The cache key hashes the frame once, on construction.
+    Filters of every HDU of a file are stored together in a .npz, each array named
+    after its HDU index, e.g. bias0, bias1.
+    """
+
+    # What the frame is called in error messages
+    FRAME_NAME = "frame"
+
+    def __init__(self, frame: np.ndarray, *keyParts: Hashable):
+        """keyParts: Parameters besides the frame telling filters apart"""
+        self.__shape = frame.shape
+        self.__key = (
+            type(self).__name__,
+            frame.shape,
+            hashlib.blake2b(frame.tobytes(), digest_size=16).hexdigest(),
+            *keyParts,
+        )
+
+    @staticmethod
+    def _saveFrames(
+        path: Union[str, Path],
+        frames: Sequence[Dict[str, Optional[np.ndarray]]],
+        **arrays: np.ndarray,
+    ):
+        """Write frames[i], arrays by name, as name{i}. None values are left out"""
+        named = {
+            f"{name}{hdu}": array
+            for hdu, hduArrays in enumerate(frames)
+            for name, array in hduArrays.items()
+            if array is not None
+        }
+        np.savez(path, **named, **arrays)
+
+    @staticmethod
+    def _loadFrames(path: Union[str, Path], name: str) -> List[Dict[str, np.ndarray]]:
+        """Read back the arrays of every HDU holding a name array, by name"""
+        with np.load(path) as arrays:
+            frames: List[Dict[str, np.ndarray]] = []
+            while f"{name}{len(frames)}" in arrays:
+                frames.append(dict())
+            for key in arrays.files:
+                match = _FRAME_KEY.fullmatch(key)
+                if match is not None and int(match[2]) < len(frames):
+                    frames[int(match[2])][match[1]] = arrays[key]
+        return frames
+
+    def _checkShape(self, matrix: np.ndarray):
+        if matrix.shape != self.__shape:
+            raise ValueError(
+                f"Capture of shape {matrix.shape} does not match the "
+                f"{self.FRAME_NAME} {self.__shape}"
+            )
+
+    def cacheKey(self) -> Optional[Hashable]:
+        return self.__key
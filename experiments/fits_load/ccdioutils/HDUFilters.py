@@ -0,0 +1,39 @@
+from pathlib import Path
+from typing import List, Optional, Sequence, Union
+from .CalibrationFilter import CalibrationFilter
+from .CCDCaptureModel import CCDCaptureModel
+from .HotPixelMask import HotPixelMask
+from .VizFilter import UniformVizFilter
+
+
+class HDUFilters:
+    """
+    Filters matched to the captures of a file by position, e.g. calibration masters
+
+    Holds one list of filters per kind, each with one filter per capture: filters[i]
+    applies to the i-th image HDU of a file, the order iterLoad yields them in. Kinds
+    are applied in the order they were given, calibration before hot pixel masks.
+    """
+
+    def __init__(self, perHDU: Sequence[Sequence[UniformVizFilter]] = ()):
+        self.__perHDU: List[List[UniformVizFilter]] = [list(f) for f in perHDU]
+
+    @staticmethod
+    def load(
+        calibration: Optional[Union[str, Path]] = None,
+        hotPixels: Optional[Union[str, Path]] = None,
+    ) -> "HDUFilters":
+        """Read the files of ccd_calibrate and ccd_noise, either may be omitted"""
+        perHDU = []
+        if calibration is not None:
+            perHDU.append(CalibrationFilter.load(calibration))
+        if hotPixels is not None:
+            perHDU.append(HotPixelMask.load(hotPixels))
+        return HDUFilters(perHDU)
+
+    def apply(self, capture: CCDCaptureModel, index: int):
+        """Apply the filters of the index-th capture of its file to capture"""
+        for filters in self.__perHDU:
+            if index >= len(filters):
+                raise ValueError(f"No calibration or mask for capture {index}")
+            capture.applyFilter(filters[index])
@@ -0,0 +1,67 @@
+from pathlib import Path
+from typing import List, Sequence, Union
+from .FrameFilter import FrameFilter
+import numpy as np
+
+
+class HotPixelMask(FrameFilter):
+    """
+    Replaces hot or noisy pixels of captures by a fixed value
+
+    Masks are usually derived from many exposures with NoiseAccumulator. Applied to a
+    model, CCDCaptureModel.applyFilter, masked pixels are neither rendered nor picked
+    up by clustering. Captures must have the shape of the mask, see FrameFilter.
+    """
+
+    FRAME_NAME = "hot pixel mask"
+
+    def __init__(self, mask: np.ndarray, value: float = 0.0):
+        """value: What masked pixels are replaced by, e.g. 0 on calibrated captures"""
+        self.__mask = np.asarray(mask, dtype=bool)
+        self.__value = value
+        super().__init__(self.__mask, value)
+
+    @staticmethod
+    def save(path: Union[str, Path], masks: Sequence["HotPixelMask"], **arrays):
+        """
+        Write the masks of every HDU of a file to a .npz, masks[i] for HDU i
+
+        arrays are stored alongside, e.g. the noise maps the masks were derived from.
+        """
+        HotPixelMask._saveFrames(
+            path, [{"mask": mask.mask()} for mask in masks], **arrays
+        )
+
+    @staticmethod
+    def load(path: Union[str, Path], value: float = 0.0) -> List["HotPixelMask"]:
+        """Read masks written by save, one per HDU"""
+        return [
+            HotPixelMask(arrays["mask"], value)
+            for arrays in HotPixelMask._loadFrames(path, "mask")
+        ]
+
+    def mask(self) -> np.ndarray:
+        """True for every masked pixel"""
+        return self.__mask
+
+    def count(self) -> int:
+        """Number of masked pixels"""
+        return int(np.count_nonzero(self.__mask))
+
+    def filter(self, omatrix: np.matrix) -> np.matrix:
+        matrix = omatrix.astype(self.resultType(omatrix.dtype))
+        return self.filterInPlace(matrix)
+
+    def filterInPlace(self, matrix: np.ndarray) -> np.ndarray:
+        self._checkShape(matrix)
+        np.putmask(matrix, self.__mask, self.__value)
+        return matrix
+
+    def resultType(self, dtype: np.dtype) -> np.dtype:
+        """Captures keep their type when it can hold value, e.g. 0 on uint16"""
+        dtype = np.dtype(dtype)
+        if dtype.kind in "iu" and float(self.__value).is_integer():
+            info = np.iinfo(dtype)
+            if info.min <= self.__value <= info.max:
+                return dtype
+        return np.result_type(dtype, self.__value)
@@ -0,0 +1,169 @@
+import json
+import time
+from collections import deque
+from pathlib import Path
+from threading import Lock
+from typing import Deque, Dict, Optional, Tuple, Union
+import numpy as np
+
+# Edges of the latency histograms, in milliseconds. Samples outside are counted as
+# underflow and overflow
+HISTOGRAM_EDGES_MS = np.logspace(-2, 4, 25)
+
+
+class _NullStage:
+    """Stage handed out while instrumentation is disabled, does nothing"""
+
+    def __enter__(self) -> "_NullStage":
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def setBytes(self, nbytes: int):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    """Times the block it wraps and records it into an Instrumentation"""
+
+    def __init__(self, instrumentation: "Instrumentation", name: str):
+        self.__instrumentation = instrumentation
+        self.__name = name
+        self.__bytes = 0
+        self.__start = 0.0
+
+    def __enter__(self) -> "_Stage":
+        self.__start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = (time.perf_counter() - self.__start) * 1000
+        self.__instrumentation.record(self.__name, elapsed, self.__bytes)
+        return False
+
+    def setBytes(self, nbytes: int):
+        """Size of the memory the stage allocated"""
+        self.__bytes = nbytes
+
+
+class Instrumentation:
+    """
+    Registry of per-stage latencies and allocation sizes
+
+    Code paths wrap their stages, e.g. parse, stats, filter, convert, paint, in
+    Instrumentation.stage(name). While no registry is enabled this returns a shared
+    no-op context manager, so instrumented code only pays for a function call. Once
+    enabled, every stage run is recorded in a rolling window of the latest samples,
+    which can be summarized as histograms and exported as JSON.
+    """
+
+    __active: Optional["Instrumentation"] = None
+
+    def __init__(self, window: int = 1024):
+        self.__window = window
+        self.__lock = Lock()
+        self.__samples: Dict[str, Deque[Tuple[float, int]]] = dict()
+        self.__counts: Dict[str, int] = dict()
+
+    # Process wide registry
+
+    @staticmethod
+    def enable(window: int = 1024) -> "Instrumentation":
+        """Start recording stages into a new registry, which is returned"""
+        Instrumentation.__active = Instrumentation(window)
+        return Instrumentation.__active
+
+    @staticmethod
+    def disable():
+        """Stop recording stages"""
+        Instrumentation.__active = None
+
+    @staticmethod
+    def active() -> Optional["Instrumentation"]:
+        """Registry stages are recorded into, None when disabled"""
+        return Instrumentation.__active
+
+    @staticmethod
+    def stage(name: str) -> Union[_Stage, _NullStage]:
+        """Context manager recording the duration of a stage into the registry"""
+        active = Instrumentation.__active
+        if active is None:
+            return _NULL_STAGE
+        return _Stage(active, name)
+
+    # Recording
+
+    def record(self, name: str, milliseconds: float, nbytes: int = 0):
+        """Add a sample to a stage, dropping its oldest one if the window is full"""
+        with self.__lock:
+            samples = self.__samples.get(name)
+            if samples is None:
+                samples = deque(maxlen=self.__window)
+                self.__samples[name] = samples
+                self.__counts[name] = 0
+            samples.append((milliseconds, nbytes))
+            self.__counts[name] += 1
+
+    def reset(self):
+        """Forget every sample"""
+        with self.__lock:
+            self.__samples.clear()
+            self.__counts.clear()
+
+    # Reporting
+
+    def stages(self):
+        """Names of the stages recorded so far"""
+        with self.__lock:
+            return list(self.__samples)
+
+    def last(self) -> Dict[str, Tuple[float, int]]:
+        """Latest (milliseconds, bytes) sample of every stage"""
+        with self.__lock:
+            return {name: samples[-1] for name, samples in self.__samples.items()}
+
+    def summary(self) -> Dict[str, dict]:
+        """Statistics and latency histogram of every stage over its window"""
+        with self.__lock:
+            snapshot = {
+                name: (np.array(samples, dtype=np.float64), self.__counts[name])
+                for name, samples in self.__samples.items()
+            }
+        result = dict()
+        for name, (samples, count) in snapshot.items():
+            milliseconds, nbytes = samples[:, 0], samples[:, 1]
+            counts, _ = np.histogram(milliseconds, bins=HISTOGRAM_EDGES_MS)
+            underflow = milliseconds < HISTOGRAM_EDGES_MS[0]
+            overflow = milliseconds > HISTOGRAM_EDGES_MS[-1]
+            p50, p95, p99 = np.percentile(milliseconds, [50, 95, 99])
+            result[name] = {
+                "count": count,
+                "window": len(samples),
+                "last_ms": milliseconds[-1],
+                "mean_ms": milliseconds.mean(),
+                "p50_ms": p50,
+                "p95_ms": p95,
+                "p99_ms": p99,
+                "max_ms": milliseconds.max(),
+                "last_bytes": int(nbytes[-1]),
+                "mean_bytes": nbytes.mean(),
+                "histogram": {
+                    "edges_ms": HISTOGRAM_EDGES_MS.tolist(),
+                    "counts": counts.tolist(),
+                    "underflow": int(np.count_nonzero(underflow)),
+                    "overflow": int(np.count_nonzero(overflow)),
+                },
+            }
+        return result
+
+    def toJSON(self) -> str:
+        return json.dumps({"stages": self.summary()}, indent=1)
+
+    def export(self, path: Path):
+        """Write the summary of every stage to a JSON file"""
+        with open(path, "w") as f:
+            f.write(self.toJSON())
@@ -0,0 +1,52 @@
+from astropy.io import fits
+from typing import Optional, Tuple
+from .FitsFile import FitsFile
+import numpy as np
+
+
+class LazyHDU:
+    """
+    Proxy to an image HDU inside an opened FITS file
+
+    Only the HDU header is parsed when the proxy is built. Pixel data is read from the
+    file, memory-mapped when possible, the first time it is requested, so it is never
+    read from disk unless a consumer actually touches it.
+    """
+
+    def __init__(self, fitsFile: FitsFile, index: int):
+        self.__fitsFile = fitsFile
+        self.__index = index
+        self.__header = fitsFile.header(index)
+        self.__data: Optional[np.ndarray] = None
+
+    def index(self) -> int:
+        """Position of this HDU in its FITS file"""
+        return self.__index
+
+    def header(self) -> fits.Header:
+        """HDU header, available without loading any pixel data"""
+        return self.__header
+
+    def shape(self) -> Tuple[int, int]:
+        """(rows, cols) of the image as declared by the header"""
+        return self.__header.get("NAXIS2", 0), self.__header.get("NAXIS1", 0)
+
+    def hasImageData(self) -> bool:
+        """Tells whether this HDU holds a 2D image"""
+        return self.__header.get("NAXIS", 0) == 2
+
+    def isLoaded(self) -> bool:
+        """Tells whether pixel data has already been read"""
+        return self.__data is not None
+
+    def data(self) -> np.ndarray:
+        """Pixel data, read on first access"""
+        if self.__data is None:
+            self.__data = self.__fitsFile.data(self.__index)
+        return self.__data
+
+    def release(self):
+        """Drop the pixel data, here and in the FITS file, it is read again on access"""
+        if self.__data is not None:
+            self.__data = None
+            self.__fitsFile.releaseData(self.__index)
@@ -0,0 +1,142 @@
+from typing import Optional, Tuple
+import numpy as np
+
+# Ratio between the standard deviation of a gaussian and its median absolute deviation
+_MAD_TO_SIGMA = 1.4826
+
+
+class MasterFrameBuilder:
+    """
+    Stacks calibration exposures, e.g. bias or dark frames, into a master frame
+
+    Frames are streamed in with add and collected into a chunk buffer sized from the
+    memory budget. Every full chunk is reduced pixel by pixel and folded into running
+    sums, so memory holds one chunk whatever the number of frames stacked:
+
+    - "median": the chunk median, masters being the mean of chunk medians weighted by
+      chunk size.
+    - "sigmaclip": the chunk values within nSigma robust standard deviations of the
+      chunk median, masters being the mean of every value kept. Particle hits and
+      other outliers are rejected while keeping the noise of a mean.
+
+    Every reduction sees at least MIN_FRAMES frames, so outliers are rejected in the
+    last frames too: when the buffer is full the newest MIN_FRAMES - 1 frames are kept
+    for the next chunk rather than reduced, and the last chunk is only shorter when
+    fewer frames were added overall. Chunks are reduced by blocks of rows to bound the
+    temporaries of the reduction to a few BLOCK_BYTES on top of the memory budget.
+    """
+
+    METHODS = ("median", "sigmaclip")
+    # Frames a median or a clip needs to reject anything
+    MIN_FRAMES = 3
+    # Size of the chunk blocks reduced at once, bounds the temporaries of a reduction
+    BLOCK_BYTES = 1 << 20
+
+    def __init__(
+        self,
+        method: str = "sigmaclip",
+        nSigma: float = 3.0,
+        memoryBudget: int = 256 << 20,
+        subtract: Optional[np.ndarray] = None,
+    ):
+        """
+        memoryBudget: Bytes the chunk buffer and running sums may take, frames are
+            buffered as float32 and sums kept as float64.
+        subtract: Frame removed from every exposure before stacking, e.g. the master
+            bias when building a master dark.
+        """
+        if method not in MasterFrameBuilder.METHODS:
+            raise ValueError(f"Unsupported stacking method: {method}")
+        self.__method = method
+        self.__nSigma = nSigma
+        self.__memoryBudget = memoryBudget
+        self.__subtract = subtract
+        self.__chunk: Optional[np.ndarray] = None
+        self.__filled = 0
+        self.__sum: Optional[np.ndarray] = None
+        self.__weight: Optional[np.ndarray] = None
+        self.__count = 0
+
+    def chunkFrames(self) -> int:
+        """Frames the buffer holds, 0 until the first frame"""
+        return 0 if self.__chunk is None else len(self.__chunk)
+
+    def count(self) -> int:
+        """Number of frames added"""
+        return self.__count
+
+    def shape(self) -> Optional[Tuple[int, int]]:
+        """Shape of the frames, None until the first frame"""
+        return None if self.__sum is None else self.__sum.shape
+
+    def __allocate(self, shape: Tuple[int, int]):
+        pixels = shape[0] * shape[1]
+        # Running sum and weight of every pixel
+        sumBytes = 2 * pixels * np.dtype(np.float64).itemsize
+        frames = (self.__memoryBudget - sumBytes) // (
+            pixels * np.dtype(np.float32).itemsize
+        )
+        # Room for a full reduction plus the frames carried over to the next one
+        minFrames = 2 * MasterFrameBuilder.MIN_FRAMES - 1
+        if frames < minFrames:
+            raise ValueError(
+                f"A memory budget of {self.__memoryBudget} bytes cannot hold "
+                f"{minFrames} frames of {shape[0]}x{shape[1]}"
+            )
+        self.__chunk = np.empty((frames, *shape), dtype=np.float32)
+        self.__sum = np.zeros(shape, dtype=np.float64)
+        self.__weight = np.zeros(shape, dtype=np.float64)
+
+    def add(self, frame: np.ndarray):
+        """Stack a frame, reducing the buffered frames once the buffer is full"""
+        if self.__chunk is None:
+            self.__allocate(frame.shape)
+        elif frame.shape != self.__sum.shape:
+            raise ValueError(
+                f"Frame of shape {frame.shape} does not match {self.__sum.shape}"
+            )
+        if self.__filled == len(self.__chunk):
+            carried = MasterFrameBuilder.MIN_FRAMES - 1
+            self.__reduceChunk(self.__filled - carried)
+            self.__chunk[:carried] = self.__chunk[self.__filled - carried :]
+            self.__filled = carried
+        slot = self.__chunk[self.__filled]
+        if self.__subtract is None:
+            np.copyto(slot, frame, casting="unsafe")
+        else:
+            np.subtract(frame, self.__subtract, out=slot, casting="unsafe")
+        self.__filled += 1
+        self.__count += 1
+
+    def __reduceChunk(self, frames: int):
+        """Fold the first frames of the buffer into the running sums"""
+        chunk = self.__chunk[:frames]
+        blockRows = max(1, MasterFrameBuilder.BLOCK_BYTES // chunk[:, 0].nbytes)
+        for start in range(0, chunk.shape[1], blockRows):
+            rows = slice(start, start + blockRows)
+            block = chunk[:, rows]
+            median = np.median(block, axis=0)
+            if self.__method == "median":
+                self.__sum[rows] += len(block) * median
+                self.__weight[rows] += len(block)
+                continue
+            deviation = np.abs(block - median)
+            sigma = _MAD_TO_SIGMA * np.median(deviation, axis=0)
+            keep = deviation <= self.__nSigma * sigma
+            self.__sum[rows] += block.sum(axis=0, dtype=np.float64, where=keep)
+            self.__weight[rows] += keep.sum(axis=0)
+
+    def result(self) -> np.ndarray:
+        """Master frame of every frame added so far, as float32"""
+        if self.__count == 0:
+            raise ValueError("No frame was added")
+        if self.__filled > 0:
+            self.__reduceChunk(self.__filled)
+            self.__filled = 0
+        master = np.divide(
+            self.__sum,
+            self.__weight,
+            out=np.zeros_like(self.__sum),
+            where=self.__weight > 0,
+        )
+        return master.astype(np.float32)
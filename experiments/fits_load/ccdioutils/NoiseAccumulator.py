@@ -0,0 +1,144 @@
+from typing import Optional, Tuple
+from .CaptureStatistics import CaptureStatistics
+from .ClusterExtractor import ClusterExtractor
+from .HotPixelMask import HotPixelMask
+import numpy as np
+
+
+def _outliers(values: np.ndarray, nSigma: float) -> np.ndarray:
+    """Values above median + nSigma * (robust standard deviation) of all values"""
+    median = np.nanmedian(values)
+    sigma = 1.4826 * np.nanmedian(np.abs(values - median))
+    return values > median + nSigma * sigma
+
+
+class NoiseAccumulator:
+    """
+    Per-pixel noise maps accumulated over a stream of captures
+
+    Every frame updates the running mean and variance of each pixel with Welford's
+    algorithm, applied to the whole frame at once. Values above the hit threshold are
+    counted as hits instead, so particles crossing a pixel now and then do not inflate
+    its noise, each pixel keeping its own sample count. An update costs the same
+    whatever the number of frames seen and, past the first frame, allocates no frame
+    sized buffer, so accumulation can run next to the live pipeline. Hot pixels are
+    derived from the maps with hotPixelMask.
+    """
+
+    def __init__(self, threshold: Optional[float] = None, nSigma: float = 5.0):
+        """
+        threshold: Pixel value above which a pixel counts as hit. When None it is
+            estimated per frame like ClusterExtractor does.
+        """
+        self.__extractor = ClusterExtractor(threshold, nSigma)
+        self.__count = 0
+        # Frames each pixel was below the hit threshold in
+        self.__samples: Optional[np.ndarray] = None
+        self.__mean: Optional[np.ndarray] = None
+        self.__m2: Optional[np.ndarray] = None
+        # Buffers reused by every update
+        self.__delta: Optional[np.ndarray] = None
+        self.__scratch: Optional[np.ndarray] = None
+        self.__kept: Optional[np.ndarray] = None
+
+    def __allocate(self, shape: Tuple[int, int]):
+        self.__samples = np.zeros(shape, dtype=np.uint32)
+        self.__mean = np.zeros(shape, dtype=np.float64)
+        self.__m2 = np.zeros(shape, dtype=np.float64)
+        self.__delta = np.empty(shape, dtype=np.float64)
+        self.__scratch = np.empty(shape, dtype=np.float64)
+        self.__kept = np.empty(shape, dtype=bool)
+
+    def count(self) -> int:
+        """Number of frames accumulated"""
+        return self.__count
+
+    def shape(self) -> Optional[Tuple[int, int]]:
+        """Shape of the frames, None until the first frame"""
+        return None if self.__mean is None else self.__mean.shape
+
+    def add(self, frame: np.ndarray, statistics: Optional[CaptureStatistics] = None):
+        """Accumulate a frame, statistics are used to estimate its hit threshold"""
+        if self.__mean is None:
+            self.__allocate(frame.shape)
+        elif frame.shape != self.__mean.shape:
+            raise ValueError(
+                f"Frame of shape {frame.shape} does not match {self.__mean.shape}"
+            )
+        self.__count += 1
+        delta, scratch, kept = self.__delta, self.__scratch, self.__kept
+        np.less_equal(frame, self.__extractor.threshold(frame, statistics), out=kept)
+        self.__samples += kept
+        # mean += (x - mean) / n, then m2 += (x - old mean) * (x - new mean), hits
+        # get a null delta which leaves both untouched
+        np.subtract(frame, self.__mean, out=delta)
+        delta *= kept
+        np.maximum(self.__samples, 1, out=scratch)
+        np.divide(delta, scratch, out=scratch)
+        self.__mean += scratch
+        np.subtract(frame, self.__mean, out=scratch)
+        scratch *= delta
+        self.__m2 += scratch
+
+    def merge(self, other: "NoiseAccumulator"):
+        """Fold the frames accumulated by other, e.g. on another process, into this"""
+        if other.__count == 0:
+            return
+        if self.__count == 0:
+            self.__allocate(other.__mean.shape)
+        elif other.__mean.shape != self.__mean.shape:
+            raise ValueError(
+                f"Frames of shape {other.__mean.shape} do not match {self.__mean.shape}"
+            )
+        samples = self.__samples + other.__samples
+        weight = other.__samples / np.maximum(samples, 1)
+        delta = other.__mean - self.__mean
+        self.__m2 += other.__m2 + delta**2 * self.__samples * weight
+        self.__mean += delta * weight
+        self.__samples = samples
+        self.__count += other.__count
+
+    def mean(self) -> np.ndarray:
+        """Mean value of every pixel, hits excluded"""
+        self.__checkCount(1)
+        return self.__mean.copy()
+
+    def variance(self) -> np.ndarray:
+        """Sample variance of every pixel, hits excluded, NaN below 2 samples"""
+        self.__checkCount(1)
+        return np.divide(
+            self.__m2,
+            self.__samples.astype(np.float64) - 1,
+            out=np.full(self.__m2.shape, np.nan),
+            where=self.__samples > 1,
+        )
+
+    def std(self) -> np.ndarray:
+        """Sample standard deviation of every pixel, hits excluded"""
+        return np.sqrt(self.variance())
+
+    def hitFrequency(self) -> np.ndarray:
+        """Fraction of the frames each pixel was hit in"""
+        self.__checkCount(1)
+        return (self.__count - self.__samples) / self.__count
+
+    def hotPixelMask(
+        self, nSigma: float = 5.0, maxHitFrequency: float = 0.1, value: float = 0.0
+    ) -> HotPixelMask:
+        """
+        Mask of the pixels that are hot, noisy or hit too often
+
+        A pixel is hot or noisy when its mean or its standard deviation is more than
+        nSigma robust standard deviations above the median over all pixels. Particles
+        seldom hit the same pixel, so pixels hit in more than maxHitFrequency of the
+        frames are masked as well, which catches pixels always above the threshold.
+        """
+        self.__checkCount(2)
+        mask = _outliers(self.__mean, nSigma)
+        mask |= _outliers(self.std(), nSigma)
+        mask |= self.hitFrequency() > maxHitFrequency
+        return HotPixelMask(mask, value)
+
+    def __checkCount(self, frames: int):
+        if self.__count < frames:
+            raise ValueError(f"At least {frames} frames are needed, got {self.__count}")
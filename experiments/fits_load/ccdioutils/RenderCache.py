@@ -0,0 +1,104 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Hashable, Optional
+
+
+def _qtImageBytes(image) -> int:
+    """Memory held by a QPixmap or QImage"""
+    return image.width() * image.height() * image.depth() // 8
+
+
+class RenderCache:
+    """
+    Least recently used cache of rendered captures bounded by memory
+
+    Entries are evicted, least recently used first, as soon as the memory they hold
+    goes over the byte budget. A single cache is meant to be shared by every view
+    model of an application so the budget covers all of them.
+    """
+
+    def __init__(
+        self,
+        maxBytes: int = 256 * 2**20,
+        sizeOf: Callable[[Any], int] = _qtImageBytes,
+    ):
+        self.__maxBytes = maxBytes
+        self.__sizeOf = sizeOf
+        self.__entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.__sizes = dict()
+        self.__currentBytes = 0
+        self.__hits = 0
+        self.__misses = 0
+        self.__lock = Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Cached value for key, None on a miss"""
+        with self.__lock:
+            value = self.__entries.get(key)
+            if value is None:
+                self.__misses += 1
+                return None
+            self.__hits += 1
+            self.__entries.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        """Store a value, evicting least recently used entries to fit the budget"""
+        size = self.__sizeOf(value)
+        with self.__lock:
+            if key in self.__entries:
+                self.__remove(key)
+            if size > self.__maxBytes:
+                return
+            self.__entries[key] = value
+            self.__sizes[key] = size
+            self.__currentBytes += size
+            self.__evict()
+
+    def getOrRender(self, key: Hashable, render: Callable[[], Any]) -> Any:
+        """Cached value for key, rendering and storing it on a miss"""
+        value = self.get(key)
+        if value is None:
+            value = render()
+            self.put(key, value)
+        return value
+
+    def __remove(self, key: Hashable):
+        del self.__entries[key]
+        self.__currentBytes -= self.__sizes.pop(key)
+
+    def __evict(self):
+        while self.__currentBytes > self.__maxBytes:
+            self.__remove(next(iter(self.__entries)))
+
+    def clear(self):
+        """Drop every entry, counters are kept"""
+        with self.__lock:
+            self.__entries.clear()
+            self.__sizes.clear()
+            self.__currentBytes = 0
+
+    def setMaxBytes(self, maxBytes: int):
+        """Change the memory budget, evicting entries if needed"""
+        with self.__lock:
+            self.__maxBytes = maxBytes
+            self.__evict()
+
+    def maxBytes(self) -> int:
+        """Memory budget in bytes"""
+        return self.__maxBytes
+
+    def currentBytes(self) -> int:
+        """Memory held by cached entries in bytes"""
+        return self.__currentBytes
+
+    def hits(self) -> int:
+        """Number of lookups that found their entry"""
+        return self.__hits
+
+    def misses(self) -> int:
+        """Number of lookups that did not find their entry"""
+        return self.__misses
+
+    def __len__(self) -> int:
+        return len(self.__entries)
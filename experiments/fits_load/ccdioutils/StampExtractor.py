@@ -0,0 +1,115 @@
+from typing import Optional, Tuple
+from .ClusterCatalog import ClusterCatalog
+import numpy as np
+
+
+class StampExtractor:
+    """
+    Cuts fixed size postage stamps around every cluster of a capture
+
+    Stamps of all clusters are gathered at once into a single contiguous (N, height,
+    width) array, ready to be fed to a classifier: the capture is seen through a
+    zero-copy view of all its height x width windows, which is indexed with the top
+    left corners of BLOCK_STAMPS stamps at a time, there is no per-cluster slicing.
+    The few stamps reaching past the capture edges are gathered separately and padded.
+
+    A stamp is centered on the middle of the cluster bounding box, or on its peak
+    pixel with recenter=True. With an even size the center is the pixel right after
+    the middle, e.g. row 5 of a 10 rows stamp.
+    """
+
+    # Stamps gathered per window indexing, bounds the scratch memory it allocates
+    BLOCK_STAMPS = 256
+
+    def __init__(
+        self,
+        shape: Tuple[int, int] = (10, 10),
+        recenter: bool = False,
+        padValue: float = 0.0,
+        dtype: np.dtype = np.float32,
+    ):
+        self.__shape = shape
+        self.__recenter = recenter
+        self.__padValue = padValue
+        self.__dtype = np.dtype(dtype)
+
+    def shape(self) -> Tuple[int, int]:
+        """(height, width) of the stamps"""
+        return self.__shape
+
+    def allocate(self, count: int) -> np.ndarray:
+        """Buffer able to hold count stamps, to be reused across captures"""
+        return np.empty((count, *self.__shape), dtype=self.__dtype)
+
+    def centers(self, catalog: ClusterCatalog) -> Tuple[np.ndarray, np.ndarray]:
+        """(rows, cols) every stamp is centered on, in capture coordinates"""
+        if self.__recenter:
+            return catalog.peakRow, catalog.peakCol
+        return (catalog.top + catalog.bottom) // 2, (catalog.left + catalog.right) // 2
+
+    def extract(
+        self,
+        matrix: np.ndarray,
+        catalog: ClusterCatalog,
+        origin: Tuple[int, int] = (0, 0),
+        out: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        Stamps of every cluster of catalog, row i being the stamp of cluster i
+
+        origin: (row, col) of matrix within the capture, when matrix is a crop, as
+            catalog positions are in capture coordinates.
+        out: Buffer with room for at least len(catalog) stamps, as returned by
+            allocate. The stamps are written to its first rows and a view over them
+            is returned. Only a scratch of BLOCK_STAMPS stamps, and the stamps
+            crossing the capture edges, are allocated whatever the number of clusters.
+        """
+        count = len(catalog)
+        if out is None:
+            out = self.allocate(count)
+        elif len(out) < count or out.shape[1:] != self.__shape:
+            raise ValueError(f"Buffer of shape {out.shape} cannot hold {count} stamps")
+        stamps = out[:count]
+        if count == 0:
+            return stamps
+
+        height, width = self.__shape
+        centerRows, centerCols = self.centers(catalog)
+        tops = np.asarray(centerRows - origin[0] - height // 2, dtype=np.intp)
+        lefts = np.asarray(centerCols - origin[1] - width // 2, dtype=np.intp)
+        matrixRows, matrixCols = matrix.shape
+        inside = (
+            (tops >= 0)
+            & (tops <= matrixRows - height)
+            & (lefts >= 0)
+            & (lefts <= matrixCols - width)
+        )
+
+        if inside.any():
+            # Every stamp is a window of this view, gathering them copies each stamp
+            # row as a contiguous run instead of pixel by pixel
+            windows = np.lib.stride_tricks.sliding_window_view(matrix, self.__shape)
+            if inside.all():
+                for start in range(0, count, self.BLOCK_STAMPS):
+                    block = slice(start, start + self.BLOCK_STAMPS)
+                    stamps[block] = windows[tops[block], lefts[block]]
+                return stamps
+            indices = np.flatnonzero(inside)
+            for start in range(0, len(indices), self.BLOCK_STAMPS):
+                block = indices[start : start + self.BLOCK_STAMPS]
+                stamps[block] = windows[tops[block], lefts[block]]
+
+        # Stamps crossing an edge gather clipped indices, then mask what lies outside
+        edge = ~inside
+        rows = tops[edge][:, None] + np.arange(height)
+        cols = lefts[edge][:, None] + np.arange(width)
+        outside = ~(
+            ((rows >= 0) & (rows < matrixRows))[:, :, None]
+            & ((cols >= 0) & (cols < matrixCols))[:, None, :]
+        )
+        np.clip(rows, 0, matrixRows - 1, out=rows)
+        np.clip(cols, 0, matrixCols - 1, out=cols)
+        padded = matrix[rows[:, :, None], cols[:, None, :]].astype(self.__dtype)
+        padded[outside] = self.__padValue
+        stamps[edge] = padded
+        return stamps
@@ -0,0 +1,168 @@
+from collections import OrderedDict
+from typing import Optional, Tuple, Union
+from PySide6 import QtWidgets, QtCore, QtGui
+from .CCDPyramid import CCDPyramid
+from .Fits2QPixmapConverter import FastPixmapConverter, colormapLUT
+from .Instrumentation import Instrumentation
+import matplotlib.colors as colors
+import numpy as np
+
+
+class TiledCCDView(QtWidgets.QAbstractScrollArea):
+    """
+    Zoomable view rendering a CCD capture tile by tile
+
+    The capture is kept as a CCDPyramid and only the tiles of the pyramid level
+    matching the current zoom that intersect the viewport are converted and painted.
+    Converted tiles are kept in a bounded cache. Ctrl + mouse wheel zooms around the
+    cursor, scrolling pans.
+    """
+
+    mouseMoved = QtCore.Signal(int, int)
+
+    # Maximum number of converted tiles kept around
+    MAX_CACHED_TILES = 512
+    MIN_ZOOM = 1 / 64
+    MAX_ZOOM = 32
+
+    def __init__(self, tileSize: int = 256, parent=None):
+        super().__init__(parent)
+        self.__tileSize = tileSize
+        self.__pyramid: Optional[CCDPyramid] = None
+        self.__zoom = 1.0
+        self.__colormap: Union[str, colors.Colormap] = "Greys_r"
+        self.__displayRange: Tuple[float, float] = (0, 1)
+        self.__tiles: "OrderedDict[Tuple[int, int, int], QtGui.QImage]" = OrderedDict()
+        self.viewport().setMouseTracking(True)
+        self.viewport().setCursor(QtCore.Qt.CursorShape.CrossCursor)
+
+    # Public interface
+
+    def setData(self, matrix: np.ndarray):
+        """Display a new capture matrix, dropping every converted tile"""
+        self.__pyramid = CCDPyramid(matrix, self.__tileSize)
+        self.__tiles.clear()
+        self.__updateScrollBars()
+        self.viewport().update()
+
+    def setDisplay(
+        self, colormap: Union[str, colors.Colormap], displayRange: Tuple[float, float]
+    ):
+        """Change colormap and display window without touching the data"""
+        self.__colormap = colormap
+        self.__displayRange = displayRange
+        self.__tiles.clear()
+        self.viewport().update()
+
+    def zoom(self) -> float:
+        """Screen pixels per capture pixel"""
+        return self.__zoom
+
+    def setZoom(self, zoom: float, anchor: Optional[QtCore.QPointF] = None):
+        """Change zoom keeping the capture point under anchor (viewport center) fixed"""
+        if anchor is None:
+            anchor = QtCore.QPointF(self.viewport().rect().center())
+        hbar, vbar = self.horizontalScrollBar(), self.verticalScrollBar()
+        pointX = (anchor.x() + hbar.value()) / self.__zoom
+        pointY = (anchor.y() + vbar.value()) / self.__zoom
+        self.__zoom = min(max(zoom, TiledCCDView.MIN_ZOOM), TiledCCDView.MAX_ZOOM)
+        self.__updateScrollBars()
+        hbar.setValue(int(pointX * self.__zoom - anchor.x()))
+        vbar.setValue(int(pointY * self.__zoom - anchor.y()))
+        self.viewport().update()
+
+    def cachedTileCount(self) -> int:
+        """Number of converted tiles currently held"""
+        return len(self.__tiles)
+
+    # Rendering
+
+    def __updateScrollBars(self):
+        if self.__pyramid is None:
+            return
+        rows, cols = self.__pyramid.level(0).shape
+        viewportSize = self.viewport().size()
+        hbar, vbar = self.horizontalScrollBar(), self.verticalScrollBar()
+        hbar.setRange(0, max(0, int(cols * self.__zoom) - viewportSize.width()))
+        hbar.setPageStep(viewportSize.width())
+        vbar.setRange(0, max(0, int(rows * self.__zoom) - viewportSize.height()))
+        vbar.setPageStep(viewportSize.height())
+
+    def __tileImage(self, level: int, tileRow: int, tileCol: int) -> QtGui.QImage:
+        key = (level, tileRow, tileCol)
+        image = self.__tiles.get(key)
+        if image is not None:
+            self.__tiles.move_to_end(key)
+            return image
+        with Instrumentation.stage("convert") as stage:
+            tile = self.__pyramid.tile(level, tileRow, tileCol)
+            indices = FastPixmapConverter.toIndices(tile, *self.__displayRange)
+            argb = colormapLUT(self.__colormap).take(indices)
+            height, width = argb.shape
+            image = QtGui.QImage(
+                argb.data, width, height, argb.strides[0], QtGui.QImage.Format_ARGB32
+            ).copy()
+            stage.setBytes(image.sizeInBytes())
+        self.__tiles[key] = image
+        while len(self.__tiles) > TiledCCDView.MAX_CACHED_TILES:
+            self.__tiles.popitem(last=False)
+        return image
+
+    def paintEvent(self, event: QtGui.QPaintEvent):
+        if self.__pyramid is None:
+            return
+        with Instrumentation.stage("paint"):
+            self.__paintTiles(event)
+
+    def __paintTiles(self, event: QtGui.QPaintEvent):
+        level = self.__pyramid.levelForZoom(self.__zoom)
+        # Screen pixels per pixel of the selected level
+        scale = self.__zoom * 2**level
+        tileExtent = self.__tileSize * scale
+        offsetX = self.horizontalScrollBar().value()
+        offsetY = self.verticalScrollBar().value()
+        rect = event.rect()
+        tileRows, tileCols = self.__pyramid.tileGrid(level)
+        firstRow = max(0, int((offsetY + rect.top()) // tileExtent))
+        lastRow = min(tileRows - 1, int((offsetY + rect.bottom()) // tileExtent))
+        firstCol = max(0, int((offsetX + rect.left()) // tileExtent))
+        lastCol = min(tileCols - 1, int((offsetX + rect.right()) // tileExtent))
+
+        painter = QtGui.QPainter(self.viewport())
+        for tileRow in range(firstRow, lastRow + 1):
+            for tileCol in range(firstCol, lastCol + 1):
+                image = self.__tileImage(level, tileRow, tileCol)
+                target = QtCore.QRectF(
+                    tileCol * tileExtent - offsetX,
+                    tileRow * tileExtent - offsetY,
+                    image.width() * scale,
+                    image.height() * scale,
+                )
+                painter.drawImage(target, image)
+        painter.end()
+
+    # Events
+
+    def resizeEvent(self, event: QtGui.QResizeEvent):
+        super().resizeEvent(event)
+        self.__updateScrollBars()
+
+    def scrollContentsBy(self, dx: int, dy: int):
+        self.viewport().update()
+
+    def wheelEvent(self, event: QtGui.QWheelEvent):
+        if not event.modifiers() & QtCore.Qt.KeyboardModifier.ControlModifier:
+            super().wheelEvent(event)
+            return
+        factor = 1.25 ** (event.angleDelta().y() / 120)
+        self.setZoom(self.__zoom * factor, event.position())
+
+    def mouseMoveEvent(self, event: QtGui.QMouseEvent):
+        if self.__pyramid is not None:
+            rows, cols = self.__pyramid.level(0).shape
+            position = event.position()
+            col = int((position.x() + self.horizontalScrollBar().value()) / self.__zoom)
+            row = int((position.y() + self.verticalScrollBar().value()) / self.__zoom)
+            if 0 <= row < rows and 0 <= col < cols:
+                self.mouseMoved.emit(col, row)
+        super().mouseMoveEvent(event)
@@ -1,14 +1,42 @@
 import numpy as np
 from abc import ABC, abstractmethod
+from typing import Hashable, Iterable, List, Optional
 
 
 class UniformVizFilter(ABC):
     """A filter that is to be applied uniformly to all pixels in the capture"""
 
+    # Whether the filter maps each pixel independently of its neighbours, which
+    # allows applying it to any block of the matrix
+    isElementwise = False
+
     @abstractmethod
     def filter(self, matrix: np.matrix) -> np.matrix:
         return matrix
 
+    def filterInPlace(self, matrix: np.ndarray) -> np.ndarray:
+        """
+        Apply the filter overwriting matrix
+
+        matrix must already have the dtype given by resultType. Filters should override
+        this to avoid allocating a full result.
+        """
+        matrix[...] = self.filter(matrix)
+        return matrix
+
+    def resultType(self, dtype: np.dtype) -> np.dtype:
+        """Data type of the filtered matrix given the input data type"""
+        return np.dtype(dtype)
+
+    def cacheKey(self) -> Optional[Hashable]:
+        """
+        Value identifying what this filter does, used to cache filtered renders
+
+        Two filters with equal keys must produce the same output. None, the default,
+        means results of this filter can't be cached.
+        """
+        return None
+
 
 class PerPixelFilter(ABC):
     """A filter that is to be applied to a single pixel value at a specified location"""
@@ -31,25 +59,48 @@ class UniformFilter:
     class ScalarMultiply(UniformVizFilter):
         """Dot product filter, applies to all values in the matrix at once"""
 
+        isElementwise = True
+
         def __init__(self, factor: float):
             self.__factor = factor
 
         def filter(self, omatrix: np.matrix) -> np.matrix:
-            matrix = omatrix.copy()
-            return self.__factor * matrix
+            return self.__factor * omatrix
+
+        def cacheKey(self) -> Optional[Hashable]:
+            return ("ScalarMultiply", self.__factor)
+
+        def filterInPlace(self, matrix: np.ndarray) -> np.ndarray:
+            return np.multiply(matrix, self.__factor, out=matrix)
+
+        def resultType(self, dtype: np.dtype) -> np.dtype:
+            return np.result_type(dtype, self.__factor)
 
     class Add(UniformVizFilter):
         """Additive filter, adds a value to all pixels"""
 
+        isElementwise = True
+
         def __init__(self, value: float):
             self.__value = value
 
         def filter(self, matrix: np.matrix) -> np.matrix:
             return self.__value + matrix
 
+        def cacheKey(self) -> Optional[Hashable]:
+            return ("Add", self.__value)
+
+        def filterInPlace(self, matrix: np.ndarray) -> np.ndarray:
+            return np.add(matrix, self.__value, out=matrix)
+
+        def resultType(self, dtype: np.dtype) -> np.dtype:
+            return np.result_type(dtype, self.__value)
+
     class SubstituteInRange(UniformVizFilter):
         """Substitutes values in a range by a given value"""
 
+        isElementwise = True
+
         def __init__(self, start: float, end: float, value: float):
             self.__value = value
             self.__start = start
@@ -57,12 +108,22 @@ class UniformFilter:
 
         def filter(self, omatrix: np.matrix) -> np.matrix:
             matrix = omatrix.copy()
-            matrix[(matrix >= self.__start) & (matrix <= self.__end)] = self.__value
+            return self.filterInPlace(matrix)
+
+        def filterInPlace(self, matrix: np.ndarray) -> np.ndarray:
+            mask = matrix >= self.__start
+            mask &= matrix <= self.__end
+            np.putmask(matrix, mask, self.__value)
             return matrix
 
+        def cacheKey(self) -> Optional[Hashable]:
+            return ("SubstituteInRange", self.__start, self.__end, self.__value)
+
     class SubstituteOutOfRange(UniformVizFilter):
         """Substitutes values out of a range by a given value"""
 
+        isElementwise = True
+
         def __init__(self, start: float, end: float, value: float):
             self.__value = value
             self.__start = start
@@ -70,5 +131,127 @@ class UniformFilter:
 
         def filter(self, omatrix: np.matrix) -> np.matrix:
             matrix = omatrix.copy()
-            matrix[(matrix < self.__start) | (matrix > self.__end)] = self.__value
+            return self.filterInPlace(matrix)
+
+        def filterInPlace(self, matrix: np.ndarray) -> np.ndarray:
+            mask = matrix < self.__start
+            mask |= matrix > self.__end
+            np.putmask(matrix, mask, self.__value)
             return matrix
+
+        def cacheKey(self) -> Optional[Hashable]:
+            return ("SubstituteOutOfRange", self.__start, self.__end, self.__value)
+
+
+class FilterPipeline(UniformVizFilter):
+    """
+    Applies a chain of UniformVizFilter as a single filter
+
+    The input is copied once into the output buffer and every filter then runs in
+    place on it. Runs of elementwise filters are applied block by block, so each block
+    is filtered by the whole run while it is still in cache and the frame is traversed
+    once instead of once per filter. Unless an explicit output is given, results are
+    written to a scratch buffer owned by the pipeline and reused across calls.
+    """
+
+    # Size of the blocks elementwise filters are applied on, sized to fit in L2 cache
+    BLOCK_BYTES = 1 << 18
+
+    def __init__(self, filters: Iterable[UniformVizFilter] = ()):
+        self.__filters: List[UniformVizFilter] = list(filters)
+        self.__scratch: Optional[np.ndarray] = None
+
+    @property
+    def isElementwise(self) -> bool:
+        return all(f.isElementwise for f in self.__filters)
+
+    def append(self, filter: UniformVizFilter):
+        """Add a filter at the end of the chain"""
+        self.__filters.append(filter)
+
+    def clear(self):
+        """Remove every filter in the chain"""
+        self.__filters.clear()
+
+    def filters(self) -> List[UniformVizFilter]:
+        """Filters in the chain, in application order"""
+        return list(self.__filters)
+
+    def __len__(self) -> int:
+        return len(self.__filters)
+
+    def releaseScratch(self):
+        """Drop the reusable scratch buffer"""
+        self.__scratch = None
+
+    def resultType(self, dtype: np.dtype) -> np.dtype:
+        dtype = np.dtype(dtype)
+        for f in self.__filters:
+            dtype = f.resultType(dtype)
+        return dtype
+
+    def __scratchFor(self, shape, dtype: np.dtype) -> np.ndarray:
+        scratch = self.__scratch
+        if scratch is None or scratch.shape != shape or scratch.dtype != dtype:
+            scratch = np.empty(shape, dtype=dtype)
+            self.__scratch = scratch
+        return scratch
+
+    def __runs(self) -> List[List[UniformVizFilter]]:
+        """Split the chain into runs of elementwise filters and single other filters"""
+        runs: List[List[UniformVizFilter]] = list()
+        for f in self.__filters:
+            if f.isElementwise and len(runs) > 0 and runs[-1][0].isElementwise:
+                runs[-1].append(f)
+            else:
+                runs.append([f])
+        return runs
+
+    def apply(self, matrix: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Filter matrix into out
+
+        out may be matrix itself to filter in place, it must have the shape of matrix
+        and the dtype given by resultType. When omitted the pipeline scratch buffer is
+        used, which is overwritten by the next call.
+        """
+        matrix = np.asarray(matrix)
+        if out is None:
+            out = self.__scratchFor(matrix.shape, self.resultType(matrix.dtype))
+        copied = out is matrix
+        for run in self.__runs():
+            if not run[0].isElementwise:
+                if not copied:
+                    np.copyto(out, matrix, casting="unsafe")
+                    copied = True
+                run[0].filterInPlace(out)
+                continue
+            rowBytes = max(1, out[:1].nbytes)
+            blockRows = max(1, self.BLOCK_BYTES // rowBytes)
+            for start in range(0, out.shape[0], blockRows):
+                block = out[start : start + blockRows]
+                if not copied:
+                    np.copyto(
+                        block, matrix[start : start + blockRows], casting="unsafe"
+                    )
+                for f in run:
+                    f.filterInPlace(block)
+            copied = True
+        if not copied:
+            np.copyto(out, matrix, casting="unsafe")
+        return out
+
+    def filter(self, matrix: np.matrix) -> np.matrix:
+        matrix = np.asarray(matrix)
+        return self.apply(
+            matrix, out=np.empty(matrix.shape, dtype=self.resultType(matrix.dtype))
+        )
+
+    def filterInPlace(self, matrix: np.ndarray) -> np.ndarray:
+        return self.apply(matrix, out=matrix)
+
+    def cacheKey(self) -> Optional[Hashable]:
+        keys = tuple(f.cacheKey() for f in self.__filters)
+        if any(key is None for key in keys):
+            return None
+        return ("FilterPipeline",) + keys
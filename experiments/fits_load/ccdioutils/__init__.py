@@ -2,15 +2,84 @@
 # pylint: disable=unused-import
 # pyright: reportUnusedImport=false
 
+import importlib
+import sys
+import types
+
 from .CCDCaptureModel import CCDCaptureModel
-from .CCDCaptureViewModel import CCDCaptureViewModel
-from .CCDCaptureWidget import CCDCaptureWidget
+from .CaptureStatistics import CaptureStatistics
+from .FitsFile import FitsFile
+from .LazyHDU import LazyHDU
+from .DataLoader import DataLoader
+from .CCDPyramid import CCDPyramid
 from .BoundingBox import BoundingBox
+from .ClusterExtractor import ClusterExtractor
+from .ClusterFeatures import ClusterFeatures
+from .ClusterCatalog import ClusterCatalog
+from .StampExtractor import StampExtractor
+from .EventIndex import EventIndex
 from .VizFilter import UniformVizFilter
 from .VizFilter import PerPixelFilter
 from .VizFilter import PerValueFilter
 from .VizFilter import UniformFilter
-from .Fits2QPixmapConverter import Fits2QPixmapConverter
-from .Fits2QPixmapConverter import MatplotlibBasedConverter
-from .Fits2QPixmapConverter import RawPixmapConverter
-from .Fits2QPixmapConverter import FastPixmapConverter
+from .VizFilter import FilterPipeline
+from .FrameFilter import FrameFilter
+from .CalibrationFilter import CalibrationFilter
+from .MasterFrameBuilder import MasterFrameBuilder
+from .HotPixelMask import HotPixelMask
+from .HDUFilters import HDUFilters
+from .NoiseAccumulator import NoiseAccumulator
+from .RenderCache import RenderCache
+from .Instrumentation import Instrumentation
+from .ClassifierModel import ClassifierModel
+from .ClassifierModel import LinearStampClassifier
+from .ClassificationService import ClassificationService
+
+# Members depending on PySide6 or matplotlib, by module. They are imported on first
+# access so headless code, e.g. batch processing, never loads the GUI stack.
+_GUI_MEMBERS = {
+    "CCDCaptureViewModel": ["CCDCaptureViewModel"],
+    "CCDCaptureWidget": ["CCDCaptureWidget"],
+    "TiledCCDView": ["TiledCCDView"],
+    "Fits2QPixmapConverter": [
+        "Fits2QPixmapConverter",
+        "MatplotlibBasedConverter",
+        "RawPixmapConverter",
+        "FastPixmapConverter",
+    ],
+    "AsyncRenderer": ["AsyncRenderer"],
+}
+_GUI_NAMES = {member for members in _GUI_MEMBERS.values() for member in members}
+
+
+class _Package(types.ModuleType):
+    """
+    Keeps GUI members resolving to their classes
+
+    Importing a submodule binds it on its package under its own name, which would
+    shadow the class of the same name until the GUI layer is loaded, e.g. after
+    `import ccdioutils.CCDCaptureWidget`. Such bindings are dropped so the name keeps
+    going through __getattr__.
+    """
+
+    def __setattr__(self, name, value):
+        if name in _GUI_NAMES and isinstance(value, types.ModuleType):
+            return
+        super().__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _Package
+
+
+def __getattr__(name):
+    if name not in _GUI_NAMES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    for module, members in _GUI_MEMBERS.items():
+        imported = importlib.import_module(f".{module}", __name__)
+        for member in members:
+            globals()[member] = getattr(imported, member)
+    return globals()[name]
+
+
+def __dir__():
+    return sorted(set(globals()) | _GUI_NAMES)
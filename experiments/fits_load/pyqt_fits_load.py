@@ -1,3 +1,5 @@
+from bisect import bisect
+from concurrent.futures import Future, ThreadPoolExecutor
 from matplotlib import colormaps
 from ccdioutils import (
     CCDCaptureModel,
@@ -5,11 +7,20 @@ from ccdioutils import (
     CCDCaptureWidget,
     MatplotlibBasedConverter,
     FastPixmapConverter,
+    HDUFilters,
+    Instrumentation,
+    RenderCache,
+    UniformFilter,
 )
-from PySide6 import QtWidgets, QtCore
+from PySide6 import QtWidgets, QtCore, QtGui
 from sys import argv, stderr
 from pathlib import Path
+from typing import Optional
 import argparse
+import os
+import traceback
+
+kevFactor = 1.02857e-5
 
 
 def getOptions():
@@ -26,6 +37,46 @@ def getOptions():
         help="Choose a FITS to pixmap converter",
     )
 
+    parser.add_argument(
+        "-t",
+        "--tiled",
+        action="store_true",
+        help="Render captures as zoomable tiles (Ctrl + wheel to zoom)",
+    )
+
+    parser.add_argument(
+        "--render-cache-mb",
+        type=int,
+        default=256,
+        help="Memory budget for rendered captures, in MiB",
+    )
+
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count(),
+        help="Number of HDUs prepared in parallel",
+    )
+
+    parser.add_argument(
+        "--instrument",
+        metavar="FILE",
+        help="Overlay per-stage timings and write their summary to FILE on exit",
+    )
+
+    parser.add_argument(
+        "--calibration",
+        metavar="FILE",
+        help="Subtract master bias and dark frames built by ccd_calibrate",
+    )
+
+    parser.add_argument(
+        "--hot-pixels",
+        metavar="FILE",
+        help="Zero hot pixels masked by ccd_noise, after calibration",
+    )
+
     parser.add_argument(
         "file",
         help="Path to the FITS file",
@@ -34,12 +85,103 @@ def getOptions():
     return parser.parse_args(args=argv[1::])
 
 
+class PreparedHDU:
+    """An HDU made ready for display off the GUI thread"""
+
+    def __init__(
+        self,
+        index: int,
+        viewModel: CCDCaptureViewModel,
+        clusterCount: int,
+        renderKey=None,
+        image: Optional[QtGui.QImage] = None,
+    ):
+        self.index = index
+        self.viewModel = viewModel
+        self.clusterCount = clusterCount
+        self.renderKey = renderKey
+        self.image = image
+
+
+class HDUPreparer(QtCore.QObject):
+    """
+    Prepares HDUs for display on a pool of worker threads
+
+    Unit conversion, statistics, clustering and the first render of every HDU run in
+    parallel. Each HDU is handed back to the GUI thread through prepared as soon as
+    it is ready, so HDUs show up in completion order rather than file order.
+    """
+
+    prepared = QtCore.Signal(object)
+
+    def __init__(self, options, renderCache: RenderCache, parent=None):
+        super().__init__(parent)
+        self.__options = options
+        self.__renderCache = renderCache
+        self.__executor = ThreadPoolExecutor(max_workers=options.jobs)
+        # Filters of every HDU applied before conversion to keV
+        self.__hduFilters = HDUFilters.load(options.calibration, options.hot_pixels)
+
+    def submit(self, index: int, capture: CCDCaptureModel):
+        """Queue an HDU, prepared emits it once ready"""
+        future = self.__executor.submit(self.__prepare, index, capture)
+        future.add_done_callback(self.__onPrepared)
+
+    def shutdown(self):
+        """Drop HDUs that did not start and wait for the running ones"""
+        self.__executor.shutdown(cancel_futures=True)
+
+    def __prepare(self, index: int, capture: CCDCaptureModel) -> PreparedHDU:
+        """Runs on a worker thread, pixel data is first read here"""
+        self.__hduFilters.apply(capture, index)
+        capture.applyFilter(UniformFilter.ScalarMultiply(kevFactor))
+        if self.__options.converter == "matplotlib":
+            converter = MatplotlibBasedConverter(colormap=colormaps["Greys"])
+        else:
+            converter = FastPixmapConverter()
+        viewModel = CCDCaptureViewModel(
+            capture,
+            converter,
+            renderCache=self.__renderCache,
+            defaultPercentileRange=(1, 99.5),
+        )
+        result = PreparedHDU(index, viewModel, len(viewModel.extractClusters()))
+        if not self.__options.tiled and viewModel.supportsBackgroundRendering():
+            result.renderKey, job = viewModel.getQImageRenderJob()
+            result.image = job()
+        return result
+
+    def __onPrepared(self, future: Future):
+        if future.cancelled():
+            return
+        try:
+            self.prepared.emit(future.result())
+        except Exception:
+            traceback.print_exc()
+
+
 class FitsLoadMainWindow(QtWidgets.QMainWindow):
-    def __init__(self, ccd_widgets, window_title, *args, **kwargs):
+    """
+    Main window listing the HDUs of a FITS file
+
+    The list is virtualized: HDUs are laid out on a grid of fixed height rows and a
+    CCDCaptureWidget is only built for the rows in or near the viewport. Rows
+    scrolled away are destroyed and the buffers of their view model released, so
+    memory does not grow with the number of HDUs. View models are kept, colormap,
+    range and filters survive scrolling and rows come back from the render cache.
+    """
+
+    # Rows kept alive above and below the viewport
+    OVERSCAN_ROWS = 1
+    # Row height used until the first row is built and measured
+    DEFAULT_ROW_HEIGHT = 720
+
+    def __init__(self, window_title, tiled=False, showTimings=False, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.ccdWidgets = ccd_widgets
         self.setWindowTitle(window_title)
         self.resize(1200, 800)
+        self.tiled = tiled
+        self.showTimings = showTimings
 
         self.scrollArea = QtWidgets.QScrollArea()
         self.scrollArea.setWidgetResizable(True)
@@ -47,18 +189,84 @@ class FitsLoadMainWindow(QtWidgets.QMainWindow):
 
         self.contentWidget = QtWidgets.QWidget()
         self.scrollArea.setWidget(self.contentWidget)
+        self.scrollArea.verticalScrollBar().valueChanged.connect(self.updateVisibleRows)
+
+        # HDU index of every row, kept sorted
+        self.hduIndices = []
+        # Title and view model of every HDU
+        self.hdus = dict()
+        # Row widgets currently alive, by HDU index
+        self.rows = dict()
+        self.rowHeight = None
+
+    def addHDU(self, index: int, title: str, viewModel: CCDCaptureViewModel):
+        """List an HDU, keeping HDUs in file order whatever order they arrive in"""
+        self.hdus[index] = (title, viewModel)
+        self.hduIndices.insert(bisect(self.hduIndices, index), index)
+        self.updateVisibleRows()
+        if index not in self.rows:
+            viewModel.releaseBuffers()
 
-        self.layout = QtWidgets.QVBoxLayout(self.contentWidget)
-        self.layout.setAlignment(QtCore.Qt.AlignTop)
+    def visibleRange(self) -> range:
+        """Rows in or near the viewport"""
+        rowHeight = self.rowHeight or FitsLoadMainWindow.DEFAULT_ROW_HEIGHT
+        top = self.scrollArea.verticalScrollBar().value()
+        bottom = top + self.scrollArea.viewport().height()
+        first = max(0, top // rowHeight - FitsLoadMainWindow.OVERSCAN_ROWS)
+        last = bottom // rowHeight + FitsLoadMainWindow.OVERSCAN_ROWS
+        return range(first, min(last + 1, len(self.hduIndices)))
+
+    def updateVisibleRows(self):
+        """Build rows entering the viewport and release the ones leaving it"""
+        visible = {self.hduIndices[row]: row for row in self.visibleRange()}
+        for index in list(self.rows):
+            if index not in visible:
+                self.releaseRow(index)
+        for index, row in visible.items():
+            if index not in self.rows:
+                self.rows[index] = self.buildRow(index)
+        if self.rowHeight is None and len(self.rows) > 0:
+            # Every HDU of a file is assumed to render at the same size
+            self.rowHeight = next(iter(self.rows.values())).sizeHint().height()
+            self.updateVisibleRows()
+            return
+        self.layoutRows(visible)
+
+    def buildRow(self, index: int) -> QtWidgets.QWidget:
+        title, viewModel = self.hdus[index]
+        widget = CCDCaptureWidget(
+            viewModel, tiled=self.tiled, showTimings=self.showTimings
+        )
+        widget.setMaximumWidth(self.scrollArea.viewport().width() - 20)
+
+        container = QtWidgets.QWidget(self.contentWidget)
+        vbox = QtWidgets.QVBoxLayout(container)
+        vbox.addWidget(QtWidgets.QLabel(title))
+        vbox.addWidget(widget)
+        container.show()
+        return container
+
+    def releaseRow(self, index: int):
+        self.rows.pop(index).deleteLater()
+        self.hdus[index][1].releaseBuffers()
+
+    def layoutRows(self, visible):
+        rowHeight = self.rowHeight or FitsLoadMainWindow.DEFAULT_ROW_HEIGHT
+        self.contentWidget.setMinimumHeight(rowHeight * len(self.hduIndices))
+        width = self.scrollArea.viewport().width()
+        for index, row in visible.items():
+            self.rows[index].setGeometry(0, row * rowHeight, width, rowHeight)
 
     def resizeEvent(self, event):
-        self.resizeCCDWidgets()
         super().resizeEvent(event)
+        self.resizeCCDWidgets()
+        self.updateVisibleRows()
 
     def resizeCCDWidgets(self):
         viewportWidth = self.scrollArea.viewport().width()
-        for w in self.ccdWidgets:
-            w.setMaximumWidth(viewportWidth - 20)
+        for row in self.rows.values():
+            for w in row.findChildren(CCDCaptureWidget):
+                w.setMaximumWidth(viewportWidth - 20)
 
 
 if __name__ == "__main__":
@@ -67,40 +275,41 @@ if __name__ == "__main__":
     options = getOptions()
     print(options)
 
-    kevFactor = 1.02857e-5
     input_path = Path(options.file)
     if not input_path.exists():
         print(f"File {argv[1]} not found or not a file", file=stderr)
         exit(1)
 
-    dumps = CCDCaptureModel.load(input_path)
-
-    widgets = []
-    mainWindow = FitsLoadMainWindow(widgets, f"Viewer: {options.file}")
+    instrumentation = None
+    if options.instrument is not None:
+        instrumentation = Instrumentation.enable()
+        app.aboutToQuit.connect(lambda: instrumentation.export(options.instrument))
 
-    layout = mainWindow.layout
+    mainWindow = FitsLoadMainWindow(
+        f"Viewer: {options.file}",
+        tiled=options.tiled,
+        showTimings=instrumentation is not None,
+    )
+    mainWindow.show()
 
-    for i, dump in enumerate(dumps):
-        convertedData = kevFactor * dump.rawData()
-        exposure = CCDCaptureModel(convertedData, dump.info())
-        if options.converter == "matplotlib":
-            converter = MatplotlibBasedConverter(colormap=colormaps["Greys"])
-        else:
-            converter = FastPixmapConverter()
-        viewModel = CCDCaptureViewModel(exposure, converter)
+    renderCache = RenderCache(maxBytes=options.render_cache_mb * 2**20)
+    preparer = HDUPreparer(options, renderCache)
 
-        widget = CCDCaptureWidget(viewModel)
+    def showHDU(hdu: PreparedHDU):
+        if hdu.image is not None:
+            # Seed the cache so the widget shows the render from the worker
+            hdu.viewModel.cacheQPixmap(
+                hdu.renderKey, QtGui.QPixmap.fromImage(hdu.image)
+            )
+        date = hdu.viewModel.captureInfo().captureDate()
+        title = f"HDU[{hdu.index}]: {date}, {hdu.clusterCount} clusters"
+        mainWindow.addHDU(hdu.index, title, hdu.viewModel)
 
-        vbox = QtWidgets.QVBoxLayout()
-        label = QtWidgets.QLabel(f"HDU[{i}]: {exposure.info().captureDate()}")
-        vbox.addWidget(label)
-        vbox.addWidget(widget)
+    preparer.prepared.connect(showHDU)
+    app.aboutToQuit.connect(preparer.shutdown)
 
-        container = QtWidgets.QWidget()
-        container.setLayout(vbox)
-        layout.addWidget(container)
-        widgets.append(widget)
+    # Only headers are parsed here, HDUs are prepared in parallel as they are found
+    for i, capture in enumerate(CCDCaptureModel.iterLoad(input_path)):
+        preparer.submit(i, capture)
 
-    mainWindow.show()
-    mainWindow.resizeCCDWidgets()
     app.exec()
@@ -0,0 +1,22 @@
+import unittest
+import numpy as np
+from astropy.io import fits
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Sequence
+
+
+class FitsTestCase(unittest.TestCase):
+    """Test case writing FITS files to a temporary directory, self.directory"""
+
+    def setUp(self):
+        tmpDir = TemporaryDirectory()
+        self.addCleanup(tmpDir.cleanup)
+        self.directory = Path(tmpDir.name)
+
+    def writeFits(self, name: str, frames: Sequence[np.ndarray]) -> Path:
+        """Write an empty primary HDU then one image HDU per frame, like the DAQ"""
+        path = self.directory / name
+        hdus = [fits.PrimaryHDU()] + [fits.ImageHDU(frame) for frame in frames]
+        fits.HDUList(hdus).writeto(path)
+        return path
@@ -0,0 +1,8 @@
+import sys
+from pathlib import Path
+
+# Tests import the scripts and benchmarks of experiments/fits_load, also when pytest
+# runs them through the tests/test_fits_load link at the root of the repository
+FITS_LOAD = str(Path(__file__).resolve().parent.parent)
+if FITS_LOAD not in sys.path:
+    sys.path.insert(0, FITS_LOAD)
@@ -0,0 +1,96 @@
+import time
+import unittest
+import unittest.mock
+from os import getenv
+from threading import Event
+import shiboken6
+from PySide6 import QtCore, QtGui
+from PySide6.QtWidgets import QApplication
+from ccdioutils.AsyncRenderer import AsyncRenderer
+
+
+@unittest.skipIf(
+    getenv("CI") == "true", "Can't run this test in a headless environment"
+)
+class TestAsyncRenderer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.pool = QtCore.QThreadPool()
+        self.renderer = AsyncRenderer(pool=self.pool)
+        self.delivered = []
+        self.renderer.imageReady.connect(
+            lambda key, image: self.delivered.append((key, image.width()))
+        )
+        self.rendered = []
+
+    def tearDown(self):
+        self.pool.waitForDone()
+
+    def _job(self, width: int, gate: Event = None):
+        def job():
+            if gate is not None:
+                gate.wait(5)
+            self.rendered.append(width)
+            return QtGui.QImage(width, 1, QtGui.QImage.Format_ARGB32)
+
+        return job
+
+    def _waitIdle(self):
+        deadline = time.monotonic() + 5
+        while self.renderer.isBusy() and time.monotonic() < deadline:
+            self.app.processEvents()
+            time.sleep(0.001)
+        self.app.processEvents()
+
+    def test_request_givenSingleJob_deliversImageWithKey(self):
+        self.renderer.request(self._job(3), key="a")
+        self._waitIdle()
+        self.assertEqual(self.delivered, [("a", 3)])
+
+    def test_request_givenBurstWhileRendering_onlyRendersLatest(self):
+        gate = Event()
+        self.renderer.request(self._job(1, gate), key=1)
+        for width in range(2, 10):
+            self.renderer.request(self._job(width), key=width)
+        gate.set()
+        self._waitIdle()
+        self.assertEqual(self.rendered, [1, 9])
+        self.assertEqual(self.delivered, [(9, 9)])
+
+    def test_cancel_givenRunningJob_dropsItsResult(self):
+        gate = Event()
+        self.renderer.request(self._job(1, gate), key=1)
+        self.renderer.cancel()
+        gate.set()
+        self._waitIdle()
+        self.assertEqual(self.rendered, [1])
+        self.assertEqual(self.delivered, [])
+
+    def test_request_givenFailingJob_keepsRendering(self):
+        def failing():
+            raise RuntimeError("boom")
+
+        with unittest.mock.patch("traceback.print_exc"):
+            self.renderer.request(failing)
+            self._waitIdle()
+        self.renderer.request(self._job(2), key=2)
+        self._waitIdle()
+        self.assertEqual(self.delivered, [(2, 2)])
+
+    def test_request_givenParentDeletedWhileRendering_dropsResult(self):
+        parent = QtCore.QObject()
+        renderer = AsyncRenderer(pool=self.pool, parent=parent)
+        delivered = []
+        renderer.imageReady.connect(lambda key, image: delivered.append(key))
+        gate = Event()
+        renderer.request(self._job(1, gate), key=1)
+        shiboken6.delete(parent)
+        with unittest.mock.patch("sys.excepthook") as excepthook:
+            gate.set()
+            self.pool.waitForDone()
+        self.app.processEvents()
+        self.assertEqual(delivered, [])
+        excepthook.assert_not_called()
@@ -0,0 +1,131 @@
+import gc
+import weakref
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from astropy.io import fits
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from ccdioutils.CCDCaptureModel import CCDCaptureModel
+from ccdioutils.FitsFile import FitsFile
+from ccdioutils.VizFilter import UniformFilter
+
+
+class TestCCDCaptureModel(unittest.TestCase):
+    def setUp(self):
+        self.tmpDir = TemporaryDirectory()
+        self.fitsPath = Path(self.tmpDir.name) / "capture.fits"
+        self.frames = [
+            np.arange(i, i + 12, dtype=np.int32).reshape((3, 4)) for i in range(3)
+        ]
+        hdus = [fits.PrimaryHDU()]
+        for frame in self.frames:
+            hdu = fits.ImageHDU(frame)
+            hdu.header["DATE"] = "2025-01-01T00:00:00"
+            hdus.append(hdu)
+        fits.HDUList(hdus).writeto(self.fitsPath)
+
+    def tearDown(self):
+        self.tmpDir.cleanup()
+
+    def test_load_givenMultiHDUFile_skipsHDUsWithoutImages(self):
+        captures = CCDCaptureModel.load(self.fitsPath)
+        self.assertEqual(len(captures), len(self.frames))
+
+    def test_load_givenMultiHDUFile_doesNotTouchPixelData(self):
+        captures = CCDCaptureModel.load(self.fitsPath)
+        self.assertEqual(captures[0].info().rows, 3)
+        self.assertEqual(captures[0].info().cols, 4)
+        self.assertFalse(any(capture.isLoaded() for capture in captures))
+
+    def test_rawData_givenUint16CaptureWithBZERO_readsScaledValues(self):
+        frame = np.array([[0, 1, 32768], [40000, 60000, 65535]], dtype=np.uint16)
+        path = Path(self.tmpDir.name) / "uint16.fits"
+        fits.HDUList([fits.PrimaryHDU(), fits.ImageHDU(frame)]).writeto(path)
+        self.assertEqual(fits.getheader(path, 1)["BZERO"], 32768)
+        data = CCDCaptureModel.load(path)[0].rawData()
+        self.assertEqual(data.dtype, np.uint16)
+        self.assertTrue(np.array_equal(data, frame))
+
+    def test_load_givenOpenFitsFile_readsUntilClosed(self):
+        with FitsFile(self.fitsPath) as fitsFile:
+            captures = CCDCaptureModel.load(fitsFile)
+            data = captures[0].rawData()
+        self.assertTrue(fitsFile.isClosed())
+        self.assertTrue(np.array_equal(data, self.frames[0]))
+        with self.assertRaises(ValueError):
+            captures[1].rawData()
+
+    def test_rawData_givenLazyCapture_mapsDataOnFirstAccess(self):
+        captures = CCDCaptureModel.load(self.fitsPath)
+        data = captures[1].rawData()
+        self.assertTrue(captures[1].isLoaded())
+        self.assertFalse(captures[0].isLoaded())
+        self.assertTrue(np.array_equal(data, self.frames[1]))
+
+    def test_info_givenLazyCapture_computesStatsOnDemand(self):
+        capture = CCDCaptureModel.load(self.fitsPath)[2]
+        self.assertEqual(capture.info().min, 2)
+        self.assertEqual(capture.info().max, 13)
+        self.assertEqual(capture.info().captureDate().isot, "2025-01-01T00:00:00.000")
+
+    def test_copy_givenLazyCapture_copiesDataAndInfo(self):
+        capture = CCDCaptureModel.load(self.fitsPath)[0]
+        copy = capture.copy()
+        self.assertIsNot(copy.rawData(), capture.rawData())
+        self.assertEqual(copy.info(), capture.info())
+
+    def test_statistics_givenLazyCapture_computesThemOnce(self):
+        capture = CCDCaptureModel.load(self.fitsPath)[1]
+        statistics = capture.statistics()
+        self.assertIs(capture.statistics(), statistics)
+        self.assertEqual(capture.info().max, statistics.max)
+
+    def test_applyFilter_givenLazyCapture_defersFilterUntilDataIsRead(self):
+        capture = CCDCaptureModel.load(self.fitsPath)[1]
+        capture.applyFilter(UniformFilter.ScalarMultiply(2))
+        self.assertFalse(capture.isLoaded())
+        self.assertTrue(np.array_equal(capture.rawData(), 2 * self.frames[1]))
+
+    def test_applyFilter_givenFilter_changesUid(self):
+        capture = CCDCaptureModel(np.zeros((2, 2)))
+        uid = capture.uid()
+        capture.applyFilter(UniformFilter.Add(1))
+        self.assertNotEqual(capture.uid(), uid)
+
+    def test_rawData_givenCapturesReadFromSeveralThreads_readsEveryFrame(self):
+        frames = [np.full((64, 64), 1000 * i, dtype=np.uint16) for i in range(16)]
+        path = Path(self.tmpDir.name) / "many.fits"
+        fits.HDUList([fits.PrimaryHDU()] + [fits.ImageHDU(f) for f in frames]).writeto(
+            path
+        )
+        with FitsFile(path) as fitsFile:
+            captures = CCDCaptureModel.load(fitsFile)
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                data = list(executor.map(CCDCaptureModel.rawData, captures))
+        for read, frame in zip(data, frames):
+            self.assertTrue(np.array_equal(read, frame))
+
+    def test_releaseData_givenFilteredLazyCapture_replaysFiltersOnReload(self):
+        capture = CCDCaptureModel.load(self.fitsPath)[1]
+        capture.rawData()
+        capture.applyFilter(UniformFilter.Add(1))
+        statistics = capture.statistics()
+        capture.releaseData()
+        self.assertFalse(capture.isLoaded())
+        self.assertIs(capture.statistics(), statistics)
+        self.assertTrue(np.array_equal(capture.rawData(), self.frames[1] + 1))
+
+    def test_releaseData_givenLazyCapture_dropsEveryCachedCopy(self):
+        with FitsFile(self.fitsPath) as fitsFile:
+            capture = CCDCaptureModel.load(fitsFile)[1]
+            data = weakref.ref(capture.rawData())
+            capture.releaseData()
+            gc.collect()
+            self.assertIsNone(data())
+            self.assertTrue(np.array_equal(capture.rawData(), self.frames[1]))
+
+    def test_releaseData_givenInMemoryCapture_keepsData(self):
+        capture = CCDCaptureModel(np.ones((2, 2)))
+        capture.releaseData()
+        self.assertTrue(capture.isLoaded())
@@ -3,8 +3,10 @@ import numpy as np
 from ccdioutils.CCDCaptureModel import CCDCaptureModel
 from ccdioutils.CCDCaptureViewModel import CCDCaptureViewModel
 from ccdioutils.BoundingBox import BoundingBox
+from ccdioutils.ClusterExtractor import ClusterExtractor
 from ccdioutils.VizFilter import UniformFilter
 from ccdioutils.Fits2QPixmapConverter import Fits2QPixmapConverter
+from ccdioutils.RenderCache import RenderCache
 from PySide6 import QtGui
 
 
@@ -13,6 +15,27 @@ class TestCCDCaptureViewModelTest(unittest.TestCase):
         def convert(self, matrix: np.matrix):
             return QtGui.QPixmap([])
 
+    class CountingConverter(Fits2QPixmapConverter):
+        def __init__(self):
+            self._colormap = "Greys_r"
+            self.conversions = 0
+
+        def convert(self, matrix: np.matrix):
+            self.conversions += 1
+            return f"pixmap{self.conversions}"
+
+    class RecordingConverter(Fits2QPixmapConverter):
+        def __init__(self):
+            self._colormap = "Greys_r"
+            self.rendered = []
+
+        def convert(self, matrix: np.matrix):
+            return QtGui.QPixmap([])
+
+        def toQImage(self, matrix: np.ndarray) -> QtGui.QImage:
+            self.rendered.append(matrix)
+            return QtGui.QImage()
+
     def _mockMatrix(self, min: float, max: float) -> np.matrix:
         assert min < max
         mock = np.eye(max)
@@ -55,9 +78,25 @@ class TestCCDCaptureViewModelTest(unittest.TestCase):
         self.ccdCaptureViewModel.applyFilter(self.mockFilter)
         self.assertEqual(self.ccdCaptureViewModel.valueAt(0, 0), -254)
 
-    def test_extractClusters_always_returnsEmptyList(self):
-        result = self.ccdCaptureViewModel.extractClusters()
-        self.assertEqual(result, [])
+    def test_extractClusters_givenFlatCapture_returnsEmptyCatalog(self):
+        model = CCDCaptureModel(np.zeros((8, 8)))
+        viewModel = CCDCaptureViewModel(model, self.mockFits2QPixmapConverter)
+        self.assertEqual(len(viewModel.extractClusters()), 0)
+
+    def test_extractClusters_givenFilteredCapture_clustersVisualizedData(self):
+        rawData = np.zeros((8, 8))
+        rawData[1][1] = 5
+        rawData[5][5] = 10
+        model = CCDCaptureModel(rawData)
+        viewModel = CCDCaptureViewModel(
+            model,
+            self.mockFits2QPixmapConverter,
+            clusterExtractor=ClusterExtractor(threshold=1),
+        )
+        viewModel.applyFilter(UniformFilter.SubstituteInRange(0, 6, 0))
+        self.assertEqual(
+            viewModel.extractClusters().boundingBoxes(), [BoundingBox(5, 5, 5, 5)]
+        )
 
     def test_setCurrentColormap_givenColormapName_setsCurrentColormap(self):
         newColormap = "plasma"
@@ -118,8 +157,145 @@ class TestCCDCaptureViewModelTest(unittest.TestCase):
         viewModel.setVisualizationRange((2, 3))
         viewModel.restrictVisualizationToRange()
 
-        result = viewModel._CCDCaptureViewModel__ccdVizCapture.rawData()
+        result = viewModel._getRawData()
         self.assertTrue(
             np.array_equal(result, expected),
             f"\n{result}\n{expected}",
         )
+
+    def test_applyFilter_givenFilter_leavesOriginalCaptureUntouched(self):
+        self.ccdCaptureViewModel.applyFilter(self.mockFilter)
+        self.ccdCaptureViewModel.valueAt(0, 0)
+        self.assertEqual(self.ccdCaptureModel.rawData()[0][0], -255)
+
+    def test_applyFilter_givenStackedFilters_appliesThemInOrder(self):
+        self.ccdCaptureViewModel.applyFilter(self.mockFilter)
+        self.assertEqual(self.ccdCaptureViewModel.valueAt(0, 0), -254)
+        self.ccdCaptureViewModel.applyFilter(UniformFilter.ScalarMultiply(2))
+        self.assertEqual(self.ccdCaptureViewModel.valueAt(0, 0), -508)
+        self.ccdCaptureViewModel.applyFilter(self.mockFilter, useVizModel=False)
+        self.assertEqual(self.ccdCaptureViewModel.valueAt(0, 0), -254)
+
+    def test_reset_givenFilteredState_sharesOriginalData(self):
+        self.ccdCaptureViewModel.applyFilter(self.mockFilter)
+        self.ccdCaptureViewModel.reset()
+        self.assertIs(
+            self.ccdCaptureViewModel._getRawData(), self.ccdCaptureModel.rawData()
+        )
+
+    def test_restrictVisualizationToRange_givenRepeatedCalls_reusesBuffer(self):
+        self.ccdCaptureViewModel.setVisualizationRange((0, 10))
+        self.ccdCaptureViewModel.restrictVisualizationToRange()
+        first = self.ccdCaptureViewModel._getRawData()
+        self.ccdCaptureViewModel.setVisualizationRange((0, 20))
+        self.ccdCaptureViewModel.restrictVisualizationToRange()
+        self.assertIs(self.ccdCaptureViewModel._getRawData(), first)
+        self.assertEqual(self.ccdCaptureViewModel.valueAt(0, 0), 0)
+
+    def test_setVisualizationRange_givenRange_onlyChangesDisplayRange(self):
+        converter = TestCCDCaptureViewModelTest.MockConverter()
+        viewModel = CCDCaptureViewModel(self.ccdCaptureModel, converter)
+        viewModel.setVisualizationRange((0, 10))
+        self.assertEqual(converter._displayRange, (0, 10))
+        self.assertIs(viewModel._getRawData(), self.ccdCaptureModel.rawData())
+        viewModel.reset()
+        self.assertIsNone(converter._displayRange)
+
+    def test_getQPixmap_givenRenderCache_rendersEachStateOnce(self):
+        converter = TestCCDCaptureViewModelTest.CountingConverter()
+        cache = RenderCache(sizeOf=lambda pixmap: 1)
+        viewModel = CCDCaptureViewModel(
+            self.ccdCaptureModel, converter, renderCache=cache
+        )
+        viewModel.getQPixmap()
+        viewModel.setCurrentColormap("viridis")
+        viewModel.getQPixmap()
+        viewModel.setCurrentColormap("Greys_r")
+        viewModel.getQPixmap()
+        viewModel.applyFilter(self.mockFilter)
+        viewModel.getQPixmap()
+        viewModel.reset()
+        viewModel.getQPixmap()
+        self.assertEqual(converter.conversions, 3)
+        self.assertEqual(cache.hits(), 2)
+
+    def test_getQImageRenderJob_givenLaterFilter_rendersStateAtCreation(self):
+        converter = TestCCDCaptureViewModelTest.RecordingConverter()
+        viewModel = CCDCaptureViewModel(self.ccdCaptureModel, converter)
+        viewModel.applyFilter(self.mockFilter)
+        _, job = viewModel.getQImageRenderJob()
+        viewModel.applyFilter(UniformFilter.ScalarMultiply(2))
+        viewModel.valueAt(0, 0)
+        job()
+        self.assertEqual(converter.rendered[0][0][0], -254)
+
+    def test_getQImageRenderJob_givenNoFilter_rendersCaptureWithoutCopy(self):
+        converter = TestCCDCaptureViewModelTest.RecordingConverter()
+        viewModel = CCDCaptureViewModel(self.ccdCaptureModel, converter)
+        viewModel.getQImageRenderJob()[1]()
+        self.assertIs(converter.rendered[0], self.ccdCaptureModel.rawData())
+
+    def test_getQPixmap_givenModelFilter_rendersFilteredCapture(self):
+        converter = TestCCDCaptureViewModelTest.CountingConverter()
+        cache = RenderCache(sizeOf=lambda pixmap: 1)
+        viewModel = CCDCaptureViewModel(
+            self.ccdCaptureModel, converter, renderCache=cache
+        )
+        first = viewModel.getQPixmap()
+        self.ccdCaptureModel.applyFilter(self.mockFilter)
+        self.assertNotEqual(viewModel.getQPixmap(), first)
+        self.assertEqual(converter.conversions, 2)
+
+    def test_init_givenDefaultPercentileRange_startsWithinDataRange(self):
+        data = np.arange(1000, dtype=np.float64).reshape(10, 100)
+        viewModel = CCDCaptureViewModel(
+            CCDCaptureModel(data),
+            self.mockFits2QPixmapConverter,
+            defaultPercentileRange=(1, 99),
+        )
+        low, high = viewModel.getVisualizationRange()
+        self.assertAlmostEqual(low, 10, delta=1)
+        self.assertAlmostEqual(high, 990, delta=1)
+        self.assertEqual(viewModel.getDataRange(), (0, 999))
+        self.assertEqual(self.mockFits2QPixmapConverter._displayRange, (low, high))
+
+    def test_getStatistics_givenFilter_describesVisualizedData(self):
+        self.assertEqual(self.ccdCaptureViewModel.getStatistics().max, 255)
+        self.ccdCaptureViewModel.applyFilter(UniformFilter.Add(10))
+        self.assertEqual(self.ccdCaptureViewModel.getStatistics().max, 265)
+        self.assertEqual(self.ccdCaptureViewModel.getDataRange(), (-255, 255))
+
+    def test_crop_givenBoundingBox_visualizesViewOverCapture(self):
+        self.ccdCaptureViewModel.crop(BoundingBox(250, 250, 254, 254))
+        data = self.ccdCaptureViewModel._getRawData()
+        self.assertEqual(data.shape, (5, 5))
+        self.assertTrue(np.shares_memory(data, self.ccdCaptureModel.rawData()))
+        self.assertEqual(self.ccdCaptureViewModel.valueAt(4, 4), 255)
+        self.assertEqual(self.ccdCaptureViewModel.getDataRange(), (0, 255))
+
+    def test_crop_givenFilter_onlyFiltersCroppedRegion(self):
+        self.ccdCaptureViewModel.applyFilter(self.mockFilter)
+        self.ccdCaptureViewModel.crop(BoundingBox(0, 0, 1, 1))
+        self.assertEqual(self.ccdCaptureViewModel._getRawData().shape, (2, 2))
+        self.assertEqual(self.ccdCaptureViewModel.valueAt(0, 0), -254)
+        self.assertEqual(self.ccdCaptureViewModel.getStatistics().max, 2)
+
+    def test_extractClusters_givenCrop_returnsCaptureCoordinates(self):
+        data = np.zeros((20, 20))
+        data[12, 15] = 5
+        viewModel = CCDCaptureViewModel(
+            CCDCaptureModel(data),
+            self.mockFits2QPixmapConverter,
+            clusterExtractor=ClusterExtractor(threshold=1),
+        )
+        viewModel.crop(BoundingBox(10, 10, 19, 19))
+        catalog = viewModel.extractClusters()
+        self.assertEqual(catalog.boundingBoxes(), [BoundingBox(12, 15, 12, 15)])
+        self.assertEqual((catalog.peakRow[0], catalog.peakCol[0]), (12, 15))
+
+    def test_reset_givenCrop_restoresFullCapture(self):
+        self.ccdCaptureViewModel.crop(BoundingBox(1, 2, 3, 4))
+        self.ccdCaptureViewModel.reset()
+        self.assertIs(
+            self.ccdCaptureViewModel._getRawData(), self.ccdCaptureModel.rawData()
+        )
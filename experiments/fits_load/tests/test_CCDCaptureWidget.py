@@ -0,0 +1,26 @@
+import unittest
+from os import getenv
+import numpy as np
+from PySide6.QtWidgets import QApplication
+from ccdioutils.CCDCaptureModel import CCDCaptureModel
+from ccdioutils.CCDCaptureViewModel import CCDCaptureViewModel
+from ccdioutils.CCDCaptureWidget import CCDCaptureWidget
+from ccdioutils.Fits2QPixmapConverter import FastPixmapConverter
+
+
+@unittest.skipIf(
+    getenv("CI") == "true", "Can't run this test in a headless environment"
+)
+class TestCCDCaptureWidget(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def test_init_givenViewModelColormap_selectsIt(self):
+        viewModel = CCDCaptureViewModel(
+            CCDCaptureModel(np.arange(16.0).reshape(4, 4)), FastPixmapConverter()
+        )
+        viewModel.setCurrentColormap("viridis")
+        widget = CCDCaptureWidget(viewModel, asyncRendering=False)
+        self.assertEqual(widget._colormapComboBox.currentText(), "viridis")
+        self.assertEqual(viewModel.getCurrentColormap(), "viridis")
@@ -0,0 +1,45 @@
+import unittest
+import numpy as np
+from ccdioutils.CCDPyramid import CCDPyramid
+
+
+class TestCCDPyramid(unittest.TestCase):
+    def setUp(self):
+        self.matrix = np.zeros((37, 21))
+        self.matrix[36, 20] = 9
+        self.matrix[5, 3] = 4
+        self.pyramid = CCDPyramid(self.matrix, tileSize=8)
+
+    def test_maxPool_givenOddShape_keepsMaximumOfEachBlock(self):
+        pooled = CCDPyramid.maxPool(self.matrix)
+        self.assertEqual(pooled.shape, (19, 11))
+        self.assertEqual(pooled[18, 10], 9)
+        self.assertEqual(pooled[2, 1], 4)
+        self.assertEqual(pooled.sum(), 13)
+
+    def test_levelCount_givenTileSize_stopsAtASingleTile(self):
+        self.assertEqual(self.pyramid.levelCount(), 4)
+        last = self.pyramid.level(self.pyramid.levelCount() - 1)
+        self.assertLessEqual(max(last.shape), 8)
+
+    def test_level_givenDeepLevel_preservesIsolatedHits(self):
+        last = self.pyramid.level(self.pyramid.levelCount() - 1)
+        self.assertEqual(last.max(), 9)
+        self.assertEqual(np.count_nonzero(last), 2)
+
+    def test_level_givenLevelZero_doesNotCopy(self):
+        self.assertIs(self.pyramid.level(0).base, self.matrix.base)
+        self.assertTrue(np.shares_memory(self.pyramid.level(0), self.matrix))
+
+    def test_tile_givenEdgeTile_returnsPartialView(self):
+        self.assertEqual(self.pyramid.tileGrid(0), (5, 3))
+        tile = self.pyramid.tile(0, 4, 2)
+        self.assertEqual(tile.shape, (5, 5))
+        self.assertTrue(np.shares_memory(tile, self.matrix))
+
+    def test_levelForZoom_givenZoomedOut_picksCoarserLevel(self):
+        self.assertEqual(self.pyramid.levelForZoom(2), 0)
+        self.assertEqual(self.pyramid.levelForZoom(1), 0)
+        self.assertEqual(self.pyramid.levelForZoom(0.5), 1)
+        self.assertEqual(self.pyramid.levelForZoom(0.3), 1)
+        self.assertEqual(self.pyramid.levelForZoom(0.01), 3)
@@ -0,0 +1,56 @@
+import unittest
+import numpy as np
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from ccdioutils.CalibrationFilter import CalibrationFilter
+from ccdioutils.CCDCaptureModel import CCDCaptureModel
+from ccdioutils.VizFilter import FilterPipeline, UniformFilter
+
+
+class TestCalibrationFilter(unittest.TestCase):
+    def setUp(self):
+        self.bias = np.arange(12, dtype=np.float32).reshape((3, 4))
+        self.dark = np.full((3, 4), 0.5, dtype=np.float32)
+        self.filter = CalibrationFilter(self.bias, self.dark, 2.0)
+
+    def test_filter_givenMasters_subtractsBiasAndScaledDark(self):
+        frame = np.full((3, 4), 100, dtype=np.int32)
+        result = self.filter.filter(frame)
+        self.assertTrue(np.array_equal(result, 100 - self.bias - 1))
+        self.assertEqual(result.dtype, self.filter.resultType(frame.dtype))
+        self.assertTrue(np.all(frame == 100))
+
+    def test_filterInPlace_givenFloatFrame_overwritesIt(self):
+        frame = np.full((3, 4), 100, dtype=np.float32)
+        self.filter.filterInPlace(frame)
+        self.assertTrue(np.array_equal(frame, 100 - self.bias - 1))
+
+    def test_filter_givenOtherShape_raises(self):
+        with self.assertRaises(ValueError):
+            self.filter.filter(np.zeros((4, 3)))
+
+    def test_cacheKey_givenSameMasters_isEqual(self):
+        same = CalibrationFilter(self.bias.copy(), self.dark.copy(), 2.0)
+        other = CalibrationFilter(self.bias, self.dark, 1.0)
+        self.assertEqual(self.filter.cacheKey(), same.cacheKey())
+        self.assertNotEqual(self.filter.cacheKey(), other.cacheKey())
+
+    def test_save_givenFilters_loadsThemBack(self):
+        with TemporaryDirectory() as directory:
+            path = Path(directory) / "masters.npz"
+            CalibrationFilter.save(path, [self.filter, CalibrationFilter(self.bias)])
+            loaded = CalibrationFilter.load(path)
+        self.assertEqual(len(loaded), 2)
+        self.assertEqual(loaded[0].cacheKey(), self.filter.cacheKey())
+        self.assertEqual(loaded[0].darkScale(), 2.0)
+        self.assertIsNone(loaded[1].dark())
+
+    def test_pipeline_givenCalibrationFirst_matchesSequentialFilters(self):
+        frame = np.full((3, 4), 100, dtype=np.float32)
+        pipeline = FilterPipeline([self.filter, UniformFilter.ScalarMultiply(2)])
+        self.assertTrue(np.array_equal(pipeline.filter(frame), 2 * (99 - self.bias)))
+
+    def test_applyFilter_givenModel_calibratesRawData(self):
+        capture = CCDCaptureModel(np.full((3, 4), 100, dtype=np.float32))
+        capture.applyFilter(self.filter)
+        self.assertTrue(np.array_equal(capture.rawData(), 99 - self.bias))
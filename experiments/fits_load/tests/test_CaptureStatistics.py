@@ -0,0 +1,80 @@
+import unittest
+import numpy as np
+from ccdioutils.CaptureStatistics import CaptureStatistics
+
+
+class TestCaptureStatistics(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.frame = rng.normal(100, 5, (300, 200))
+        self.frame[10, 10] = 10000
+        self.statistics = CaptureStatistics.compute(self.frame)
+
+    def test_compute_givenFrame_matchesNumpyMoments(self):
+        self.assertEqual(self.statistics.min, self.frame.min())
+        self.assertEqual(self.statistics.max, self.frame.max())
+        self.assertAlmostEqual(self.statistics.mean, self.frame.mean())
+        self.assertAlmostEqual(self.statistics.std, self.frame.std())
+        self.assertEqual(self.statistics.count, self.frame.size)
+
+    def test_compute_givenSmallBlocks_countsEveryPixel(self):
+        original = CaptureStatistics.BLOCK_ROWS
+        CaptureStatistics.BLOCK_ROWS = 7
+        try:
+            statistics = CaptureStatistics.compute(self.frame)
+        finally:
+            CaptureStatistics.BLOCK_ROWS = original
+        self.assertEqual(statistics.counts().sum(), self.frame.size)
+        self.assertTrue(np.array_equal(statistics.counts(), self.statistics.counts()))
+
+    def test_percentile_givenOutlier_staysWithinABinOfNumpy(self):
+        q = np.array([1, 25, 50, 75, 99.5])
+        self.assertTrue(
+            np.allclose(
+                self.statistics.percentile(q),
+                np.percentile(self.frame, q),
+                atol=self.statistics.binWidth(),
+            )
+        )
+
+    def test_percentile_givenBounds_returnsExtremes(self):
+        self.assertEqual(self.statistics.percentile(0), self.frame.min())
+        self.assertEqual(self.statistics.percentile(100), self.frame.max())
+
+    def test_noise_givenGaussianFrame_estimatesSigmaDespiteOutlier(self):
+        self.assertAlmostEqual(self.statistics.noise(), 5, delta=0.2)
+        self.assertGreater(self.statistics.std, 20)
+
+    def test_histogram_givenRange_rebinsCounts(self):
+        counts, edges = self.statistics.histogram(bins=4)
+        self.assertEqual(len(edges), 5)
+        self.assertAlmostEqual(counts.sum(), self.frame.size)
+        self.assertAlmostEqual(counts[-1], 1)
+
+    def test_compute_givenConstantFrame_collapsesToItsValue(self):
+        statistics = CaptureStatistics.compute(np.full((4, 4), 3))
+        self.assertEqual(statistics.median(), 3)
+        self.assertEqual(statistics.noise(), 0)
+        self.assertEqual(statistics.std, 0)
+
+    def test_compute_givenEmptyFrame_raises(self):
+        with self.assertRaises(ValueError):
+            CaptureStatistics.compute(np.zeros((0, 4)))
+
+    def test_compute_givenNonFiniteValues_skipsThem(self):
+        frame = self.frame.copy()
+        frame[0, :3] = [np.nan, np.inf, -np.inf]
+        finite = frame[np.isfinite(frame)]
+        statistics = CaptureStatistics.compute(frame)
+        self.assertEqual(statistics.min, finite.min())
+        self.assertEqual(statistics.max, finite.max())
+        self.assertEqual(statistics.count, finite.size)
+        self.assertAlmostEqual(statistics.mean, finite.mean())
+        self.assertAlmostEqual(statistics.std, finite.std())
+        self.assertAlmostEqual(statistics.median(), np.median(finite), delta=1)
+
+    def test_compute_givenNoFiniteValue_returnsNaN(self):
+        statistics = CaptureStatistics.compute(np.full((2, 2), np.nan))
+        self.assertTrue(np.isnan(statistics.min))
+        self.assertTrue(np.isnan(statistics.max))
+        self.assertEqual(statistics.count, 0)
@@ -0,0 +1,104 @@
+import unittest
+import numpy as np
+from typing import Sequence, Tuple
+from ccdioutils.ClassificationService import ClassificationService
+from ccdioutils.ClassifierModel import ClassifierModel
+
+
+class _SumModel(ClassifierModel):
+    """Scores every stamp with its sum, so results tell which stamp they belong to"""
+
+    def __init__(self):
+        self.batchSizes = []
+
+    def stampShape(self) -> Tuple[int, int]:
+        return (2, 2)
+
+    def classes(self) -> Sequence[str]:
+        return ("sum", "negated")
+
+    def predict(self, stamps: np.ndarray) -> np.ndarray:
+        self.batchSizes.append(len(stamps))
+        sums = stamps.sum(axis=(1, 2))
+        return np.stack([sums, -sums], axis=1)
+
+
+class _FailingModel(_SumModel):
+    def predict(self, stamps: np.ndarray) -> np.ndarray:
+        raise RuntimeError("model failure")
+
+
+def _stamps(values) -> np.ndarray:
+    return np.array(values, dtype=np.float32)[:, None, None] * np.ones((1, 2, 2))
+
+
+class TestClassificationService(unittest.TestCase):
+    def test_submit_givenSeveralCaptures_routesScoresBack(self):
+        model = _SumModel()
+        with ClassificationService(model, batchSize=4, timeout=10) as service:
+            first = service.submit("a", np.array([7, 8, 9]), _stamps([1, 2, 3]))
+            second = service.submit("b", np.arange(5), _stamps([4, 5, 6, 7, 8]))
+            a = first.result(timeout=5)
+            b = second.result(timeout=5)
+        self.assertEqual(a.captureId, "a")
+        self.assertEqual(a.clusterIds.tolist(), [7, 8, 9])
+        self.assertEqual(a.scores[:, 0].tolist(), [4, 8, 12])
+        self.assertEqual(b.scores[:, 0].tolist(), [16, 20, 24, 28, 32])
+        self.assertEqual(b.labels(), ["sum"] * 5)
+        self.assertEqual(model.batchSizes, [4, 4])
+
+    def test_submit_givenPartialBatch_flushesOnTimeout(self):
+        service = ClassificationService(_SumModel(), batchSize=64, timeout=0.01)
+        result = service.submit(0, np.array([0]), _stamps([1])).result(timeout=5)
+        self.assertEqual(result.scores.tolist(), [[4, -4]])
+        metrics = service.metrics()
+        service.close()
+        self.assertEqual(metrics["timeoutFlushes"], 1)
+        self.assertEqual(metrics["meanBatchFill"], 1 / 64)
+        self.assertEqual(metrics["queueDepth"], 0)
+
+    def test_metrics_givenFullBatches_reportsFill(self):
+        with ClassificationService(_SumModel(), batchSize=2, timeout=10) as service:
+            service.submit(0, np.arange(4), _stamps([1, 2, 3, 4])).result(timeout=5)
+            metrics = service.metrics()
+        self.assertEqual(metrics["sizeFlushes"], 2)
+        self.assertEqual(metrics["meanBatchFill"], 1.0)
+        self.assertEqual(metrics["classified"], 4)
+        self.assertEqual(metrics["maxQueueDepth"], 4)
+
+    def test_submit_givenNoClusters_resolvesRightAway(self):
+        with ClassificationService(_SumModel(), batchSize=2) as service:
+            future = service.submit(0, np.zeros(0), np.zeros((0, 2, 2)))
+            self.assertTrue(future.done())
+            self.assertEqual(future.result().scores.shape, (0, 2))
+
+    def test_submit_givenWrongStampShape_raises(self):
+        with ClassificationService(_SumModel(), batchSize=2) as service:
+            with self.assertRaises(ValueError):
+                service.submit(0, np.arange(2), np.zeros((2, 3, 3)))
+
+    def test_submit_givenFailingModel_failsFuture(self):
+        with ClassificationService(_FailingModel(), batchSize=2, timeout=0) as service:
+            future = service.submit(0, np.arange(1), _stamps([1]))
+            with self.assertRaises(RuntimeError):
+                future.result(timeout=5)
+
+    def test_metrics_givenFailingModel_countsFailedBatches(self):
+        with ClassificationService(_FailingModel(), batchSize=2, timeout=0) as service:
+            futures = [service.submit(i, np.arange(1), _stamps([1])) for i in range(3)]
+            for future in futures:
+                with self.assertRaises(RuntimeError):
+                    future.result(timeout=5)
+            metrics = service.metrics()
+        self.assertGreaterEqual(metrics["failedBatches"], 2)
+        self.assertEqual(metrics["failed"], 3)
+        self.assertEqual(metrics["batches"], 0)
+        self.assertEqual(metrics["classified"], 0)
+
+    def test_close_givenPendingStamps_classifiesThem(self):
+        service = ClassificationService(_SumModel(), batchSize=64, timeout=10)
+        future = service.submit(0, np.arange(3), _stamps([1, 1, 1]))
+        service.close()
+        self.assertTrue(future.done())
+        with self.assertRaises(RuntimeError):
+            service.submit(0, np.arange(1), _stamps([1]))
@@ -0,0 +1,23 @@
+import unittest
+import numpy as np
+from ccdioutils.ClassifierModel import LinearStampClassifier
+
+
+class TestLinearStampClassifier(unittest.TestCase):
+    def test_predict_givenBatch_returnsProbabilities(self):
+        model = LinearStampClassifier.random(stampShape=(6, 6))
+        scores = model.predict(np.random.default_rng(0).random((5, 6, 6)))
+        self.assertEqual(scores.shape, (5, 3))
+        self.assertTrue(np.allclose(scores.sum(axis=1), 1))
+
+    def test_predict_givenWeights_scoresLinearly(self):
+        weights = np.stack([np.ones(4), np.zeros(4)], axis=1)
+        model = LinearStampClassifier(
+            weights, np.array([0, 1]), classes=("hit", "noise"), stampShape=(2, 2)
+        )
+        scores = model.predict(np.stack([np.ones((2, 2)), np.zeros((2, 2))]))
+        self.assertEqual(scores.argmax(axis=1).tolist(), [0, 1])
+
+    def test_init_givenMismatchedWeights_raises(self):
+        with self.assertRaises(ValueError):
+            LinearStampClassifier(np.zeros((4, 3)), stampShape=(3, 3))
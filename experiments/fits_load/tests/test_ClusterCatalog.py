@@ -0,0 +1,58 @@
+import unittest
+import numpy as np
+from ccdioutils.BoundingBox import BoundingBox
+from ccdioutils.ClusterCatalog import ClusterCatalog
+from ccdioutils.ClusterExtractor import ClusterExtractor
+
+
+class TestClusterCatalog(unittest.TestCase):
+    def setUp(self):
+        self.frame = np.zeros((10, 12))
+        self.frame[1:3, 1:4] = 10
+        self.frame[6, 8] = 20
+        self.frame[7, 9] = 30
+        self.frame[9, 11] = 5
+        self.catalog = ClusterExtractor(threshold=1).extract(self.frame)
+
+    def test_extract_givenFrame_fillsBoxesAndFeatures(self):
+        self.assertEqual(len(self.catalog), 3)
+        self.assertEqual(self.catalog.pixels.tolist(), [6, 2, 1])
+        self.assertEqual(self.catalog["energy"].tolist(), [60, 50, 5])
+        self.assertEqual(self.catalog.boundingBox(1), BoundingBox(6, 8, 7, 9))
+
+    def test_getitem_givenMask_returnsSelectedClusters(self):
+        bright = self.catalog[self.catalog.energy > 10]
+        self.assertEqual(len(bright), 2)
+        self.assertEqual(self.catalog[2].boundingBoxes(), [BoundingBox(9, 11, 9, 11)])
+
+    def test_sortedBy_givenDescending_ordersByColumn(self):
+        catalog = self.catalog.sortedBy("peakValue", descending=True)
+        self.assertEqual(catalog.peakValue.tolist(), [30, 10, 5])
+
+    def test_inRange_givenBounds_isInclusive(self):
+        mask = self.catalog.inRange("pixels", 1, 2)
+        self.assertEqual(mask.tolist(), [False, True, True])
+
+    def test_spatialMasks_givenBox_selectClustersByPosition(self):
+        box = BoundingBox(0, 0, 6, 8)
+        self.assertEqual(self.catalog.intersecting(box).tolist(), [True, True, False])
+        self.assertEqual(self.catalog.within(box).tolist(), [True, False, False])
+        self.assertEqual(self.catalog.containing(7, 9).tolist(), [False, True, False])
+
+    def test_spatialMasks_givenUnboundedBox_selectEveryCluster(self):
+        self.assertTrue(self.catalog.within(BoundingBox.unbounded()).all())
+
+    def test_fromBoundingBoxes_givenBoxes_roundTrips(self):
+        boxes = self.catalog.boundingBoxes()
+        catalog = ClusterCatalog.fromBoundingBoxes(boxes)
+        self.assertEqual(list(catalog), boxes)
+        self.assertEqual(catalog.energy.tolist(), [0, 0, 0])
+
+    def test_concatenate_givenCatalogs_keepsOrder(self):
+        catalog = ClusterCatalog.concatenate([self.catalog, self.catalog[:1]])
+        self.assertEqual(catalog.pixels.tolist(), [6, 2, 1, 6])
+        self.assertEqual(len(ClusterCatalog.concatenate([])), 0)
+
+    def test_init_givenWrongDtype_raises(self):
+        with self.assertRaises(ValueError):
+            ClusterCatalog(np.zeros(3))
@@ -0,0 +1,55 @@
+import unittest
+import unittest.mock
+import numpy as np
+from ccdioutils.BoundingBox import BoundingBox
+from ccdioutils.CaptureStatistics import CaptureStatistics
+from ccdioutils.ClusterExtractor import ClusterExtractor
+
+
+class TestClusterExtractor(unittest.TestCase):
+    def setUp(self):
+        self.frame = np.zeros((10, 12))
+        self.frame[1:3, 1:4] = 10
+        self.frame[6, 8] = 20
+        self.frame[7, 9] = 20
+
+    def test_extract_givenSeparateDeposits_returnsOneBoxPerCluster(self):
+        extractor = ClusterExtractor(threshold=1)
+        boxes = extractor.extract(self.frame).boundingBoxes()
+        self.assertEqual(boxes, [BoundingBox(1, 1, 2, 3), BoundingBox(6, 8, 7, 9)])
+
+    def test_extract_givenFourConnectivity_splitsDiagonalNeighbours(self):
+        extractor = ClusterExtractor(threshold=1, connectivity=4)
+        boxes = extractor.extract(self.frame).boundingBoxes()
+        self.assertEqual(len(boxes), 3)
+
+    def test_extract_givenMinPixels_dropsSmallClusters(self):
+        extractor = ClusterExtractor(threshold=1, minPixels=3)
+        boxes = extractor.extract(self.frame).boundingBoxes()
+        self.assertEqual(boxes, [BoundingBox(1, 1, 2, 3)])
+
+    def test_label_givenMinPixels_keepsLabelsContiguous(self):
+        extractor = ClusterExtractor(threshold=1, connectivity=4, minPixels=2)
+        self.frame[9, 0] = 5
+        self.frame[9, 1] = 5
+        labels, count = extractor.label(self.frame)
+        self.assertEqual(count, 2)
+        self.assertEqual(set(np.unique(labels)), {0, 1, 2})
+
+    def test_extract_givenNoisyFrame_estimatesThresholdFromNoise(self):
+        rng = np.random.default_rng(0)
+        frame = rng.normal(100, 2, (64, 64))
+        frame[30:32, 30:32] = 500
+        boxes = ClusterExtractor(nSigma=6).extract(frame).boundingBoxes()
+        self.assertEqual(boxes, [BoundingBox(30, 30, 31, 31)])
+
+    def test_init_givenUnsupportedConnectivity_raises(self):
+        with self.assertRaises(ValueError):
+            ClusterExtractor(connectivity=6)
+
+    def test_threshold_givenStatistics_usesMedianAndNoise(self):
+        extractor = ClusterExtractor(nSigma=3)
+        statistics = unittest.mock.Mock(spec=CaptureStatistics)
+        statistics.median.return_value = 100
+        statistics.noise.return_value = 2
+        self.assertEqual(extractor.threshold(self.frame, statistics), 106)
@@ -0,0 +1,44 @@
+import unittest
+import numpy as np
+from ccdioutils.BoundingBox import BoundingBox
+from ccdioutils.ClusterExtractor import ClusterExtractor
+from ccdioutils.ClusterFeatures import ClusterFeatures
+
+
+class TestClusterFeatures(unittest.TestCase):
+    def setUp(self):
+        self.frame = np.zeros((10, 12))
+        self.frame[1, 1:4] = [1, 4, 1]
+        self.frame[6, 8] = 3
+        self.frame[7, 9] = 5
+        labels, count = ClusterExtractor(threshold=0.5).label(self.frame)
+        self.features = ClusterFeatures.compute(self.frame, labels, count)
+
+    def test_compute_givenLabeledFrame_computesEnergyAndPixels(self):
+        self.assertEqual(len(self.features), 2)
+        self.assertTrue(np.allclose(self.features.energy, [6, 8]))
+        self.assertTrue(np.array_equal(self.features.pixels, [3, 2]))
+
+    def test_compute_givenLabeledFrame_computesWidths(self):
+        self.assertTrue(np.array_equal(self.features.fullWidthX(), [3, 2]))
+        self.assertTrue(np.array_equal(self.features.fullWidthY(), [1, 2]))
+
+    def test_compute_givenLabeledFrame_findsPeak(self):
+        self.assertTrue(np.array_equal(self.features.peakRow, [1, 7]))
+        self.assertTrue(np.array_equal(self.features.peakCol, [2, 9]))
+        self.assertTrue(np.allclose(self.features.peakValue, [4, 5]))
+
+    def test_compute_givenLabeledFrame_computesCentroidAndSigma(self):
+        self.assertTrue(np.allclose(self.features.centroidCol[0], 2))
+        self.assertTrue(np.allclose(self.features.sigma[0], np.sqrt(2 / 6 / 2)))
+
+    def test_compute_givenLabeledFrame_matchesClusterExtractor(self):
+        catalog = ClusterExtractor(threshold=0.5).extract(self.frame)
+        self.assertEqual(self.features, catalog)
+        self.assertEqual(catalog.boundingBoxes()[0], BoundingBox(1, 1, 1, 3))
+
+    def test_compute_givenEmptyFrame_returnsNoClusters(self):
+        labels = np.zeros((4, 4), dtype=np.int32)
+        features = ClusterFeatures.compute(np.zeros((4, 4)), labels, 0)
+        self.assertEqual(len(features), 0)
+        self.assertEqual(features.boundingBoxes(), [])
@@ -0,0 +1,117 @@
+import unittest
+import numpy as np
+from astropy.io import fits
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from ccdioutils.CCDCaptureModel import CCDCaptureModel
+from ccdioutils.DataLoader import DataLoader
+
+
+class TestDataLoader(unittest.TestCase):
+    def setUp(self):
+        self.tmpDir = TemporaryDirectory()
+        self.directory = Path(self.tmpDir.name) / "incoming"
+        self.directory.mkdir()
+        self.checkpoint = Path(self.tmpDir.name) / "checkpoint.json"
+
+    def tearDown(self):
+        self.tmpDir.cleanup()
+
+    def _writeCapture(self, name: str, hduCount: int = 1) -> Path:
+        path = self.directory / name
+        hdus = [fits.PrimaryHDU(np.zeros((4, 4), dtype=np.int32))]
+        for _ in range(hduCount - 1):
+            hdus.append(fits.ImageHDU(np.ones((4, 4), dtype=np.int32)))
+        fits.HDUList(hdus).writeto(path)
+        return path
+
+    def _loader(self, **kwargs) -> DataLoader:
+        loader = DataLoader(self.directory, self.checkpoint, settleTime=0, **kwargs)
+        self.addCleanup(loader.close)
+        return loader
+
+    def test_poll_givenNewFile_waitsForItToSettle(self):
+        self._writeCapture("a.fits", hduCount=2)
+        loader = self._loader()
+        self.assertEqual(loader.poll(), [])
+        result = loader.poll()
+        self.assertEqual(len(result), 1)
+        self.assertEqual(result[0][0].name, "a.fits")
+        self.assertEqual(len(result[0][1]), 2)
+
+    def test_poll_givenPartiallyWrittenFile_skipsIt(self):
+        path = self._writeCapture("a.fits")
+        with open(path, "r+b") as f:
+            f.truncate(1000)
+        loader = self._loader()
+        loader.poll()
+        self.assertEqual(loader.poll(), [])
+
+    def test_poll_givenIngestedFile_doesNotIngestItAgain(self):
+        self._writeCapture("a.fits")
+        loader = self._loader()
+        loader.poll()
+        self.assertEqual(len(loader.poll()), 1)
+        loader.poll()
+        self.assertEqual(loader.poll(), [])
+
+    def test_poll_givenCheckpointFromPreviousRun_skipsIngestedFiles(self):
+        self._writeCapture("a.fits")
+        loader = self._loader()
+        loader.poll()
+        loader.poll()
+
+        self._writeCapture("b.fits")
+        restarted = self._loader()
+        restarted.poll()
+        result = restarted.poll()
+        self.assertEqual([path.name for path, _ in result], ["b.fits"])
+
+    def test_poll_givenCorruptFile_reportsItAsFailed(self):
+        path = self.directory / "bad.fits"
+        path.write_bytes(b"\0" * 2880)
+        loader = self._loader()
+        loader.poll()
+        self.assertEqual(loader.poll(), [])
+        self.assertEqual([p.name for p in loader.failedFiles()], ["bad.fits"])
+
+    def test_poll_givenFailedFileRewritten_dropsItsFailure(self):
+        path = self.directory / "bad.fits"
+        path.write_bytes(b"\0" * 2880)
+        loader = self._loader()
+        loader.poll()
+        loader.poll()
+        path.unlink()
+        self._writeCapture("bad.fits")
+        loader.poll()
+        self.assertEqual([p.name for p, _ in loader.poll()], ["bad.fits"])
+        self.assertEqual(loader.failedFiles(), {})
+
+    def test_poll_givenTruncatedPixelData_reportsItAsFailed(self):
+        path = self._writeCapture("a.fits")
+        hdus = [fits.PrimaryHDU(np.zeros((200, 200), dtype=np.int16))]
+        fits.HDUList(hdus).writeto(self.directory / "truncated.fits")
+        with open(self.directory / "truncated.fits", "r+b") as f:
+            f.truncate(3 * 2880)
+        loader = self._loader()
+        loader.poll()
+        result = loader.poll()
+        self.assertEqual([p for p, _ in result], [path])
+        self.assertTrue(result[0][1][0].isLoaded())
+        self.assertEqual([p.name for p in loader.failedFiles()], ["truncated.fits"])
+
+    def test_watch_givenLoaderRaisingAnyError_keepsWatching(self):
+        def loader(path: Path):
+            if path.name == "bad.fits":
+                raise RuntimeError("unexpected")
+            return CCDCaptureModel.load(path)
+
+        self._writeCapture("bad.fits")
+        self._writeCapture("good.fits")
+        dataLoader = self._loader(loader=loader)
+        dataLoader.poll()
+        watched = next(dataLoader.watch(interval=0))
+        self.assertEqual(watched[0].name, "good.fits")
+        failed = dataLoader.failedFiles()
+        self.assertEqual([p.name for p in failed], ["bad.fits"])
+        self.assertEqual(str(next(iter(failed.values()))), "unexpected")
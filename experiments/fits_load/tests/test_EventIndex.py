@@ -0,0 +1,77 @@
+import unittest
+import numpy as np
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from ccdioutils.BoundingBox import BoundingBox
+from ccdioutils.ClusterExtractor import ClusterExtractor
+from ccdioutils.ClusterFeatures import ClusterFeatures
+from ccdioutils.EventIndex import EventIndex
+
+
+class TestEventIndex(unittest.TestCase):
+    def setUp(self):
+        self.frame = np.zeros((20, 20))
+        self.frame[1:3, 1:3] = 5
+        self.frame[10, 10:13] = 7
+        self.frame[18, 18] = 9
+        labels, count = ClusterExtractor(threshold=1).label(self.frame)
+        self.catalog = ClusterFeatures.compute(self.frame, labels, count)
+        self.index = EventIndex()
+
+    def tearDown(self):
+        self.index.close()
+
+    def test_query_givenUnindexedCapture_returnsNone(self):
+        self.assertIsNone(self.index.query("a.fits", 0))
+
+    def test_query_givenBox_returnsIntersectingClusters(self):
+        self.index.insert("a.fits", 0, self.catalog)
+        result = self.index.query("a.fits", 0, BoundingBox(0, 0, 10, 10))
+        self.assertEqual(
+            result.boundingBoxes(),
+            [BoundingBox(1, 1, 2, 2), BoundingBox(10, 10, 10, 12)],
+        )
+        self.assertTrue(np.allclose(result.energy, [20, 21]))
+
+    def test_query_givenUnboundedBox_returnsAllClusters(self):
+        self.index.insert("a.fits", 0, self.catalog)
+        self.assertEqual(self.index.query("a.fits", 0), self.catalog)
+
+    def test_query_givenOtherCapture_doesNotMixCaptures(self):
+        self.index.insert("a.fits", 0, self.catalog)
+        self.index.insert("a.fits", 1, ClusterFeatures.compute(self.frame, *_empty()))
+        self.assertEqual(len(self.index.query("a.fits", 1)), 0)
+        self.assertEqual(len(self.index.query("a.fits", 0)), 3)
+
+    def test_insert_givenIndexedCapture_replacesClusters(self):
+        self.index.insert("a.fits", 0, self.catalog)
+        self.index.insert("a.fits", 0, self.catalog)
+        self.assertEqual(len(self.index.query("a.fits", 0)), 3)
+
+    def test_queryOrIndex_givenIndexedCapture_doesNotExtractAgain(self):
+        calls = []
+
+        def extract():
+            calls.append(1)
+            return self.catalog
+
+        box = BoundingBox(15, 15, 19, 19)
+        self.index.queryOrIndex("a.fits", 0, box, extract)
+        result = self.index.queryOrIndex("a.fits", 0, box, extract)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(result.boundingBoxes(), [BoundingBox(18, 18, 18, 18)])
+
+    def test_init_givenExistingDatabase_keepsIndexedCaptures(self):
+        with TemporaryDirectory() as tmpDir:
+            path = Path(tmpDir) / "events.sqlite"
+            index = EventIndex(path)
+            index.insert("a.fits", 0, self.catalog)
+            index.close()
+            reopened = EventIndex(path)
+            self.assertTrue(reopened.isIndexed("a.fits", 0))
+            self.assertEqual(len(reopened.query("a.fits", 0)), 3)
+            reopened.close()
+
+
+def _empty():
+    return np.zeros((20, 20), dtype=np.int32), 0
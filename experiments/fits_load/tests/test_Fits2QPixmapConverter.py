@@ -7,6 +7,7 @@ from ccdioutils.Fits2QPixmapConverter import (
     FastPixmapConverter,
     MatplotlibBasedConverter,
     RawPixmapConverter,
+    colormapLUT,
 )
 
 
@@ -18,7 +19,7 @@ class TestFits2QPixmapConverter(unittest.TestCase):
         cls.is_ci = getenv("CI") == "true"
         if cls.is_ci:
             return
-        cls.app = QApplication([])
+        cls.app = QApplication.instance() or QApplication([])
 
     @classmethod
     def tearDownClass(cls):
@@ -44,6 +45,35 @@ class TestFits2QPixmapConverter(unittest.TestCase):
         converter = FastPixmapConverter()
         self.assertTrue(converter.isFast())
 
+    @unittest.skipIf(is_ci, "Can't run this test in a headless environment")
+    def test_FastPixmapConverter_toQImage_appliesColormapToScaledData(self):
+        converter = FastPixmapConverter(colormap="viridis")
+        image = converter.toQImage(self.testMatrix)
+        lut = colormapLUT("viridis")
+        self.assertEqual(image.pixel(0, 0), int(lut[63]))
+        self.assertEqual(image.pixel(1, 1), int(lut[255]))
+
+    @unittest.skipIf(is_ci, "Can't run this test in a headless environment")
+    def test_FastPixmapConverter_toQImage_givenDisplayRange_saturatesOutOfRange(self):
+        converter = FastPixmapConverter(colormap="viridis")
+        converter._displayRange = (20, 30)
+        image = converter.toQImage(self.testMatrix)
+        lut = colormapLUT("viridis")
+        self.assertEqual(image.pixel(0, 0), int(lut[0]))
+        self.assertEqual(image.pixel(1, 0), int(lut[0]))
+        self.assertEqual(image.pixel(0, 1), int(lut[255]))
+
+    def test_FastPixmapConverter_toIndices_clipsOutOfRangeValues(self):
+        indices = FastPixmapConverter.toIndices(self.testMatrix, 20, 30)
+        self.assertEqual(indices.dtype, np.uint8)
+        self.assertTrue(np.array_equal(indices, [[0, 0], [255, 255]]))
+
+    def test_colormapLUT_givenColormapName_returnsOpaqueTable(self):
+        lut = colormapLUT("Greys_r")
+        self.assertEqual(lut.shape, (256,))
+        self.assertEqual(int(lut[0]), 0xFF000000)
+        self.assertEqual(int(lut[255]), 0xFFFFFFFF)
+
     @unittest.skipIf(is_ci, "Can't run this test in a headless environment")
     def test_RawPixmapConverter_convert_returnsQPixmap(self):
         converter = RawPixmapConverter()
@@ -0,0 +1,45 @@
+import unittest
+import numpy as np
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from ccdioutils.FrameFilter import FrameFilter
+
+
+class _Offset(FrameFilter):
+    FRAME_NAME = "offset"
+
+    def __init__(self, offset: np.ndarray):
+        super().__init__(offset)
+        self.offset = offset
+
+    def filter(self, matrix: np.matrix) -> np.matrix:
+        self._checkShape(matrix)
+        return matrix - self.offset
+
+
+class TestFrameFilter(unittest.TestCase):
+    def test_filter_givenOtherShape_raisesNamingFrame(self):
+        with self.assertRaisesRegex(ValueError, r"offset \(2, 3\)"):
+            _Offset(np.zeros((2, 3))).filter(np.zeros((3, 2)))
+
+    def test_cacheKey_givenSameValuesOtherShape_differs(self):
+        self.assertEqual(
+            _Offset(np.zeros((2, 3))).cacheKey(), _Offset(np.zeros((2, 3))).cacheKey()
+        )
+        self.assertNotEqual(
+            _Offset(np.zeros((2, 3))).cacheKey(), _Offset(np.zeros((3, 2))).cacheKey()
+        )
+
+    def test_saveFrames_givenFrames_loadsThemBackByHDU(self):
+        frames = [
+            {"bias": np.zeros(2), "dark": np.ones(2)},
+            {"bias": np.full(2, 2.0), "dark": None},
+        ]
+        with TemporaryDirectory() as directory:
+            path = Path(directory) / "frames.npz"
+            FrameFilter._saveFrames(path, frames, mean0=np.ones(3), notes=np.zeros(1))
+            loaded = FrameFilter._loadFrames(path, "bias")
+        self.assertEqual(len(loaded), 2)
+        self.assertEqual(sorted(loaded[0]), ["bias", "dark", "mean"])
+        self.assertEqual(sorted(loaded[1]), ["bias"])
+        self.assertEqual(loaded[1]["bias"].tolist(), [2, 2])
@@ -0,0 +1,47 @@
+import unittest
+import numpy as np
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from ccdioutils.CalibrationFilter import CalibrationFilter
+from ccdioutils.CCDCaptureModel import CCDCaptureModel
+from ccdioutils.HDUFilters import HDUFilters
+from ccdioutils.HotPixelMask import HotPixelMask
+
+
+class TestHDUFilters(unittest.TestCase):
+    def setUp(self):
+        self.mask = np.zeros((2, 3), dtype=bool)
+        self.mask[0, 0] = True
+        self.filters = HDUFilters(
+            [
+                [CalibrationFilter(np.full((2, 3), i + 1.0)) for i in range(2)],
+                [HotPixelMask(self.mask)] * 2,
+            ]
+        )
+
+    def test_apply_givenIndex_appliesEveryKindInOrder(self):
+        capture = CCDCaptureModel(np.full((2, 3), 10.0))
+        self.filters.apply(capture, 1)
+        expected = np.full((2, 3), 8.0)
+        expected[0, 0] = 0
+        self.assertTrue(np.array_equal(capture.rawData(), expected))
+
+    def test_apply_givenIndexPastFilters_raises(self):
+        with self.assertRaises(ValueError):
+            self.filters.apply(CCDCaptureModel(np.zeros((2, 3))), 2)
+
+    def test_load_givenNoFile_appliesNothing(self):
+        capture = CCDCaptureModel(np.ones((2, 3)))
+        HDUFilters.load().apply(capture, 5)
+        self.assertTrue(np.array_equal(capture.rawData(), np.ones((2, 3))))
+
+    def test_load_givenFiles_readsBothKinds(self):
+        with TemporaryDirectory() as directory:
+            calibration = Path(directory) / "masters.npz"
+            hotPixels = Path(directory) / "hot.npz"
+            CalibrationFilter.save(calibration, [CalibrationFilter(np.ones((2, 3)))])
+            HotPixelMask.save(hotPixels, [HotPixelMask(self.mask)])
+            filters = HDUFilters.load(calibration, hotPixels)
+        capture = CCDCaptureModel(np.full((2, 3), 3.0))
+        filters.apply(capture, 0)
+        self.assertEqual(capture.rawData().tolist(), [[0, 2, 2], [2, 2, 2]])
@@ -0,0 +1,55 @@
+import unittest
+import numpy as np
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from ccdioutils.CCDCaptureModel import CCDCaptureModel
+from ccdioutils.ClusterExtractor import ClusterExtractor
+from ccdioutils.HotPixelMask import HotPixelMask
+
+
+class TestHotPixelMask(unittest.TestCase):
+    def setUp(self):
+        self.mask = np.zeros((4, 5), dtype=bool)
+        self.mask[1, 2] = True
+        self.frame = np.zeros((4, 5), dtype=np.int32)
+        self.frame[1, 2] = 500
+
+    def test_filter_givenMask_replacesMaskedPixels(self):
+        result = HotPixelMask(self.mask, -1.5).filter(self.frame)
+        self.assertEqual(result[1, 2], -1.5)
+        self.assertEqual(result.dtype, np.float64)
+        self.assertEqual(self.frame[1, 2], 500)
+
+    def test_filter_givenValueFittingCaptureType_keepsType(self):
+        frame = self.frame.astype(np.uint16)
+        result = HotPixelMask(self.mask).filter(frame)
+        self.assertEqual(result.dtype, np.uint16)
+        self.assertEqual(result[1, 2], 0)
+        self.assertEqual(HotPixelMask(self.mask, -1).resultType(np.uint16), np.int32)
+
+    def test_filter_givenOtherShape_raises(self):
+        with self.assertRaises(ValueError):
+            HotPixelMask(self.mask).filter(np.zeros((5, 4)))
+
+    def test_cacheKey_givenSameMask_isEqual(self):
+        other = self.mask.copy()
+        self.assertEqual(
+            HotPixelMask(self.mask).cacheKey(), HotPixelMask(other).cacheKey()
+        )
+        other[0, 0] = True
+        self.assertNotEqual(
+            HotPixelMask(self.mask).cacheKey(), HotPixelMask(other).cacheKey()
+        )
+
+    def test_save_givenMasks_loadsThemBack(self):
+        with TemporaryDirectory() as directory:
+            path = Path(directory) / "hot.npz"
+            HotPixelMask.save(path, [HotPixelMask(self.mask)] * 2, mean0=self.frame)
+            masks = HotPixelMask.load(path)
+        self.assertEqual(len(masks), 2)
+        self.assertEqual(masks[1].count(), 1)
+
+    def test_applyFilter_givenModel_hidesPixelFromClustering(self):
+        capture = CCDCaptureModel(self.frame.astype(np.float32))
+        capture.applyFilter(HotPixelMask(self.mask))
+        self.assertEqual(len(ClusterExtractor(10).extract(capture.rawData())), 0)
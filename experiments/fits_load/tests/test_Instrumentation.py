@@ -0,0 +1,78 @@
+import json
+import numpy as np
+from FitsTestCase import FitsTestCase
+from ccdioutils.CaptureStatistics import CaptureStatistics
+from ccdioutils.CCDCaptureModel import CCDCaptureModel
+from ccdioutils.Instrumentation import HISTOGRAM_EDGES_MS, Instrumentation
+from ccdioutils.VizFilter import UniformFilter
+
+
+class TestInstrumentation(FitsTestCase):
+    def tearDown(self):
+        Instrumentation.disable()
+
+    def test_stage_givenDisabled_recordsNothing(self):
+        first = Instrumentation.stage("stats")
+        second = Instrumentation.stage("filter")
+        with first as stage:
+            stage.setBytes(10)
+        self.assertIs(first, second)
+        self.assertIsNone(Instrumentation.active())
+
+    def test_stage_givenEnabled_recordsDurationAndBytes(self):
+        instrumentation = Instrumentation.enable()
+        with Instrumentation.stage("filter") as stage:
+            stage.setBytes(64)
+        ms, nbytes = instrumentation.last()["filter"]
+        self.assertGreaterEqual(ms, 0)
+        self.assertEqual(nbytes, 64)
+
+    def test_compute_givenEnabled_recordsStatsStage(self):
+        instrumentation = Instrumentation.enable()
+        CaptureStatistics.compute(np.arange(16.0).reshape((4, 4)), bins=8)
+        self.assertEqual(instrumentation.stages(), ["stats"])
+
+    def test_rawData_givenFilteredLazyCapture_timesReadAndReplayApart(self):
+        path = self.writeFits("a.fits", [np.zeros((4, 8), dtype=np.int16)])
+        capture = CCDCaptureModel.load(path)[0]
+        capture.applyFilter(UniformFilter.ScalarMultiply(0.5))
+        instrumentation = Instrumentation.enable()
+        capture.rawData()
+        self.assertEqual(instrumentation.stages(), ["load", "filter"])
+        self.assertEqual(instrumentation.last()["load"][1], 4 * 8 * 2)
+        self.assertEqual(instrumentation.last()["filter"][1], 4 * 8 * 8)
+
+    def test_summary_givenSamples_buildsHistogram(self):
+        instrumentation = Instrumentation()
+        for ms in [0.5, 1.0, 2.0, 40.0]:
+            instrumentation.record("convert", ms)
+        summary = instrumentation.summary()["convert"]
+        self.assertEqual(summary["count"], 4)
+        self.assertEqual(summary["max_ms"], 40.0)
+        self.assertEqual(summary["last_ms"], 40.0)
+        self.assertEqual(sum(summary["histogram"]["counts"]), 4)
+        self.assertEqual(len(summary["histogram"]["edges_ms"]), len(HISTOGRAM_EDGES_MS))
+
+    def test_summary_givenSamplesOutsideEdges_countsThemApart(self):
+        instrumentation = Instrumentation()
+        for milliseconds in [0.001, 1, 10000, 60000, 90000]:
+            instrumentation.record("load", milliseconds)
+        histogram = instrumentation.summary()["load"]["histogram"]
+        self.assertEqual(sum(histogram["counts"]), 2)
+        self.assertEqual(histogram["underflow"], 1)
+        self.assertEqual(histogram["overflow"], 2)
+
+    def test_record_givenFullWindow_dropsOldestSamples(self):
+        instrumentation = Instrumentation(window=3)
+        for ms in range(1, 6):
+            instrumentation.record("paint", float(ms))
+        summary = instrumentation.summary()["paint"]
+        self.assertEqual(summary["count"], 5)
+        self.assertEqual(summary["window"], 3)
+        self.assertEqual(summary["mean_ms"], 4.0)
+
+    def test_toJSON_givenSamples_isParsable(self):
+        instrumentation = Instrumentation()
+        instrumentation.record("parse", 1.5, 128)
+        stages = json.loads(instrumentation.toJSON())["stages"]
+        self.assertEqual(stages["parse"]["last_bytes"], 128)
@@ -0,0 +1,85 @@
+import tracemalloc
+import unittest
+import numpy as np
+from ccdioutils.MasterFrameBuilder import MasterFrameBuilder
+
+
+class TestMasterFrameBuilder(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.bias = rng.normal(1000, 5, (32, 48))
+        self.frames = [self.bias + rng.normal(0, 1, self.bias.shape) for _ in range(40)]
+        # Particle hits on a few frames
+        for frame in self.frames[::7]:
+            frame[3:6, 10:20] += 5000
+
+    def build(self, method: str, frames, **kwargs) -> np.ndarray:
+        builder = MasterFrameBuilder(method, **kwargs)
+        for frame in frames:
+            builder.add(frame)
+        return builder.result()
+
+    def test_result_givenSigmaClip_rejectsHits(self):
+        master = self.build("sigmaclip", self.frames)
+        self.assertEqual(master.dtype, np.float32)
+        self.assertLess(np.abs(master - self.bias).max(), 1.5)
+
+    def test_result_givenMedian_rejectsHits(self):
+        master = self.build("median", self.frames)
+        self.assertLess(np.abs(master - self.bias).max(), 1.5)
+
+    def test_add_givenSmallBudget_boundsChunk(self):
+        frameBytes = self.bias.size * 4
+        builder = MasterFrameBuilder(memoryBudget=9 * frameBytes)
+        for frame in self.frames:
+            builder.add(frame)
+        self.assertEqual(builder.chunkFrames(), 5)
+        self.assertEqual(builder.count(), 40)
+        self.assertLess(np.abs(builder.result() - self.bias).max(), 1.5)
+
+    def test_result_givenHitInLoneTrailingFrame_rejectsIt(self):
+        frameBytes = self.bias.size * 4
+        frames = [self.bias + 0.0 for _ in range(6)]
+        frames[-1] = frames[-1] + 5000
+        for method in MasterFrameBuilder.METHODS:
+            builder = MasterFrameBuilder(method, memoryBudget=9 * frameBytes)
+            for frame in frames:
+                builder.add(frame)
+            self.assertEqual(builder.count() % builder.chunkFrames(), 1)
+            self.assertTrue(np.allclose(builder.result(), self.bias), method)
+
+    def test_add_givenManyFrames_keepsMemoryBounded(self):
+        frame = np.zeros((256, 256), dtype=np.float32)
+        budget = 12 * frame.nbytes
+
+        def peak(count: int) -> int:
+            builder = MasterFrameBuilder(memoryBudget=budget)
+            tracemalloc.start()
+            for _ in range(count):
+                builder.add(frame)
+            builder.result()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            return peak
+
+        few, many = peak(16), peak(160)
+        self.assertLess(many, budget + 4 * MasterFrameBuilder.BLOCK_BYTES)
+        self.assertLess(many, 1.1 * few)
+
+    def test_add_givenSubtract_removesItFirst(self):
+        master = self.build(
+            "median", [np.full((4, 4), 7.0)] * 3, subtract=np.ones((4, 4))
+        )
+        self.assertTrue(np.all(master == 6))
+
+    def test_add_givenInvalidInput_raises(self):
+        with self.assertRaises(ValueError):
+            MasterFrameBuilder("mean")
+        with self.assertRaises(ValueError):
+            MasterFrameBuilder(memoryBudget=100).add(np.zeros((10, 10)))
+        builder = MasterFrameBuilder()
+        builder.add(np.zeros((4, 4)))
+        with self.assertRaises(ValueError):
+            builder.add(np.zeros((4, 5)))
+        with self.assertRaises(ValueError):
+            MasterFrameBuilder().result()
@@ -0,0 +1,80 @@
+import tracemalloc
+import unittest
+import numpy as np
+from ccdioutils.NoiseAccumulator import NoiseAccumulator
+
+
+class TestNoiseAccumulator(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.frames = rng.normal(0, 1, (50, 40, 40))
+        # A noisy pixel, a hot pixel always above threshold, and a rare hit
+        self.frames[:, 5, 5] *= 10
+        self.frames[:, 20, 30] += 100
+        self.frames[7, 30, 10] += 100
+
+    def accumulate(self, frames, threshold: float = 20) -> NoiseAccumulator:
+        accumulator = NoiseAccumulator(threshold)
+        for frame in frames:
+            accumulator.add(frame)
+        return accumulator
+
+    def test_add_givenFrames_matchesBatchStatistics(self):
+        accumulator = self.accumulate(self.frames[:, :4, :4])
+        self.assertEqual(accumulator.count(), 50)
+        self.assertTrue(np.allclose(accumulator.mean(), self.frames[:, :4, :4].mean(0)))
+        self.assertTrue(
+            np.allclose(accumulator.variance(), self.frames[:, :4, :4].var(0, ddof=1))
+        )
+
+    def test_add_givenHits_excludesThemFromNoise(self):
+        accumulator = self.accumulate(self.frames)
+        expected = np.delete(self.frames[:, 30, 10], 7)
+        self.assertAlmostEqual(accumulator.mean()[30, 10], expected.mean())
+        self.assertAlmostEqual(accumulator.std()[30, 10], expected.std(ddof=1))
+        self.assertEqual(accumulator.hitFrequency()[30, 10], 1 / 50)
+        self.assertEqual(accumulator.hitFrequency()[20, 30], 1)
+        self.assertTrue(np.isnan(accumulator.variance()[20, 30]))
+
+    def test_merge_givenSplitStream_matchesSingleStream(self):
+        whole = self.accumulate(self.frames)
+        merged = self.accumulate(self.frames[:20])
+        merged.merge(self.accumulate(self.frames[20:]))
+        self.assertEqual(merged.count(), 50)
+        self.assertTrue(np.allclose(merged.mean(), whole.mean()))
+        self.assertTrue(
+            np.allclose(merged.variance(), whole.variance(), equal_nan=True)
+        )
+        self.assertTrue(np.array_equal(merged.hitFrequency(), whole.hitFrequency()))
+
+    def test_hotPixelMask_givenNoisyAndHotPixels_masksOnlyThem(self):
+        mask = self.accumulate(self.frames).hotPixelMask()
+        self.assertEqual(np.argwhere(mask.mask()).tolist(), [[5, 5], [20, 30]])
+
+    def test_add_givenEstimatedThreshold_countsHits(self):
+        accumulator = NoiseAccumulator(nSigma=5)
+        for frame in self.frames:
+            accumulator.add(frame)
+        self.assertEqual(accumulator.hitFrequency()[20, 30], 1)
+        self.assertEqual(accumulator.hitFrequency()[30, 10], 1 / 50)
+
+    def test_add_afterFirstFrame_allocatesNoFrame(self):
+        accumulator = NoiseAccumulator(threshold=20)
+        frame = np.zeros((1024, 1024))
+        accumulator.add(frame)
+        tracemalloc.start()
+        for _ in range(10):
+            accumulator.add(frame)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        self.assertLess(peak, frame.nbytes / 10)
+
+    def test_add_givenInvalidInput_raises(self):
+        accumulator = NoiseAccumulator(threshold=1)
+        with self.assertRaises(ValueError):
+            accumulator.mean()
+        accumulator.add(np.zeros((4, 4)))
+        with self.assertRaises(ValueError):
+            accumulator.add(np.zeros((4, 5)))
+        with self.assertRaises(ValueError):
+            accumulator.hotPixelMask()
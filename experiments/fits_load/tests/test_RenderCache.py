@@ -0,0 +1,57 @@
+import unittest
+from ccdioutils.RenderCache import RenderCache
+
+
+class TestRenderCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = RenderCache(maxBytes=10, sizeOf=len)
+
+    def test_get_givenMissingKey_countsMiss(self):
+        self.assertIsNone(self.cache.get("a"))
+        self.assertEqual(self.cache.misses(), 1)
+        self.assertEqual(self.cache.hits(), 0)
+
+    def test_get_givenStoredKey_countsHit(self):
+        self.cache.put("a", "1234")
+        self.assertEqual(self.cache.get("a"), "1234")
+        self.assertEqual(self.cache.hits(), 1)
+        self.assertEqual(self.cache.currentBytes(), 4)
+
+    def test_put_overBudget_evictsLeastRecentlyUsed(self):
+        self.cache.put("a", "1234")
+        self.cache.put("b", "1234")
+        self.cache.get("a")
+        self.cache.put("c", "1234")
+        self.assertIsNone(self.cache.get("b"))
+        self.assertIsNotNone(self.cache.get("a"))
+        self.assertIsNotNone(self.cache.get("c"))
+        self.assertEqual(self.cache.currentBytes(), 8)
+
+    def test_put_givenValueLargerThanBudget_doesNotStoreIt(self):
+        self.cache.put("a", "x" * 11)
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.currentBytes(), 0)
+
+    def test_put_givenExistingKey_replacesValue(self):
+        self.cache.put("a", "1234")
+        self.cache.put("a", "12")
+        self.assertEqual(self.cache.get("a"), "12")
+        self.assertEqual(self.cache.currentBytes(), 2)
+
+    def test_getOrRender_givenCachedKey_doesNotRenderAgain(self):
+        renders = []
+
+        def render():
+            renders.append(1)
+            return "12"
+
+        self.cache.getOrRender("a", render)
+        self.cache.getOrRender("a", render)
+        self.assertEqual(len(renders), 1)
+
+    def test_setMaxBytes_givenSmallerBudget_evicts(self):
+        self.cache.put("a", "1234")
+        self.cache.put("b", "1234")
+        self.cache.setMaxBytes(5)
+        self.assertEqual(len(self.cache), 1)
+        self.assertIsNotNone(self.cache.get("b"))
@@ -0,0 +1,80 @@
+import unittest
+import numpy as np
+from ccdioutils.ClusterCatalog import ClusterCatalog
+from ccdioutils.ClusterExtractor import ClusterExtractor
+from ccdioutils.StampExtractor import StampExtractor
+
+
+class TestStampExtractor(unittest.TestCase):
+    def setUp(self):
+        self.frame = np.arange(20 * 30, dtype=np.float64).reshape((20, 30))
+        self.catalog = ClusterCatalog.empty(2)
+        records = self.catalog.records()
+        # A 3x3 cluster in the middle, a single pixel one in the top left corner
+        records[0] = (9, 14, 11, 16, 9, 0, 0, 10, 15, 10, 16, 0)
+        records[1] = (0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0)
+
+    def test_extract_givenInnerCluster_cutsStampAroundBoxCenter(self):
+        stamps = StampExtractor(shape=(4, 6)).extract(self.frame, self.catalog)
+        self.assertEqual(stamps.shape, (2, 4, 6))
+        self.assertEqual(stamps.dtype, np.float32)
+        self.assertTrue(np.array_equal(stamps[0], self.frame[8:12, 12:18]))
+
+    def test_extract_givenClusterOnEdge_padsOutsidePixels(self):
+        stamps = StampExtractor(shape=(4, 4), padValue=-1).extract(
+            self.frame, self.catalog
+        )
+        self.assertTrue(np.all(stamps[1, :2, :] == -1))
+        self.assertTrue(np.all(stamps[1, :, :2] == -1))
+        self.assertTrue(np.array_equal(stamps[1, 2:, 2:], self.frame[:2, :2]))
+
+    def test_extract_givenRecenter_centersOnPeak(self):
+        stamps = StampExtractor(shape=(3, 3), recenter=True).extract(
+            self.frame, self.catalog
+        )
+        self.assertEqual(stamps[0, 1, 1], self.frame[10, 16])
+
+    def test_extract_givenCrop_offsetsByOrigin(self):
+        extractor = StampExtractor(shape=(4, 6))
+        stamps = extractor.extract(self.frame[5:, 10:], self.catalog[:1], (5, 10))
+        self.assertTrue(np.array_equal(stamps[0], self.frame[8:12, 12:18]))
+
+    def test_extract_givenBuffer_fillsItInPlace(self):
+        extractor = StampExtractor(shape=(4, 4))
+        buffer = extractor.allocate(8)
+        stamps = extractor.extract(self.frame, self.catalog, out=buffer)
+        self.assertEqual(len(stamps), 2)
+        self.assertTrue(np.shares_memory(stamps, buffer))
+        with self.assertRaises(ValueError):
+            extractor.extract(self.frame, self.catalog, out=extractor.allocate(1))
+
+    def test_extract_givenExtractedClusters_matchesPerClusterSlicing(self):
+        frame = np.zeros((64, 64))
+        frame[[5, 20, 40, 60], [7, 30, 2, 50]] = 10
+        catalog = ClusterExtractor(threshold=1).extract(frame)
+        stamps = StampExtractor(shape=(6, 6), recenter=True).extract(frame, catalog)
+        padded = np.pad(frame, 3)
+        for stamp, row, col in zip(stamps, catalog.peakRow, catalog.peakCol):
+            self.assertTrue(np.array_equal(stamp, padded[row : row + 6, col : col + 6]))
+
+    def test_extract_givenMoreStampsThanABlock_gathersEveryBlock(self):
+        frame = np.zeros((64, 64))
+        rows, cols = np.meshgrid(np.arange(1, 64, 4), np.arange(2, 64, 6))
+        frame[rows, cols] = 10
+        catalog = ClusterExtractor(threshold=1).extract(frame)
+        extractor = StampExtractor(shape=(6, 6), recenter=True)
+        extractor.BLOCK_STAMPS = 7
+        inner = (
+            (catalog.peakRow >= 3)
+            & (catalog.peakRow <= 61)
+            & (catalog.peakCol >= 3)
+            & (catalog.peakCol <= 61)
+        )
+        # Stamps crossing the edges among the rest, then only inner ones
+        for sub in [catalog, catalog[inner]]:
+            stamps = extractor.extract(frame, sub)
+            padded = np.pad(frame, 3)
+            for stamp, row, col in zip(stamps, sub.peakRow, sub.peakCol):
+                self.assertTrue(
+                    np.array_equal(stamp, padded[row : row + 6, col : col + 6])
+                )
@@ -0,0 +1,70 @@
+import unittest
+import numpy as np
+from ccdioutils.VizFilter import FilterPipeline, UniformFilter, UniformVizFilter
+
+
+class TestFilterPipeline(unittest.TestCase):
+    class Transpose(UniformVizFilter):
+        def filter(self, matrix: np.matrix) -> np.matrix:
+            return matrix[::-1].copy()
+
+    def setUp(self):
+        self.matrix = np.arange(-50, 50, dtype=np.int32).reshape((20, 5))
+        self.filters = [
+            UniformFilter.Add(3),
+            UniformFilter.ScalarMultiply(0.5),
+            UniformFilter.SubstituteOutOfRange(-10, 10, 0),
+            UniformFilter.SubstituteInRange(-1, 1, 100),
+        ]
+
+    def _sequential(self, matrix: np.ndarray) -> np.ndarray:
+        for f in self.filters:
+            matrix = f.filter(matrix)
+        return matrix
+
+    def test_filter_givenFilterChain_matchesSequentialApplication(self):
+        pipeline = FilterPipeline(self.filters)
+        result = pipeline.filter(self.matrix)
+        self.assertEqual(result.dtype, np.float64)
+        self.assertTrue(np.array_equal(result, self._sequential(self.matrix)))
+
+    def test_filter_givenFilterChain_leavesInputUntouched(self):
+        original = self.matrix.copy()
+        FilterPipeline(self.filters).filter(self.matrix)
+        self.assertTrue(np.array_equal(self.matrix, original))
+
+    def test_apply_givenSmallBlocks_matchesSequentialApplication(self):
+        pipeline = FilterPipeline(self.filters)
+        pipeline.BLOCK_BYTES = 64
+        result = pipeline.apply(self.matrix)
+        self.assertTrue(np.array_equal(result, self._sequential(self.matrix)))
+
+    def test_apply_withoutOutput_reusesScratchBuffer(self):
+        pipeline = FilterPipeline(self.filters)
+        first = pipeline.apply(self.matrix)
+        second = pipeline.apply(self.matrix + 1)
+        self.assertIs(first, second)
+
+    def test_apply_givenOutput_writesIntoIt(self):
+        pipeline = FilterPipeline(self.filters)
+        out = np.empty(self.matrix.shape)
+        self.assertIs(pipeline.apply(self.matrix, out=out), out)
+        self.assertTrue(np.array_equal(out, self._sequential(self.matrix)))
+
+    def test_filterInPlace_givenFloatMatrix_overwritesIt(self):
+        matrix = self.matrix.astype(np.float64)
+        result = FilterPipeline(self.filters).filterInPlace(matrix)
+        self.assertIs(result, matrix)
+        self.assertTrue(np.array_equal(matrix, self._sequential(self.matrix)))
+
+    def test_apply_givenNonElementwiseFilter_appliesItToTheWholeFrame(self):
+        self.filters.insert(2, TestFilterPipeline.Transpose())
+        pipeline = FilterPipeline(self.filters)
+        pipeline.BLOCK_BYTES = 64
+        result = pipeline.apply(self.matrix)
+        self.assertTrue(np.array_equal(result, self._sequential(self.matrix)))
+
+    def test_apply_givenEmptyPipeline_copiesInput(self):
+        result = FilterPipeline().apply(self.matrix)
+        self.assertIsNot(result, self.matrix)
+        self.assertTrue(np.array_equal(result, self.matrix))
@@ -0,0 +1,82 @@
+import subprocess
+import sys
+import unittest.mock
+import numpy as np
+from astropy.io import fits
+from pathlib import Path
+from FitsTestCase import FitsTestCase
+from ccd_batch import buildCatalog, findFiles, initWorker, processFile
+from ccdioutils.HotPixelMask import HotPixelMask
+from ccdioutils.ClusterExtractor import ClusterExtractor
+
+
+class TestCCDBatch(FitsTestCase):
+    def setUp(self):
+        super().setUp()
+        frame = np.zeros((8, 8), dtype=np.float32)
+        frame[1:3, 1:3] = 100
+        frame[6, 6] = 50
+        for name in ["a.fits", "b.fits"]:
+            self.writeFits(name, [frame, frame])
+        (self.directory / "notes.txt").write_text("")
+
+    def test_findFiles_givenDirectory_keepsFitsFilesOnly(self):
+        files = findFiles([str(self.directory), str(self.directory / "a.fits")])
+        self.assertEqual([path.name for path in files], ["a.fits", "b.fits"])
+
+    def test_processFile_givenTwoCaptures_returnsClusterColumns(self):
+        result = processFile(self.directory / "a.fits", 0.5, ClusterExtractor(10))
+        self.assertEqual(result["captureHdu"].tolist(), [1, 2])
+        self.assertEqual(result["hdu"].tolist(), [1, 1, 2, 2])
+        self.assertEqual(result["pixels"].tolist(), [4, 1, 4, 1])
+        self.assertEqual(result["energy"].tolist(), [200, 25, 200, 25])
+
+    def test_processFile_givenUint16CaptureWithBZERO_clustersScaledValues(self):
+        frame = np.full((8, 8), 1000, dtype=np.uint16)
+        frame[1:3, 1:3] = 40000
+        path = self.writeFits("uint16.fits", [frame])
+        with fits.open(path) as hduList:
+            self.assertEqual(hduList[1].header["BZERO"], 32768)
+        result = processFile(path, 1, ClusterExtractor(20000))
+        self.assertEqual(result["hdu"].tolist(), [1])
+        self.assertEqual(result["pixels"].tolist(), [4])
+        self.assertEqual(result["energy"].tolist(), [160000])
+
+    def test_processFile_afterInitWorker_appliesItsFilters(self):
+        mask = np.zeros((8, 8), dtype=bool)
+        mask[1:3, 1:3] = True
+        hotPixels = self.directory / "hot.npz"
+        HotPixelMask.save(hotPixels, [HotPixelMask(mask)] * 2)
+        self.addCleanup(initWorker, None, None)
+        initWorker(None, hotPixels)
+        with unittest.mock.patch.object(HotPixelMask, "load") as load:
+            results = [
+                processFile(self.directory / name, 1, ClusterExtractor(10))
+                for name in ["a.fits", "b.fits"]
+            ]
+        load.assert_not_called()
+        for result in results:
+            self.assertEqual(result["pixels"].tolist(), [1, 1])
+
+    def test_buildCatalog_givenFiles_indexesSources(self):
+        files = findFiles([str(self.directory)])
+        results = [processFile(path, 1, ClusterExtractor(10)) for path in files]
+        catalog = buildCatalog(files, results)
+        self.assertEqual(catalog["source"].tolist(), [0, 0, 0, 0, 1, 1, 1, 1])
+        self.assertEqual(catalog["captureSource"].tolist(), [0, 0, 1, 1])
+        self.assertEqual(len(catalog["sources"]), 2)
+
+    def test_import_doesNotLoadGUIStack(self):
+        loaded = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "import sys, ccd_batch;"
+                "print(any(m in sys.modules for m in ('PySide6', 'matplotlib')))",
+            ],
+            cwd=Path(__file__).resolve().parent.parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        self.assertEqual(loaded.stdout.strip(), "False")
@@ -0,0 +1,47 @@
+import numpy as np
+from pathlib import Path
+from FitsTestCase import FitsTestCase
+from ccd_batch import processFile
+from ccd_calibrate import buildMasters
+from ccdioutils.CalibrationFilter import CalibrationFilter
+from ccdioutils.ClusterExtractor import ClusterExtractor
+from ccdioutils.HDUFilters import HDUFilters
+
+
+class TestCCDCalibrate(FitsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.bias = [np.full((8, 8), 100.0), np.full((8, 8), 200.0)]
+        self.biasFiles = []
+        for i in range(5):
+            frames = [bias.copy() for bias in self.bias]
+            # A hit on one exposure must not leak into the master
+            frames[0][i, i] += 1000
+            self.biasFiles.append(self.write(f"bias{i}.fits", frames))
+        self.darkFiles = [
+            self.write(f"dark{i}.fits", [bias + 3 for bias in self.bias])
+            for i in range(3)
+        ]
+
+    def write(self, name: str, frames) -> Path:
+        return self.writeFits(name, [frame.astype(np.float32) for frame in frames])
+
+    def test_buildMasters_givenBiasFiles_returnsOneMasterPerHDU(self):
+        masters = buildMasters(self.biasFiles, 1 << 20)
+        self.assertEqual(len(masters), 2)
+        for master, bias in zip(masters, self.bias):
+            self.assertTrue(np.array_equal(master, bias))
+
+    def test_buildMasters_givenSubtract_buildsDarks(self):
+        darks = buildMasters(self.darkFiles, 1 << 20, "median", subtract=self.bias)
+        self.assertTrue(all(np.all(dark == 3) for dark in darks))
+
+    def test_processFile_givenCalibration_subtractsMasters(self):
+        path = self.directory / "masters.npz"
+        CalibrationFilter.save(path, [CalibrationFilter(b) for b in self.bias])
+        frames = [bias.copy() for bias in self.bias]
+        frames[1][2:4, 2:4] += 50
+        science = self.write("science.fits", frames)
+        result = processFile(science, 1, ClusterExtractor(10), HDUFilters.load(path))
+        self.assertEqual(result["hdu"].tolist(), [2])
+        self.assertEqual(result["energy"].tolist(), [200])
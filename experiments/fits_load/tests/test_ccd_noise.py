@@ -0,0 +1,22 @@
+import numpy as np
+from FitsTestCase import FitsTestCase
+from ccd_noise import accumulateFiles
+
+
+class TestCCDNoise(FitsTestCase):
+    def setUp(self):
+        super().setUp()
+        rng = np.random.default_rng(0)
+        self.files = []
+        for i in range(6):
+            frames = rng.normal(0, 1, (2, 16, 16)).astype(np.float32)
+            frames[1, 3, 4] += 100
+            self.files.append(self.writeFits(f"{i}.fits", frames))
+
+    def test_accumulateFiles_givenFiles_masksHotPixelPerHDU(self):
+        accumulators = accumulateFiles(self.files, threshold=20)
+        self.assertEqual([a.count() for a in accumulators], [6, 6])
+        self.assertEqual(accumulators[0].hotPixelMask().count(), 0)
+        self.assertEqual(
+            np.argwhere(accumulators[1].hotPixelMask().mask()).tolist(), [[3, 4]]
+        )
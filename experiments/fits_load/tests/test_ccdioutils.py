@@ -0,0 +1,49 @@
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+
+
+def loadedModules(code: str, modules) -> list:
+    """Run code in a fresh interpreter, return which of modules it ended up loading"""
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            f"import sys\n{code}\n"
+            f"print(','.join(m for m in {tuple(modules)!r} if m in sys.modules))",
+        ],
+        cwd=Path(__file__).resolve().parent.parent,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return [m for m in result.stdout.strip().split(",") if m]
+
+
+class TestCCDIOUtils(unittest.TestCase):
+    def test_import_givenHeadlessMembers_doesNotLoadGUIStack(self):
+        loaded = loadedModules(
+            "from ccdioutils import CCDCaptureModel, ClusterExtractor, FilterPipeline",
+            ["PySide6", "superqt", "matplotlib", "scipy", "astropy.time"],
+        )
+        self.assertEqual(loaded, [])
+
+    def test_getattr_givenGUIMember_loadsItOnFirstAccess(self):
+        loaded = loadedModules(
+            "from ccdioutils import FastPixmapConverter", ["PySide6", "matplotlib"]
+        )
+        self.assertEqual(loaded, ["PySide6", "matplotlib"])
+
+    def test_getattr_givenImportedGUISubmodule_resolvesToClass(self):
+        import ccdioutils.CCDCaptureViewModel
+        import ccdioutils
+
+        self.assertIsInstance(ccdioutils.CCDCaptureViewModel, type)
+        self.assertIsInstance(ccdioutils.TiledCCDView, type)
+
+    def test_getattr_givenUnknownMember_raisesAttributeError(self):
+        import ccdioutils
+
+        with self.assertRaises(AttributeError):
+            ccdioutils.NotAMember
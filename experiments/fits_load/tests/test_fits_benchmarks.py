@@ -0,0 +1,61 @@
+import io
+import numpy as np
+from astropy.io import fits
+from contextlib import redirect_stdout
+from FitsTestCase import FitsTestCase
+from benchmarks.fits_benchmarks import (
+    BUDGETS_MS,
+    compare,
+    frameBenchmarks,
+    overBudget,
+)
+from benchmarks.synthetic import writeFits
+
+
+class TestFitsBenchmarks(FitsTestCase):
+    def result(self, minMs: float, medianMs: float = None):
+        return {"min_ms": minMs, "median_ms": minMs if medianMs is None else medianMs}
+
+    def test_compare_givenSlowerThanTolerance_reportsRegression(self):
+        baseline = {"a": self.result(10), "b": self.result(10), "c": self.result(10)}
+        results = {"a": self.result(11.9), "b": self.result(12.1), "d": self.result(1)}
+        with redirect_stdout(io.StringIO()) as output:
+            regressions = compare(results, baseline, 0.2)
+        self.assertEqual(regressions, ["b"])
+        rows = [line.split() for line in output.getvalue().splitlines()[2:]]
+        # Benchmarks missing from either run are left out
+        self.assertEqual([row[0] for row in rows], ["a", "b"])
+        self.assertEqual(rows[1][-1], "REGRESSION")
+
+    def test_compare_givenZeroBaseline_reportsAnySlowdown(self):
+        with redirect_stdout(io.StringIO()):
+            regressions = compare({"a": self.result(1)}, {"a": self.result(0)}, 0.2)
+        self.assertEqual(regressions, ["a"])
+
+    def test_overBudget_givenMedianOverBudget_reportsIt(self):
+        name, budget = next(iter(BUDGETS_MS.items()))
+        self.assertEqual(overBudget({name: self.result(0, budget)}), [])
+        self.assertEqual(overBudget({name: self.result(0, budget + 1)}), [name])
+        self.assertEqual(overBudget({"other": self.result(0, 1e9)}), [])
+
+    def test_writeFits_givenCaptures_storesThemAsUint16(self):
+        path = writeFits(self.directory / "a.fits", 2, (16, 32))
+        with fits.open(path) as hduList:
+            self.assertEqual(len(hduList), 3)
+            self.assertEqual(hduList[1].header["BZERO"], 32768)
+            self.assertEqual(hduList[1].data.dtype, np.uint16)
+
+    def test_frameBenchmarks_givenSeveralSizes_timesTheNamedSize(self):
+        # Generated up front, later sizes must not leak into earlier closures
+        benchmarks = {
+            name: run for name, run, *_ in frameBenchmarks([(20, 30), (40, 60)])
+        }
+        for rows, cols in [(20, 30), (40, 60)]:
+            suffix = f"{rows}x{cols}"
+            statistics = benchmarks[f"stats/CaptureStatistics/{suffix}"]()
+            self.assertEqual(statistics.count, rows * cols)
+            image = benchmarks[f"convert/FastPixmapConverter/{suffix}"]()
+            self.assertEqual((image.height(), image.width()), (rows, cols))
+            for name in ["ScalarMultiply", "ScalarMultiply/inplace", "FilterPipeline"]:
+                filtered = benchmarks[f"filter/{name}/{suffix}"]()
+                self.assertEqual(np.shape(filtered), (rows, cols))